@@ -0,0 +1,179 @@
+"""
+Per-pitch features shared by the hitter, pitcher and matchup aggregations.
+
+Every helper is a column operation over a store frame; aggregations group the
+result once instead of scanning per event or per pitch type.
+"""
+from __future__ import annotations
+import numpy as np
+import pandas as pd
+
+from backend.sequence_src.scrape_savant import last_pitch_rows
+
+# Map common Statcast pitch names to families (extend as needed)
+PITCH_FAMILY_MAP = {
+    "4-Seam Fastball":"fastball", "4-Seam":"fastball", "FF":"fastball", "Fastball":"fastball",
+    "Sinker":"sinker", "SI":"sinker", "Two-Seam Fastball":"sinker", "FT":"sinker",
+    "Cutter":"cutter", "FC":"cutter",
+    "Slider":"slider", "SL":"slider",
+    "Curveball":"curveball", "CU":"curveball", "Knuckle Curve":"curveball", "KC":"curveball",
+    "Sweeper":"slider", "SV":"slider",  # treat sweeper as slider fam for now
+    "Changeup":"changeup", "CH":"changeup",
+    "Splitter":"splitter", "FS":"splitter",
+    "Knuckleball":"knuckleball", "KN":"knuckleball",
+}
+FAMILIES = ["fastball", "sinker", "cutter", "slider", "curveball", "changeup", "splitter", "knuckleball"]
+
+HIT_BASES = {"single": 1, "double": 2, "triple": 3, "home_run": 4}
+NON_AB_EVENTS = ["walk","intent_walk","hit_by_pitch","sac_fly","sac_fly_double_play","sac_bunt","catcher_interf","catcher_interference"]
+# baserunning plays Statcast records on a PA's last pitch when the PA itself did not end
+NON_PA_EVENTS = [
+    "caught_stealing_2b","caught_stealing_3b","caught_stealing_home",
+    "pickoff_1b","pickoff_2b","pickoff_3b",
+    "pickoff_caught_stealing_2b","pickoff_caught_stealing_3b","pickoff_caught_stealing_home",
+    "pickoff_error_1b","pickoff_error_2b","pickoff_error_3b",
+    "stolen_base_2b","stolen_base_3b","stolen_base_home",
+    "wild_pitch","passed_ball","balk","other_advance","game_advisory","truncated_pa",
+]
+PA_SUMS = ["PA", "AB", "H", "TB", "2B", "3B", "HR", "BB", "HBP", "SF", "K", "xwoba_sum", "xwoba_n"]
+HITTER_COUNTS = ["pitches", "swings", "whiffs", "bbe", "ev_sum", "la_sum", "la_n", "hard", "barrels", "o_pitches", "chases"]
+
+def pitch_family(df: pd.DataFrame) -> pd.Series:
+    if "pitch_name" not in df.columns:
+        return pd.Series("unknown", index=df.index)
+    return df["pitch_name"].map(PITCH_FAMILY_MAP).fillna("unknown")
+
+def pitch_flags(df: pd.DataFrame) -> pd.DataFrame:
+    """swing / whiff / bip (0/1) and ev (launch speed on balls in play) for every pitch."""
+    desc = df["description"].fillna("").astype(str)
+    typ = df["type"].fillna("").astype(str)
+    bip = typ.eq("X")
+    ev = pd.to_numeric(df["launch_speed"], errors="coerce") if "launch_speed" in df.columns else pd.Series(np.nan, index=df.index)
+    return pd.DataFrame({
+        "swing": (bip | (typ.eq("S") & ~desc.str.contains("called_strike"))).astype(np.int64),
+        "whiff": desc.str.contains("swinging_strike|missed_bunt").astype(np.int64),
+        "bip": bip.astype(np.int64),
+        "ev": ev.where(bip),
+    }, index=df.index)
+
+def pa_flags(pas: pd.DataFrame) -> pd.DataFrame:
+    """
+    Additive outcome counts (0/1, TB) for PA-ending rows; xwoba is NaN where Savant has none.
+    A row with no `events` is a PA still in progress, and one with a NON_PA_EVENTS
+    baserunning play is not a PA; both count as nothing, not as an AB.
+    """
+    ev = pas["events"].fillna("")
+    done = ev.ne("") & ~ev.isin(NON_PA_EVENTS)
+    xw = (pd.to_numeric(pas["estimated_woba_using_speedangle"], errors="coerce")
+          if "estimated_woba_using_speedangle" in pas.columns else pd.Series(np.nan, index=pas.index)).where(done)
+    bb = ev.isin(["walk", "intent_walk"])
+    hbp = ev.eq("hit_by_pitch")
+    sf = ev.isin(["sac_fly", "sac_fly_double_play"])
+    ab = done & ~ev.isin(NON_AB_EVENTS)
+    h = ev.isin(list(HIT_BASES))
+    return pd.DataFrame({
+        "PA": done.astype(np.int64),
+        "AB": ab.astype(np.int64),
+        "H": h.astype(np.int64),
+        "TB": ev.map(HIT_BASES).fillna(0).astype(np.int64),
+        "2B": ev.eq("double").astype(np.int64),
+        "3B": ev.eq("triple").astype(np.int64),
+        "HR": ev.eq("home_run").astype(np.int64),
+        "BB": bb.astype(np.int64),
+        "HBP": hbp.astype(np.int64),
+        "SF": sf.astype(np.int64),
+        "K": ev.isin(["strikeout", "strikeout_double_play"]).astype(np.int64),
+        "xwoba_sum": xw.fillna(0.0),
+        "xwoba_n": xw.notna().astype(np.int64),
+    }, index=pas.index)
+
+def safe_div(num, den) -> np.ndarray:
+    num, den = np.asarray(num, dtype=float), np.asarray(den, dtype=float)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(den > 0, num / np.where(den > 0, den, 1), np.nan)
+
+def line_rates(t: pd.DataFrame) -> pd.DataFrame:
+    """AVG/OBP/SLG/OPS/K%/BB%/xwOBA from summed pa_flags columns (NaN where undefined)."""
+    t["AVG"] = safe_div(t["H"], t["AB"]).round(3)
+    t["OBP"] = safe_div(t["H"] + t["BB"] + t["HBP"], t["AB"] + t["BB"] + t["HBP"] + t["SF"]).round(3)
+    t["SLG"] = safe_div(t["TB"], t["AB"]).round(3)
+    t["OPS"] = (t["OBP"] + t["SLG"]).round(3)
+    t["K%"] = safe_div(t["K"], t["PA"]).round(3)
+    t["BB%"] = safe_div(t["BB"], t["PA"]).round(3)
+    t["xwOBA"] = safe_div(t["xwoba_sum"], t["xwoba_n"]).round(3)
+    return t
+
+def _barrels(df: pd.DataFrame, ev: pd.Series, la: pd.Series) -> pd.Series:
+    # Savant's own barrel class when the partition has it, else the 98+ mph / 26-30 deg core season_rollup uses
+    if "launch_speed_angle" in df.columns:
+        return pd.to_numeric(df["launch_speed_angle"], errors="coerce").eq(6)
+    return ev.ge(98) & la.between(26, 30)
+
+def hitter_totals(df: pd.DataFrame, keys: list) -> pd.DataFrame:
+    """
+    Additive counts per `keys` (columns of df): HITTER_COUNTS over every pitch
+    plus PA_SUMS over PA-ending pitches, one groupby each. A league frame with
+    keys=["batter"] is every hitter's season in one pass.
+    """
+    if df.empty:
+        return pd.DataFrame(columns=keys + HITTER_COUNTS + PA_SUMS)
+    f = pitch_flags(df)
+    ev = f["ev"]
+    bbe = ev.notna()
+    la = (pd.to_numeric(df["launch_angle"], errors="coerce") if "launch_angle" in df.columns
+          else pd.Series(np.nan, index=df.index)).where(bbe)
+    zone = pd.to_numeric(df["zone"], errors="coerce") if "zone" in df.columns else pd.Series(np.nan, index=df.index)
+    o_zone = zone.gt(9)   # Gameday zones 11-14 are outside the strike zone
+    per_pitch = pd.DataFrame({
+        **{k: df[k].to_numpy() for k in keys},
+        "pitches": 1, "swings": f["swing"], "whiffs": f["whiff"],
+        "bbe": bbe.astype(np.int64), "ev_sum": ev.fillna(0.0),
+        "la_sum": la.fillna(0.0), "la_n": la.notna().astype(np.int64),
+        "hard": ev.ge(95).astype(np.int64), "barrels": (_barrels(df, ev, la) & bbe).astype(np.int64),
+        "o_pitches": o_zone.astype(np.int64), "chases": (o_zone & f["swing"].astype(bool)).astype(np.int64),
+    }, index=df.index)
+    pas = last_pitch_rows(df)
+    per_pa = pa_flags(pas).assign(**{k: pas[k].to_numpy() for k in keys})
+    out = (per_pitch.groupby(keys, dropna=False).sum()
+           .join(per_pa.groupby(keys, dropna=False)[PA_SUMS].sum(), how="outer")
+           .fillna(0))
+    ints = [c for c in HITTER_COUNTS + PA_SUMS if c not in ("ev_sum", "la_sum", "xwoba_sum")]
+    out[ints] = out[ints].astype(np.int64)
+    return out.reset_index()
+
+def hitter_rates(t: pd.DataFrame) -> pd.DataFrame:
+    """
+    line_rates plus ISO and the batted-ball / plate-discipline rates, named as in
+    metrics.season_rollup. OSwingPct is chases / out-of-zone pitches (O-Swing%);
+    season_rollup's ChasePct is a different rate (out-of-zone swings / swings).
+    """
+    t = line_rates(t)
+    t["ISO"] = (t["SLG"] - t["AVG"]).round(3)
+    t["EV"] = safe_div(t["ev_sum"], t["bbe"]).round(1)
+    t["LA"] = safe_div(t["la_sum"], t["la_n"]).round(1)
+    t["HardHitPct"] = safe_div(t["hard"], t["bbe"]).round(3)
+    t["BarrelPct"] = safe_div(t["barrels"], t["bbe"]).round(3)
+    t["WhiffSwingPct"] = safe_div(t["whiffs"], t["swings"]).round(3)
+    t["OSwingPct"] = safe_div(t["chases"], t["o_pitches"]).round(3)
+    return t
+
+# 9x9 location bins on plate_x [-0.85, 0.85], plate_z [1.0, 4.0]
+X_EDGES = np.linspace(-0.85, 0.85, 10)
+Z_EDGES = np.linspace(1.0, 4.0, 10)
+
+def _bin(values: pd.Series, edges: np.ndarray) -> np.ndarray:
+    # pd.cut(..., include_lowest=True) semantics: (e[i], e[i+1]], the first bin closed; -1 outside
+    v = pd.to_numeric(values, errors="coerce").to_numpy(dtype=float)
+    b = np.searchsorted(edges, v, side="left") - 1
+    b[v == edges[0]] = 0
+    b[np.isnan(v) | (v < edges[0]) | (v > edges[-1])] = -1
+    return b
+
+def location_grid(df: pd.DataFrame) -> np.ndarray:
+    """(9, 9) pitch counts by plate_z row and plate_x column, in one bincount."""
+    nz, nx = len(Z_EDGES) - 1, len(X_EDGES) - 1
+    if df.empty:
+        return np.zeros((nz, nx), dtype=np.int64)
+    zb, xb = _bin(df["plate_z"], Z_EDGES), _bin(df["plate_x"], X_EDGES)
+    ok = (zb >= 0) & (xb >= 0)
+    return np.bincount(zb[ok] * nx + xb[ok], minlength=nz * nx).reshape(nz, nx)
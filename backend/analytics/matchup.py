@@ -0,0 +1,130 @@
+"""
+Lineup vs. pitcher: each hitter's per-family results weighted by the pitcher's mix.
+
+    mix[s, f]       share of the pitcher's pitches of family f to hand s (L/R)
+    rate[h, f, k]   hitter h's rate k against family f, from pitchers throwing
+                    with the same hand, shrunk toward h's own overall rate
+    expected[h, k]  = sum_f mix[stand(h), f] * rate[h, f, k]   (one einsum)
+
+The hitters' pitches are stacked into one frame and grouped once by
+(batter, family); the result is reshaped into a dense (hitters, families,
+counts) array. Switch hitters get the side they actually bat from against
+that hand.
+"""
+from __future__ import annotations
+from typing import Dict, List, Tuple
+
+import numpy as np
+import pandas as pd
+
+from backend.analytics.features import FAMILIES, pa_flags, pitch_family, pitch_flags, safe_div
+from backend.sequence_src.scrape_savant import last_pitch_rows
+from backend.tracing import traced
+
+PITCH_COUNTS = ["pitches", "swing", "whiff"]
+PA_COUNTS = ["PA", "AB", "H", "TB", "BB", "HBP", "SF", "K", "xwoba_sum", "xwoba_n"]
+RATES = {  # name: (numerator, denominator, prior weight in denominator units)
+    "AVG": (["H"], ["AB"], 25),
+    "OBP": (["H", "BB", "HBP"], ["AB", "BB", "HBP", "SF"], 25),
+    "SLG": (["TB"], ["AB"], 25),
+    "K%": (["K"], ["PA"], 25),
+    "xwOBA": (["xwoba_sum"], ["xwoba_n"], 20),
+    "Whiff%": (["whiff"], ["swing"], 30),
+}
+_COUNTS = PITCH_COUNTS + PA_COUNTS
+
+def _regular(df: pd.DataFrame) -> pd.DataFrame:
+    return df[df["game_type"].fillna("R").eq("R")] if "game_type" in df.columns else df
+
+def throws(pitches: pd.DataFrame) -> str:
+    hand = pitches["p_throws"].dropna().mode() if "p_throws" in pitches.columns else pd.Series(dtype=object)
+    return str(hand.iloc[0]) if len(hand) else "R"
+
+@traced("matchup.mix")
+def pitch_mix(pitches: pd.DataFrame) -> pd.DataFrame:
+    """Usage, velo and spin by (stand, family); usage sums to 1 within each stand."""
+    df = _regular(pitches)
+    cols = {"stand": df["stand"], "family": pitch_family(df),
+            "velo": pd.to_numeric(df["release_speed"], errors="coerce"),
+            "spin": pd.to_numeric(df["release_spin_rate"], errors="coerce")}
+    g = pd.DataFrame(cols)
+    g = g[g["family"].isin(FAMILIES) & g["stand"].isin(["L", "R"])]
+    out = g.groupby(["stand", "family"]).agg(pitches=("velo", "size"), velo=("velo", "mean"), spin=("spin", "mean")).reset_index()
+    out["usage"] = (out["pitches"] / out.groupby("stand")["pitches"].transform("sum")).round(4)
+    out["velo"] = out["velo"].round(1)
+    out["spin"] = out["spin"].round(0)
+    return out
+
+def _mix_matrix(mix: pd.DataFrame) -> np.ndarray:
+    """(2, F) usage, rows L, R; a hand the pitcher never faced borrows the other's mix."""
+    m = (mix.pivot(index="stand", columns="family", values="usage")
+         .reindex(index=["L", "R"], columns=FAMILIES).fillna(0.0).to_numpy())
+    for s, o in ((0, 1), (1, 0)):
+        if m[s].sum() == 0:
+            m[s] = m[o]
+    return m
+
+@traced("matchup.hitter_counts")
+def hitter_counts(hitters: pd.DataFrame, batter_ids: List[int], vs_throws: str) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    (counts[h, f, k] over _COUNTS, stand index per hitter) from the hitters'
+    stacked pitches against `vs_throws` pitchers.
+    """
+    df = _regular(hitters)
+    if "p_throws" in df.columns:
+        df = df[df["p_throws"] == vs_throws]
+    B, F = len(batter_ids), len(FAMILIES)
+    counts = np.zeros((B, F, len(_COUNTS)))
+    stand = np.full(B, 0 if vs_throws == "R" else 1)  # no data: assume the platoon side
+    if df.empty:
+        return counts, stand
+
+    fam = pitch_family(df)
+    per_pitch = pitch_flags(df)[["swing", "whiff"]].assign(pitches=1, batter=df["batter"].to_numpy(), family=fam.to_numpy())
+    pas = last_pitch_rows(df)
+    per_pa = pa_flags(pas).assign(batter=pas["batter"].to_numpy(), family=fam.loc[pas.index].to_numpy())
+    full = pd.MultiIndex.from_product([batter_ids, FAMILIES], names=["batter", "family"])
+    a = per_pitch.groupby(["batter", "family"])[PITCH_COUNTS].sum().reindex(full, fill_value=0)
+    b = per_pa.groupby(["batter", "family"])[PA_COUNTS].sum().reindex(full, fill_value=0)
+    counts = pd.concat([a, b], axis=1)[_COUNTS].to_numpy(dtype=float).reshape(B, F, len(_COUNTS))
+
+    side = df.groupby("batter")["stand"].agg(lambda s: s.mode().iloc[0] if len(s.mode()) else None)
+    known = side.reindex(batter_ids).map({"L": 0, "R": 1})
+    stand = np.where(known.notna(), known.fillna(0).to_numpy(), stand).astype(np.int64)
+    return counts, stand
+
+def _rates(counts: np.ndarray) -> Dict[str, np.ndarray]:
+    """rate[h, f] per RATES entry, shrunk toward the hitter's all-family rate."""
+    ix = {c: i for i, c in enumerate(_COUNTS)}
+    out = {}
+    for name, (num, den, k) in RATES.items():
+        n = counts[..., [ix[c] for c in num]].sum(-1)
+        d = counts[..., [ix[c] for c in den]].sum(-1)
+        overall = safe_div(n.sum(1), d.sum(1))                  # (B,)
+        overall = np.where(np.isnan(overall), np.nanmean(overall) if np.isfinite(overall).any() else 0.0, overall)
+        out[name] = (n + k * overall[:, None]) / (d + k)          # (B, F)
+    return out
+
+@traced("matchup.expected")
+def expected(mix: pd.DataFrame, counts: np.ndarray, stand: np.ndarray, batter_ids: List[int]) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """(one row per hitter with mix-weighted rates, long per-family breakdown)."""
+    U = _mix_matrix(mix)[stand]                                    # (B, F)
+    rates = _rates(counts)
+    R = np.stack([rates[k] for k in RATES], axis=-1)               # (B, F, K)
+    E = np.einsum("bf,bfk->bk", U, R)
+    ix = {c: i for i, c in enumerate(_COUNTS)}
+    data = pd.DataFrame(E.round(3), columns=list(RATES))
+    data.insert(0, "sample_PA", counts[..., ix["PA"]].sum(1).astype(int))
+    data.insert(0, "stand", np.array(["L", "R"])[stand])
+    data.insert(0, "batter", batter_ids)
+
+    B, F = U.shape
+    fam = pd.DataFrame({
+        "batter": np.repeat(batter_ids, F),
+        "family": np.tile(FAMILIES, B),
+        "usage": U.ravel().round(4),
+        "PA": counts[..., ix["PA"]].ravel().astype(int),
+        "pitches": counts[..., ix["pitches"]].ravel().astype(int),
+        **{k: R[..., i].ravel().round(3) for i, k in enumerate(RATES)},
+    })
+    return data, fam[fam["usage"] > 0].reset_index(drop=True)
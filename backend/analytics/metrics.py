@@ -2,6 +2,8 @@ import math
 import numpy as np
 import pandas as pd
 
+from backend.tracing import traced
+
 HIT_EVENTS = {"single","double","triple","home_run"}
 AB_EVENTS_INC = {"single","double","triple","home_run","field_out","force_out","other_out","grounded_into_double_play","field_error","double_play","triple_play"}
 AB_EVENTS_EXC = {"walk","intent_walk","hit_by_pitch","sac_bunt","sac_fly","catcher_interf"}
@@ -10,10 +12,9 @@ SF_EVENTS = {"sac_fly"}
 HBP_EVENTS = {"hit_by_pitch"}
 
 def _dedupe_pas(df: pd.DataFrame) -> pd.DataFrame:
-    if df.empty:
-        return df
-    g = df.sort_values(["game_pk","at_bat_number","pitch_number"]).drop_duplicates(["game_pk","at_bat_number","batter"], keep="last")
-    return g
+    # events come from the store in PA order, so the last pitch is a take
+    from backend.sequence_src.scrape_savant import last_pitch_rows  # not at import time: metrics stays store-free
+    return last_pitch_rows(df)
 
 def _is_zone(row):
     return (abs(row.get("plate_x", np.nan)) <= 0.83) and (row.get("plate_z", np.nan) >= row.get("sz_bot", np.nan)) and (row.get("plate_z", np.nan) <= row.get("sz_top", np.nan))
@@ -38,6 +39,7 @@ def _barrel_like(ev, la):
         return False
     return 26 <= la <= 30
 
+@traced("metrics.season_rollup")
 def season_rollup(events: pd.DataFrame) -> pd.DataFrame:
     if events.empty:
         return pd.DataFrame(columns=["batter","player_name","season","PA","AB","H","AVG","OBP","SLG","ISO","BABIP","EV","LA","HardHitPct","BarrelPct","WhiffSwingPct","ChasePct","xwOBA","xBA","xSLG"])
@@ -102,6 +104,7 @@ def season_rollup(events: pd.DataFrame) -> pd.DataFrame:
     }
     return pd.DataFrame([row])
 
+@traced("metrics.split_by")
 def split_by(events: pd.DataFrame, by: list[str]) -> pd.DataFrame:
     if events.empty:
         cols = ["batter","player_name","season","PA","AB","H","AVG","OBP","SLG"]
@@ -132,6 +135,7 @@ def split_by(events: pd.DataFrame, by: list[str]) -> pd.DataFrame:
     })).reset_index()
     return out
 
+@traced("metrics.bin25")
 def bin25(events: pd.DataFrame) -> pd.DataFrame:
     if events.empty:
         return pd.DataFrame(columns=["row","col","swing_pct","whiff_swing_pct","contact_pct","xwoba"])
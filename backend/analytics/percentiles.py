@@ -0,0 +1,136 @@
+"""
+League percentile index: per season and metric, the sorted values of every qualified hitter.
+
+Built nightly from the stored league Statcast (one features.hitter_totals groupby
+over the whole season) and kept as one long table under PROCESSED_DIR. Serving
+loads it once per file mtime into {(season, metric): sorted array}, so ranking a
+value is two np.searchsorted calls and a full profile is a handful of them.
+
+    python scripts/build_percentiles.py --season 2024          # or: make percentiles
+    ranks(2024, {"EV": 92.1, "OSwingPct": 0.24})
+
+`points` keeps a fixed-size quantile sketch per metric instead of every value
+(memory-bounded for long histories or wider pools); lookups then interpolate
+between sketch points.
+"""
+from __future__ import annotations
+import os
+from typing import Dict, Mapping, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from backend.analytics.features import hitter_rates, hitter_totals
+from backend.analytics.woba import load_league_season
+from backend.config import PROCESSED_DIR, ensure_dirs
+from backend.tracing import traced
+
+PERCENTILES_PATH = PROCESSED_DIR / "percentiles.parquet"
+METRICS = {  # hitter_rates column: higher is better
+    "EV": True, "HardHitPct": True, "BarrelPct": True, "xwOBA": True,
+    "WhiffSwingPct": False, "OSwingPct": False, "K%": False, "BB%": True,
+}
+INDEX_COLS = ["season", "metric", "value", "n", "min_pa"]
+TEAMS = 30
+
+def qualifying_pa(pitches: pd.DataFrame) -> int:
+    """Savant's percentile qualifier: 2.1 PA per team game played so far."""
+    games = pitches["game_pk"].nunique() if "game_pk" in pitches.columns else 0
+    return max(1, int(round(2.1 * 2 * games / TEAMS)))
+
+@traced("percentiles.build")
+def build(pitches: pd.DataFrame, season: int, min_pa: Optional[int] = None, points: Optional[int] = None) -> pd.DataFrame:
+    """INDEX_COLS rows for one season of league pitches: each metric's qualified values, sorted."""
+    if "game_type" in pitches.columns:
+        pitches = pitches[pitches["game_type"].fillna("R").eq("R")]
+    if pitches.empty:
+        return pd.DataFrame(columns=INDEX_COLS)
+    min_pa = qualifying_pa(pitches) if min_pa is None else int(min_pa)
+    t = hitter_rates(hitter_totals(pitches, ["batter"]))
+    t = t[t["PA"] >= min_pa]
+    parts = []
+    for m in METRICS:
+        v = np.sort(t[m].dropna().to_numpy(dtype=np.float64))
+        n = len(v)
+        if points and n > points:
+            v = np.quantile(v, np.linspace(0.0, 1.0, points))
+        parts.append(pd.DataFrame({"season": int(season), "metric": m, "value": v, "n": n, "min_pa": min_pa}))
+    return pd.concat(parts, ignore_index=True)[INDEX_COLS]
+
+def write_index(table: pd.DataFrame) -> pd.DataFrame:
+    """Upsert seasons into the index file (atomic replace)."""
+    ensure_dirs()
+    path = PERCENTILES_PATH
+    parts = [table]
+    if path.exists():
+        prev = pd.read_parquet(path)
+        parts.insert(0, prev[~prev["season"].isin(table["season"].unique())])
+    merged = pd.concat(parts, ignore_index=True)
+    merged = merged.sort_values(["season", "metric", "value"], kind="mergesort").reset_index(drop=True)
+    tmp = path.with_suffix(".parquet.tmp")
+    merged.to_parquet(tmp, index=False)
+    os.replace(tmp, path)
+    return merged
+
+def run(seasons: list[int], points: Optional[int] = None) -> pd.DataFrame:
+    tables = [build(load_league_season(int(y)), int(y), points=points) for y in seasons]
+    tables = [t for t in tables if not t.empty]
+    if not tables:
+        raise SystemExit(f"No league data for seasons {seasons}")
+    return write_index(pd.concat(tables, ignore_index=True))
+
+# ---------- serving ----------
+
+_LOADED = {"mtime": None, "arrays": {}, "min_pa": {}}
+
+def _index() -> Tuple[Dict[Tuple[int, str], Tuple[np.ndarray, int]], Dict[int, int]]:
+    try:
+        mtime = PERCENTILES_PATH.stat().st_mtime
+    except OSError:
+        return {}, {}
+    if _LOADED["mtime"] != mtime:
+        t = pd.read_parquet(PERCENTILES_PATH)
+        t["metric"] = t["metric"].replace({"ChasePct": "OSwingPct"})   # indexes built before the rename
+        arrays = {(int(s), str(m)): (g["value"].to_numpy(dtype=np.float64), int(g["n"].iloc[0]))
+                  for (s, m), g in t.groupby(["season", "metric"], sort=False)}
+        min_pa = t.groupby("season")["min_pa"].first().astype(int).to_dict()
+        _LOADED.update(mtime=mtime, arrays=arrays, min_pa=min_pa)
+    return _LOADED["arrays"], _LOADED["min_pa"]
+
+def seasons() -> list[int]:
+    return sorted(_index()[1])
+
+def percentile(values: np.ndarray, n: int, x) -> np.ndarray:
+    """Share of the pool below x (ties count half), 0-100; sketches interpolate between points."""
+    x = np.asarray(x, dtype=np.float64)
+    if n == 0:
+        return np.full(x.shape, np.nan)
+    if len(values) == n:
+        below = np.searchsorted(values, x, side="left") + np.searchsorted(values, x, side="right")
+        p = 50.0 * below / n
+    else:
+        p = np.interp(x, values, np.linspace(0.0, 100.0, len(values)))
+    return np.where(np.isnan(x), np.nan, p)
+
+def ranks(season: int, profile: Mapping[str, float]) -> pd.DataFrame:
+    """
+    One row per METRICS entry: the value, its percentile among the season's
+    qualifiers (flipped for lower-is-better metrics, so 100 is always best) and
+    the pool size. KeyError if the season has no index.
+    """
+    arrays, min_pa = _index()
+    if int(season) not in min_pa:
+        raise KeyError(season)
+    rows = []
+    for m, higher in METRICS.items():
+        values, n = arrays.get((int(season), m), (np.empty(0), 0))
+        x = profile.get(m, np.nan)
+        x = np.nan if x is None else float(x)
+        p = float(percentile(values, n, x))
+        rows.append({"metric": m, "value": x, "percentile": round(p if higher else 100.0 - p, 1), "n": n,
+                     "better": "high" if higher else "low"})
+    return pd.DataFrame(rows)
+
+def qualifier(season: int) -> Optional[int]:
+    """The season's min PA, or None if it has no index."""
+    return _index()[1].get(int(season))
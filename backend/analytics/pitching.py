@@ -0,0 +1,90 @@
+"""
+Pitcher-side aggregations over a pitcher's store partition.
+
+Each is one groupby over features.pitch_flags / pa_flags columns: arsenal per
+pitch type, outcome splits by batter hand / count / pitch, and the season line.
+Locations use the same features.location_grid as the hitter heatmap.
+"""
+from __future__ import annotations
+from typing import Literal
+
+import numpy as np
+import pandas as pd
+
+from backend.analytics.features import PA_SUMS as _PA_SUMS, line_rates, pa_flags, pitch_family, pitch_flags, safe_div
+from backend.sequence_src.scrape_savant import last_pitch_rows
+from backend.tracing import traced
+
+Split = Literal["stand", "count", "pitch_family", "pitch_type"]
+
+def game_types(df: pd.DataFrame, include_postseason: bool) -> pd.DataFrame:
+    if include_postseason or "game_type" not in df.columns:
+        return df
+    return df[df["game_type"].fillna("R").eq("R")]
+
+def _keys(df: pd.DataFrame, split: str) -> pd.Series:
+    if split == "count":
+        return df["balls"].astype("Int64").astype(str) + "-" + df["strikes"].astype("Int64").astype(str)
+    if split == "pitch_family":
+        return pitch_family(df)
+    return df[split].fillna("unknown")
+
+@traced("pitching.arsenal")
+def arsenal(df: pd.DataFrame, by_stand: bool = False) -> pd.DataFrame:
+    """Usage, velo, spin, movement, zone%, swing%, whiff% and CSW% per pitch type (optionally per batter hand)."""
+    keys = (["stand"] if by_stand else []) + ["pitch_type"]
+    if df.empty:
+        return pd.DataFrame(columns=keys + ["pitch_name", "pitches", "usage", "velo", "spin", "pfx_x", "pfx_z", "Zone%", "Swing%", "Whiff%", "CSW%"])
+    f = pitch_flags(df)
+    desc = df["description"].fillna("")
+    zone = pd.to_numeric(df["zone"], errors="coerce") if "zone" in df.columns else pd.Series(np.nan, index=df.index)
+    num = lambda c: pd.to_numeric(df[c], errors="coerce") if c in df.columns else pd.Series(np.nan, index=df.index)
+    work = pd.DataFrame({
+        "stand": df["stand"].to_numpy(), "pitch_type": df["pitch_type"].fillna("UN").to_numpy(),
+        "pitch_name": df["pitch_name"].to_numpy() if "pitch_name" in df.columns else None,
+        "velo": num("release_speed"), "spin": num("release_spin_rate"),
+        "pfx_x": num("pfx_x") * 12, "pfx_z": num("pfx_z") * 12,   # feet -> inches
+        "in_zone": zone.between(1, 9).astype(np.int64),
+        "swing": f["swing"], "whiff": f["whiff"],
+        "csw": (f["whiff"].astype(bool) | desc.eq("called_strike")).astype(np.int64),
+    }, index=df.index)
+    out = work.groupby(keys, dropna=False).agg(
+        pitch_name=("pitch_name", "first"), pitches=("velo", "size"),
+        velo=("velo", "mean"), spin=("spin", "mean"), pfx_x=("pfx_x", "mean"), pfx_z=("pfx_z", "mean"),
+        in_zone=("in_zone", "sum"), swing=("swing", "sum"), whiff=("whiff", "sum"), csw=("csw", "sum"),
+    ).reset_index()
+    total = out.groupby("stand")["pitches"].transform("sum") if by_stand else out["pitches"].sum()
+    out["usage"] = safe_div(out["pitches"], total).round(4)
+    out["Zone%"] = safe_div(out["in_zone"], out["pitches"]).round(3)
+    out["Swing%"] = safe_div(out["swing"], out["pitches"]).round(3)
+    out["Whiff%"] = safe_div(out["whiff"], out["swing"]).round(3)
+    out["CSW%"] = safe_div(out["csw"], out["pitches"]).round(3)
+    out[["velo", "pfx_x", "pfx_z"]] = out[["velo", "pfx_x", "pfx_z"]].round(1)
+    out["spin"] = out["spin"].round(0)
+    out = out.drop(columns=["in_zone", "swing", "whiff", "csw"])
+    return out.sort_values(keys[:-1] + ["pitches"], ascending=[True] * (len(keys) - 1) + [False]).reset_index(drop=True)
+
+@traced("pitching.splits")
+def splits(df: pd.DataFrame, split: Split) -> pd.DataFrame:
+    """
+    Outcomes against, per split value: PA-level line (PAs grouped by their
+    final pitch) joined with pitch-level usage and whiff% under the same key.
+    """
+    if df.empty:
+        return line_rates(pd.DataFrame(columns=[split, "pitches", "Whiff%"] + _PA_SUMS))
+    f = pitch_flags(df)
+    per_pitch = (pd.DataFrame({split: _keys(df, split), "pitches": 1, "swing": f["swing"], "whiff": f["whiff"]})
+                 .groupby(split, dropna=False).sum())
+    pas = last_pitch_rows(df)
+    per_pa = pa_flags(pas).assign(**{split: _keys(pas, split)}).groupby(split, dropna=False)[_PA_SUMS].sum()
+    out = per_pitch.join(per_pa, how="outer").fillna(0)
+    ints = ["pitches", "swing", "whiff"] + [c for c in _PA_SUMS if c != "xwoba_sum"]
+    out[ints] = out[ints].astype(np.int64)
+    out["Whiff%"] = safe_div(out["whiff"], out["swing"]).round(3)
+    out = line_rates(out.drop(columns=["swing", "whiff"]).reset_index())
+    return out.sort_values("pitches", ascending=False, kind="mergesort").reset_index(drop=True)
+
+def season_line(df: pd.DataFrame) -> dict:
+    """Batters faced and the line against, summed over PA-ending pitches in one pass."""
+    t = pa_flags(last_pitch_rows(df))[_PA_SUMS].sum() if len(df) else pd.Series(0, index=_PA_SUMS)
+    return {k: int(t[k]) for k in _PA_SUMS if k != "xwoba_sum"} | {"xwoba_sum": float(t["xwoba_sum"])}
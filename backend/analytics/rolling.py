@@ -0,0 +1,147 @@
+"""
+Rolling windows ("last N games", "last N days") from per-game prefix sums.
+
+Every store partition gets a game log at ingest: one row per game with additive
+counts only (PA, AB, H, TB, ..., xwOBA sum/n, exit-velo sum/n, swings, whiffs),
+written next to the partition as `<key>.games.parquet`. A query stacks the logs
+it needs, takes one cumulative sum, and any window is cum[end] - cum[start]; a
+whole-season sparkline is that difference over every end index at once.
+
+    log = player_game_log("batter", 592450, [2024])
+    rolling_series(log, window=15, unit="games")   # one row per game
+    window_totals(log, last_days=7)                # one row
+"""
+from __future__ import annotations
+from pathlib import Path
+from typing import Iterable, Literal, Optional
+
+import numpy as np
+import pandas as pd
+
+from backend.analytics.features import pa_flags, pitch_flags
+from backend.sequence_src import scrape_savant
+from backend.sequence_src.scrape_savant import last_pitch_rows, partition_path, season_window
+from backend.tracing import traced
+
+Unit = Literal["games", "days"]
+
+_PA_COLS = ["PA", "AB", "H", "2B", "3B", "HR", "TB", "BB", "HBP", "SF", "K", "xwoba_sum", "xwoba_n"]
+COUNT_COLS = _PA_COLS + ["ev_sum", "bbe", "swings", "whiffs"]
+RATE_COLS = ["AVG", "OBP", "SLG", "OPS", "xwOBA", "EV", "Whiff%"]
+
+def _games_path(key: Path) -> Path:
+    return key.with_name(key.stem + ".games.parquet")
+
+def game_log(pitches: pd.DataFrame) -> pd.DataFrame:
+    """One row per game (game_pk, game_date) with COUNT_COLS summed; sorted by date."""
+    if pitches is None or pitches.empty or "game_pk" not in pitches.columns:
+        return pd.DataFrame(columns=["game_pk", "game_date"] + COUNT_COLS)
+    f = pitch_flags(pitches)
+    per_pitch = pd.DataFrame({
+        "game_pk": pitches["game_pk"],
+        "swings": f["swing"],
+        "whiffs": f["whiff"],
+        "ev_sum": f["ev"].fillna(0.0),
+        "bbe": f["ev"].notna().astype(np.int64),
+    })
+    pas = last_pitch_rows(pitches)
+    per_pa = pa_flags(pas).assign(game_pk=pas["game_pk"])[["game_pk"] + _PA_COLS]
+
+    dates = pitches.groupby("game_pk", sort=False)["game_date"].first()
+    out = (per_pa.groupby("game_pk", sort=False).sum()
+           .join(per_pitch.groupby("game_pk", sort=False).sum(), how="outer")
+           .fillna(0))
+    out.insert(0, "game_date", pd.to_datetime(dates.reindex(out.index)).dt.normalize())
+    return out.reset_index().sort_values(["game_date", "game_pk"], kind="mergesort")[["game_pk", "game_date"] + COUNT_COLS].reset_index(drop=True)
+
+def _write_game_log(key: Path, pitches: pd.DataFrame) -> None:
+    scrape_savant.write_parquet(game_log(pitches), _games_path(key))
+
+scrape_savant.INGEST_HOOKS.append(_write_game_log)
+
+def _partition_game_log(key: Path) -> pd.DataFrame:
+    path = _games_path(key)
+    # partitions written before this hook existed (or rewritten since) get their log on first read
+    if not path.exists() or path.stat().st_mtime < key.stat().st_mtime:
+        _write_game_log(key, scrape_savant._register_pa_index(pd.read_parquet(key)))
+    return pd.read_parquet(path)
+
+@traced("rolling.game_log")
+def player_game_log(kind: str, player_id: int, seasons: Iterable[int]) -> pd.DataFrame:
+    """Game logs for a player's season partitions (season_window), stacked in date order."""
+    logs = [_partition_game_log(partition_path(kind, player_id, *season_window(y))) for y in sorted(set(seasons))]
+    logs = [g for g in logs if len(g)]
+    if not logs:
+        return game_log(None)
+    return pd.concat(logs, ignore_index=True)
+
+def _prefix(log: pd.DataFrame) -> np.ndarray:
+    # row i holds the totals of games [0, i); window (a, b] is cum[b] - cum[a]
+    cum = np.zeros((len(log) + 1, len(COUNT_COLS)))
+    np.cumsum(log[COUNT_COLS].to_numpy(dtype=np.float64), axis=0, out=cum[1:])
+    return cum
+
+def _starts(log: pd.DataFrame, ends: np.ndarray, window: int, unit: Unit) -> np.ndarray:
+    """Prefix index where each window closing at game `ends - 1` opens."""
+    if unit == "games":
+        return np.maximum(ends - window, 0)
+    days = log["game_date"].to_numpy(dtype="datetime64[D]")
+    return np.searchsorted(days, days[ends - 1] - np.timedelta64(window - 1, "D"), side="left")
+
+def _rates(t: pd.DataFrame) -> pd.DataFrame:
+    def div(a, b):
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return np.where(b > 0, a / np.where(b > 0, b, 1), np.nan)
+    t["AVG"] = div(t["H"], t["AB"]).round(3)
+    t["OBP"] = div(t["H"] + t["BB"] + t["HBP"], t["AB"] + t["BB"] + t["HBP"] + t["SF"]).round(3)
+    t["SLG"] = div(t["TB"], t["AB"]).round(3)
+    t["OPS"] = (t["OBP"] + t["SLG"]).round(3)
+    t["xwOBA"] = div(t["xwoba_sum"], t["xwoba_n"]).round(3)
+    t["EV"] = div(t["ev_sum"], t["bbe"]).round(1)
+    t["Whiff%"] = div(t["whiffs"], t["swings"]).round(3)
+    return t
+
+def _window_frame(log: pd.DataFrame, cum: np.ndarray, starts: np.ndarray, ends: np.ndarray) -> pd.DataFrame:
+    t = pd.DataFrame(cum[ends] - cum[starts], columns=COUNT_COLS)
+    counts = [c for c in COUNT_COLS if c not in ("xwoba_sum", "ev_sum")]
+    t[counts] = t[counts].round().astype(np.int64)
+    t.insert(0, "games", ends - starts)
+    first = log["game_date"].to_numpy()[np.minimum(starts, len(log) - 1)]
+    t.insert(0, "from_date", np.where(ends > starts, first, np.datetime64("NaT")))
+    t.insert(0, "game_date", log["game_date"].to_numpy()[ends - 1])
+    t.insert(0, "game_pk", log["game_pk"].to_numpy()[ends - 1])
+    return _rates(t)
+
+@traced("rolling.series")
+def rolling_series(log: pd.DataFrame, window: int, unit: Unit = "games") -> pd.DataFrame:
+    """The trailing `window` (games or days) totals and rates as of every game in `log`."""
+    if window < 1:
+        raise ValueError("window must be >= 1")
+    if log.empty:
+        return _rates(pd.DataFrame(columns=["game_pk", "game_date", "from_date", "games"] + COUNT_COLS))
+    ends = np.arange(1, len(log) + 1)
+    return _window_frame(log, _prefix(log), _starts(log, ends, window, unit), ends)
+
+def window_totals(log: pd.DataFrame, last_games: Optional[int] = None, last_days: Optional[int] = None,
+                  as_of: Optional[pd.Timestamp] = None) -> pd.DataFrame:
+    """
+    One row for the last N games or last N days (calendar days ending `as_of`,
+    default the latest game). as_of between games counts back from the game before it.
+    """
+    if (last_games is None) == (last_days is None):
+        raise ValueError("pass exactly one of last_games / last_days")
+    if log.empty:
+        return rolling_series(log, 1)
+    cum = _prefix(log)
+    days = log["game_date"].to_numpy(dtype="datetime64[D]")
+    end = len(log) if as_of is None else int(np.searchsorted(days, np.datetime64(pd.Timestamp(as_of).date(), "D"), side="right"))
+    if end == 0:
+        return rolling_series(log.iloc[:0], 1)
+    ends = np.array([end])
+    if last_games is not None:
+        starts = np.maximum(ends - int(last_games), 0)
+    else:
+        anchor = days[end - 1] if as_of is None else np.datetime64(pd.Timestamp(as_of).date(), "D")
+        starts = np.searchsorted(days, anchor - np.timedelta64(int(last_days) - 1, "D"), side="left").reshape(1)
+        starts = np.minimum(starts, ends)
+    return _window_frame(log, cum, starts, ends)
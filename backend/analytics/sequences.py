@@ -0,0 +1,150 @@
+"""
+Pitch-sequence transitions: previous pitch type -> next pitch type, by count and batter hand.
+
+Store partitions are in PA order, so "the previous pitch of this PA" is the row
+above unless a PA starts here (pa_index gives the boundaries). One shift over the
+whole frame labels every pitch, and every pitcher's counts come out of one
+np.unique over a packed (pitcher, stand, count, prev, next) key: a sparse COO
+table with a row per observed transition and no per-pitch Python.
+
+prev is START for the first pitch of a PA, so the START row is first-pitch selection.
+Counts cover regular-season games; the count is the one the next pitch was thrown in.
+
+    t = transitions(fetch_pitcher_statcast(pid, *season_window(2024)))
+    probabilities(t, stand="L", counts=["0-2", "1-2"])
+    matrix(t)                                  # dense (START + types) x types
+"""
+from __future__ import annotations
+from collections import OrderedDict
+from pathlib import Path
+import threading
+from typing import Iterable, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from backend.sequence_src.scrape_savant import _register_pa_index, pa_index, partition_path, season_window, write_parquet
+from backend.tracing import traced
+
+PITCH_TYPES = ["FF", "SI", "FC", "SL", "ST", "SV", "CU", "KC", "CS", "CH", "FS", "FO", "SC", "KN", "EP", "FA", "PO", "UN"]
+START = "START"
+STANDS = ["L", "R"]
+COUNTS = [f"{b}-{s}" for b in range(4) for s in range(3)]
+_T = len(PITCH_TYPES)
+COO_COLS = ["pitcher", "stand", "count", "prev", "next", "n"]
+
+def _empty() -> pd.DataFrame:
+    return pd.DataFrame({c: pd.Series(dtype="int64" if c in ("pitcher", "n") else "object") for c in COO_COLS})
+
+@traced("sequences.transitions")
+def transitions(pitches: pd.DataFrame) -> pd.DataFrame:
+    """Sparse transition counts (COO_COLS) for every pitcher in a store-ordered frame."""
+    need = {"pitcher", "pitch_type", "stand", "balls", "strikes", "game_pk", "at_bat_number"}
+    if pitches is None or pitches.empty or not need.issubset(pitches.columns):
+        return _empty()
+    n = len(pitches)
+    first = np.ones(n, dtype=bool)
+    first[1:] = False
+    ends = pa_index(pitches)
+    first[ends[:-1] + 1] = True
+
+    # unseen codes fold into UN; a missing pitch_type drops that pitch (and the transition out of it)
+    known = pitches["pitch_type"].notna().to_numpy()
+    code = pd.Categorical(pitches["pitch_type"].where(pitches["pitch_type"].isin(PITCH_TYPES), "UN"), categories=PITCH_TYPES).codes.astype(np.int64)
+    code[~known] = -1
+    prev = np.empty(n, dtype=np.int64)
+    prev[0] = _T
+    prev[1:] = code[:-1]
+    prev[first] = _T
+
+    stand = pitches["stand"].map({"L": 0, "R": 1}).to_numpy()
+    balls = pd.to_numeric(pitches["balls"], errors="coerce").to_numpy()
+    strikes = pd.to_numeric(pitches["strikes"], errors="coerce").to_numpy()
+    regular = pitches["game_type"].fillna("R").eq("R").to_numpy() if "game_type" in pitches.columns else np.ones(n, dtype=bool)
+    ok = (regular & (code >= 0) & (prev >= 0) & ~np.isnan(stand.astype(float))
+          & (balls >= 0) & (balls <= 3) & (strikes >= 0) & (strikes <= 2))
+    if not ok.any():
+        return _empty()
+
+    pid_codes, pids = pd.factorize(pitches["pitcher"].to_numpy()[ok])
+    count = balls[ok].astype(np.int64) * 3 + strikes[ok].astype(np.int64)
+    key = (((pid_codes * 2 + stand[ok].astype(np.int64)) * 12 + count) * (_T + 1) + prev[ok]) * _T + code[ok]
+    uniq, counts = np.unique(key, return_counts=True)
+
+    nxt, rest = uniq % _T, uniq // _T
+    prv, rest = rest % (_T + 1), rest // (_T + 1)
+    cnt, rest = rest % 12, rest // 12
+    std, pc = rest % 2, rest // 2
+    labels = np.array(PITCH_TYPES + [START], dtype=object)
+    return pd.DataFrame({
+        "pitcher": np.asarray(pids)[pc].astype(np.int64),
+        "stand": np.array(STANDS, dtype=object)[std],
+        "count": np.array(COUNTS, dtype=object)[cnt],
+        "prev": labels[prv],
+        "next": labels[nxt],
+        "n": counts.astype(np.int64),
+    })
+
+def _select(t: pd.DataFrame, stand: Optional[str] = None, counts: Optional[Iterable[str]] = None) -> pd.DataFrame:
+    if stand:
+        t = t[t["stand"] == stand.upper()]
+    counts = [c.strip() for c in counts or [] if c.strip()]
+    if counts:
+        t = t[t["count"].isin(counts)]
+    return t
+
+def probabilities(t: pd.DataFrame, stand: Optional[str] = None, counts: Optional[Iterable[str]] = None,
+                  by: Tuple[str, ...] = ()) -> pd.DataFrame:
+    """
+    P(next | prev) over the selected stand/counts, pooled unless `by` keeps
+    stand and/or count as conditions. One row per observed (…by, prev, next).
+    """
+    t = _select(t, stand, counts)
+    keys = ["pitcher", *by, "prev", "next"]
+    out = t.groupby(keys, sort=False, as_index=False)["n"].sum()
+    out["p"] = (out["n"] / out.groupby(keys[:-1], sort=False)["n"].transform("sum")).round(4)
+    return out.sort_values(keys[:-1] + ["n"], ascending=[True] * (len(keys) - 1) + [False], kind="mergesort").reset_index(drop=True)
+
+def matrix(t: pd.DataFrame, stand: Optional[str] = None, counts: Optional[Iterable[str]] = None) -> np.ndarray:
+    """Dense (len(PITCH_TYPES) + 1) x len(PITCH_TYPES) counts; the last row is START."""
+    t = _select(t, stand, counts)
+    rows = pd.Categorical(t["prev"], categories=PITCH_TYPES + [START]).codes
+    cols = pd.Categorical(t["next"], categories=PITCH_TYPES).codes
+    m = np.zeros((_T + 1, _T), dtype=np.int64)
+    np.add.at(m, (rows, cols), t["n"].to_numpy())
+    return m
+
+# ---------- per pitcher-season cache ----------
+
+_CACHE: "OrderedDict[Tuple[str, float], pd.DataFrame]" = OrderedDict()
+_CACHE_MAX = 256
+_LOCK = threading.Lock()
+
+def _sidecar(key: Path) -> Path:
+    return key.with_name(key.stem + ".transitions.parquet")
+
+def partition_transitions(key: Path) -> pd.DataFrame:
+    """Transitions for one store partition: memory, then `<key>.transitions.parquet`, then a build."""
+    mtime = key.stat().st_mtime
+    ck = (str(key), mtime)
+    with _LOCK:
+        hit = _CACHE.get(ck)
+        if hit is not None:
+            _CACHE.move_to_end(ck)
+            return hit
+    side = _sidecar(key)
+    if side.exists() and side.stat().st_mtime >= mtime:
+        t = pd.read_parquet(side)
+    else:
+        t = transitions(_register_pa_index(pd.read_parquet(key)))
+        write_parquet(t, side)
+    with _LOCK:
+        _CACHE[ck] = t
+        while len(_CACHE) > _CACHE_MAX:
+            _CACHE.popitem(last=False)
+    return t
+
+def pitcher_transitions(pitcher_id: int, season: int) -> pd.DataFrame:
+    """A pitcher's season transitions, from the season_window partition every pitcher route reads."""
+    t = partition_transitions(partition_path("pitcher", pitcher_id, *season_window(season)))
+    return t[t["pitcher"] == int(pitcher_id)]
@@ -0,0 +1,214 @@
+"""
+"Similar hitters": nearest neighbours over standardized season profiles.
+
+A profile is one (batter, season) row: the season-rollup rates (features.hitter_rates,
+the columns metrics.season_rollup reports, with O-Swing% as OSwingPct) plus whiff%
+and xwOBA against each main pitch family. The nightly build groups a stored league season twice (by batter and
+by batter x family) and upserts that season's rows into one table under PROCESSED_DIR.
+
+Serving standardizes every profile (z-scores, missing -> league mean) into a dense
+matrix and indexes it with a scipy cKDTree (brute-force numpy when scipy is absent).
+When the table changes, only new or changed player-seasons are applied: they go to
+a small delta searched by brute force and the rows they replace are masked out of
+the tree, until the delta outgrows REBUILD_FRACTION of the tree and it is rebuilt.
+
+    python scripts/build_similar.py --season 2024      # or: make similar
+    neighbours(592450, 2024, k=10)
+"""
+from __future__ import annotations
+import os
+import threading
+from typing import Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from backend.analytics.features import hitter_rates, hitter_totals, pitch_family, safe_div
+from backend.analytics.woba import load_league_season
+from backend.config import PROCESSED_DIR, ensure_dirs
+from backend.tracing import traced
+
+# scipy.spatial costs a few hundred ms to import, so it is loaded by the first
+# ProfileIndex rather than with the API server
+_HAS_SCIPY: Optional[bool] = None
+cKDTree = None
+
+def _load_scipy() -> bool:
+    global _HAS_SCIPY, cKDTree
+    if _HAS_SCIPY is None:
+        try:
+            from scipy.spatial import cKDTree
+            _HAS_SCIPY = True
+        except Exception:
+            _HAS_SCIPY = False
+    return _HAS_SCIPY
+
+PROFILES_PATH = PROCESSED_DIR / "similar_profiles.parquet"
+KEYS = ["batter", "season"]
+ROLLUP = ["AVG", "OBP", "SLG", "ISO", "K%", "BB%", "EV", "LA", "HardHitPct", "BarrelPct", "WhiffSwingPct", "OSwingPct", "xwOBA"]
+VECTOR_FAMILIES = ["fastball", "sinker", "cutter", "slider", "curveball", "changeup"]
+FAMILY_RATES = {"Whiff%": ("whiffs", "swings"), "xwOBA": ("xwoba_sum", "xwoba_n")}
+FEATURES = ROLLUP + [f"{f}_{r}" for f in VECTOR_FAMILIES for r in FAMILY_RATES]
+MIN_PA = 100
+MIN_FAMILY_N = 15          # family rates on fewer swings / xwOBA events count as missing
+REBUILD_FRACTION = 0.1
+
+@traced("similar.profiles")
+def profiles(pitches: pd.DataFrame, season: int, min_pa: int = MIN_PA) -> pd.DataFrame:
+    """KEYS + PA + FEATURES, one row per hitter with at least min_pa regular-season PA."""
+    if "game_type" in pitches.columns:
+        pitches = pitches[pitches["game_type"].fillna("R").eq("R")]
+    if pitches.empty:
+        return pd.DataFrame(columns=KEYS + ["PA"] + FEATURES)
+    t = hitter_rates(hitter_totals(pitches, ["batter"]))
+    t = t[t["PA"] >= min_pa].set_index("batter")
+    fam = hitter_totals(pitches.assign(family=pitch_family(pitches)), ["batter", "family"])
+    fam = fam[fam["batter"].isin(t.index) & fam["family"].isin(VECTOR_FAMILIES)].set_index(["batter", "family"])
+    rates = {}
+    for r, (num, den) in FAMILY_RATES.items():
+        d = fam[den].to_numpy(dtype=float)
+        rates[r] = pd.Series(np.where(d >= MIN_FAMILY_N, safe_div(fam[num], d), np.nan), index=fam.index).round(3)
+    wide = pd.DataFrame(rates).unstack("family")
+    wide.columns = [f"{f}_{r}" for r, f in wide.columns]
+    out = t[["PA"] + ROLLUP].join(wide.reindex(t.index)).reindex(columns=["PA"] + FEATURES)
+    return out.reset_index().assign(season=int(season))[KEYS + ["PA"] + FEATURES]
+
+def write_profiles(table: pd.DataFrame) -> pd.DataFrame:
+    """Upsert seasons into the profile table (atomic replace)."""
+    ensure_dirs()
+    path = PROFILES_PATH
+    parts = [table]
+    if path.exists():
+        prev = pd.read_parquet(path).rename(columns={"ChasePct": "OSwingPct"})  # pre-rename builds
+        parts.insert(0, prev[~prev["season"].isin(table["season"].unique())])
+    merged = pd.concat(parts, ignore_index=True).sort_values(KEYS, kind="mergesort").reset_index(drop=True)
+    tmp = path.with_suffix(".parquet.tmp")
+    merged.to_parquet(tmp, index=False)
+    os.replace(tmp, path)
+    return merged
+
+def run(seasons: list[int], min_pa: int = MIN_PA) -> pd.DataFrame:
+    tables = [profiles(load_league_season(int(y)), int(y), min_pa) for y in seasons]
+    tables = [t for t in tables if not t.empty]
+    if not tables:
+        raise SystemExit(f"No league data for seasons {seasons}")
+    return write_profiles(pd.concat(tables, ignore_index=True))
+
+# ---------- serving ----------
+
+class ProfileIndex:
+    """
+    Rows [0, base) are in the tree; rows appended by sync() form the delta.
+    `live` masks rows superseded by a newer version of the same player-season.
+    """
+
+    def __init__(self, table: pd.DataFrame):
+        table = table.reset_index(drop=True)
+        X = table[FEATURES].to_numpy(dtype=np.float64)
+        with np.errstate(invalid="ignore"):
+            self.mean = np.nan_to_num(np.nanmean(X, axis=0)) if len(X) else np.zeros(len(FEATURES))
+            std = np.nanstd(X, axis=0) if len(X) else np.ones(len(FEATURES))
+        self.std = np.where(np.isfinite(std) & (std > 0), std, 1.0)
+        self.table = table[KEYS + ["PA"] + FEATURES]
+        self.Z = self._scale(X)
+        self.live = np.ones(len(table), dtype=bool)
+        self.base = len(table)
+        self.tree = cKDTree(self.Z) if self.base and _load_scipy() else None
+        self._pos = {(int(b), int(s)): i for i, (b, s) in enumerate(table[KEYS].itertuples(index=False))}
+
+    def _scale(self, X: np.ndarray) -> np.ndarray:
+        # the scaler is frozen at build time so delta rows land in the same space as the tree
+        return np.nan_to_num((X - self.mean) / self.std)
+
+    @property
+    def stale(self) -> bool:
+        changed = (len(self.live) - self.base) + int((~self.live[:self.base]).sum())
+        return changed > REBUILD_FRACTION * max(self.base, 1)
+
+    def sync(self, table: pd.DataFrame) -> int:
+        """
+        Catch up with a newer profile table: new or changed player-seasons go to
+        the delta, rows it no longer has are masked. Returns how many rows changed.
+        """
+        keys = [(int(b), int(s)) for b, s in table[KEYS].itertuples(index=False)]
+        X = table[FEATURES].to_numpy(dtype=np.float64)
+        old = np.array([self._pos.get(key, -1) for key in keys], dtype=np.int64)
+        cur = self.table[FEATURES].to_numpy(dtype=np.float64)[np.maximum(old, 0)] if len(self.table) else np.full_like(X, np.nan)
+        new = (old < 0) | ~np.all((cur == X) | (np.isnan(cur) & np.isnan(X)), axis=1)
+        gone = set(self._pos) - set(keys)
+        for key in gone:
+            self.live[self._pos.pop(key)] = False
+        if not new.any():
+            return len(gone)
+        self.live[old[new & (old >= 0)]] = False
+        start = len(self.table)
+        rows = table.loc[new, KEYS + ["PA"] + FEATURES]
+        self.table = pd.concat([self.table, rows], ignore_index=True)
+        self.Z = np.vstack([self.Z, self._scale(X[new])])
+        self.live = np.concatenate([self.live, np.ones(int(new.sum()), dtype=bool)])
+        for i, key in enumerate(key for key, n in zip(keys, new) if n):
+            self._pos[key] = start + i
+        return int(new.sum()) + len(gone)
+
+    def _base_nearest(self, z: np.ndarray, m: int) -> Tuple[np.ndarray, np.ndarray]:
+        m = min(m, self.base)
+        if m == 0:
+            return np.empty(0), np.empty(0, dtype=np.int64)
+        if self.tree is not None:
+            d, i = self.tree.query(z, k=m)
+            return np.atleast_1d(d), np.atleast_1d(i).astype(np.int64)
+        d = np.sqrt(((self.Z[:self.base] - z) ** 2).sum(axis=1))
+        i = np.argpartition(d, m - 1)[:m] if m < self.base else np.arange(self.base)
+        return d[i], i
+
+    def neighbours(self, batter: int, season: int, k: int = 10, same_player: bool = False) -> pd.DataFrame:
+        """The k nearest live player-seasons to (batter, season), nearest first. KeyError if it has no profile."""
+        q = self._pos[(int(batter), int(season))]
+        z = self.Z[q]
+        base_ids = self.table["batter"].to_numpy()[:self.base]
+        skip = int((~self.live[:self.base]).sum()) + 1 + (0 if same_player else int((base_ids == int(batter)).sum()))
+        d, i = self._base_nearest(z, k + skip)
+        delta = np.arange(self.base, len(self.table))
+        d = np.concatenate([d, np.sqrt(((self.Z[delta] - z) ** 2).sum(axis=1))])
+        i = np.concatenate([i, delta])
+        keep = self.live[i] & (i != q)
+        if not same_player:
+            keep &= self.table["batter"].to_numpy()[i] != int(batter)
+        d, i = d[keep], i[keep]
+        order = np.argsort(d, kind="stable")[:k]
+        out = self.table.iloc[i[order]].reset_index(drop=True)
+        out.insert(2, "distance", d[order].round(3))
+        return out
+
+_LOADED = {"mtime": None, "index": None}
+_LOCK = threading.Lock()
+
+def index() -> Optional[ProfileIndex]:
+    """The serving index, caught up with the profile table on disk (None if it was never built)."""
+    try:
+        mtime = PROFILES_PATH.stat().st_mtime
+    except OSError:
+        return None
+    with _LOCK:
+        if _LOADED["mtime"] != mtime:
+            table = pd.read_parquet(PROFILES_PATH).rename(columns={"ChasePct": "OSwingPct"})  # pre-rename builds
+            idx = _LOADED["index"]
+            if idx is None or (idx.sync(table) and idx.stale):
+                idx = ProfileIndex(table)
+            _LOADED.update(mtime=mtime, index=idx)
+        return _LOADED["index"]
+
+def neighbours(batter: int, season: int, k: int = 10, same_player: bool = False) -> pd.DataFrame:
+    """index().neighbours under the lock sync() mutates it with. LookupError if no index or no such profile."""
+    idx = index()
+    if idx is None:
+        raise LookupError("no similarity index; run scripts/build_similar.py")
+    with _LOCK:
+        return idx.neighbours(batter, season, k, same_player)
+
+def profile_seasons(batter: int) -> list[int]:
+    idx = index()
+    if idx is None:
+        return []
+    with _LOCK:
+        return sorted(s for b, s in idx._pos if b == int(batter))
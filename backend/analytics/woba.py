@@ -0,0 +1,153 @@
+"""League wOBA constants (linear weights, scale, lg_wOBA, lgR/PA) from stored league Statcast."""
+from __future__ import annotations
+import datetime as dt
+import os
+import numpy as np
+import pandas as pd
+
+from backend.analytics.features import NON_PA_EVENTS
+from backend.config import ensure_dirs
+from backend.sequence_src.scrape_savant import (
+    WOBA_CONSTANTS_PATH, _hash_key, fetch_league_statcast, last_pitch_rows,
+)
+
+WEIGHT_EVENTS = {
+    "wBB": ["walk"],
+    "wHBP": ["hit_by_pitch"],
+    "w1B": ["single"],
+    "w2B": ["double"],
+    "w3B": ["triple"],
+    "wHR": ["home_run"],
+}
+OUT_EVENTS = {
+    "field_out","strikeout","force_out","grounded_into_double_play","double_play","triple_play",
+    "fielders_choice","fielders_choice_out","strikeout_double_play","sac_fly","sac_fly_double_play","sac_bunt",
+}
+HIT_EVENTS = {"single","double","triple","home_run"}
+NON_AB_EVENTS = {"walk","intent_walk","hit_by_pitch","sac_fly","sac_fly_double_play","sac_bunt","catcher_interf","catcher_interference"}
+HALF_INNING = ["game_pk","inning","inning_topbot"]
+CONST_COLS = ["wBB","wHBP","w1B","w2B","w3B","wHR","scale","lg_woba","lgRPA"]
+
+def _base_out_state(pas: pd.DataFrame) -> np.ndarray:
+    # 0..23: outs*8 + runner on 1st/2nd/3rd bits
+    outs = pas["outs_when_up"].fillna(0).clip(0, 2).to_numpy(dtype=np.int64)
+    b1 = pas["on_1b"].notna().to_numpy(dtype=np.int64)
+    b2 = pas["on_2b"].notna().to_numpy(dtype=np.int64)
+    b3 = pas["on_3b"].notna().to_numpy(dtype=np.int64)
+    return outs*8 + b1 + 2*b2 + 4*b3
+
+def run_values(pitches: pd.DataFrame) -> pd.DataFrame:
+    """
+    One row per completed PA with its RE24 run value. The run-expectancy matrix
+    is built from the same PAs (runs to end of half-inning, walk-off innings excluded).
+    """
+    pas = last_pitch_rows(pitches)
+    pas = pas[pas["events"].notna()]
+    if pas.empty:
+        return pd.DataFrame(columns=["season","events","runs","run_value"])
+
+    bat = pas["bat_score"].to_numpy(dtype="float64")
+    post = pas["post_bat_score"].to_numpy(dtype="float64")
+    end_score = pas.groupby(HALF_INNING, sort=False)["post_bat_score"].transform("max").to_numpy(dtype="float64")
+    state = _base_out_state(pas)
+
+    complete = ~((pas["inning"] >= 9) & (pas["inning_topbot"] == "Bot")).to_numpy()
+    n = np.bincount(state[complete], minlength=24)
+    re24 = np.bincount(state[complete], weights=(end_score - bat)[complete], minlength=24) / np.maximum(n, 1)
+
+    keys = pas[HALF_INNING].to_numpy()
+    same_half = np.zeros(len(pas), dtype=bool)
+    same_half[:-1] = (keys[1:] == keys[:-1]).all(axis=1)
+    next_state = np.roll(state, -1)
+    re_next = np.where(same_half, re24[next_state], 0.0)
+
+    return pd.DataFrame({
+        "season": pas["game_year"].to_numpy() if "game_year" in pas.columns else pd.to_datetime(pas["game_date"]).dt.year.to_numpy(),
+        "events": pas["events"].to_numpy(),
+        "runs": post - bat,
+        "run_value": (post - bat) + re_next - re24[state],
+    })
+
+def derive_constants(pitches: pd.DataFrame) -> pd.DataFrame:
+    """Season-indexed wOBA constants in the same units as scrape_savant._WOBA_CONSTS."""
+    rv = run_values(pitches)
+    if rv.empty:
+        return pd.DataFrame(columns=CONST_COLS).rename_axis("season")
+    ev = rv["events"]
+    lw = rv.groupby(["season","events"])["run_value"].mean().unstack("events")
+    lw_out = rv[ev.isin(OUT_EVENTS)].groupby("season")["run_value"].mean()
+    # PA / AB denominators: only rows that ended a PA (not caught stealing, pickoffs, wild pitches)
+    counts = rv[~ev.isin(NON_PA_EVENTS)].groupby(["season","events"]).size().unstack("events", fill_value=0)
+
+    def _n(names) -> pd.Series:
+        return counts.reindex(columns=list(names), fill_value=0).sum(axis=1)
+
+    raw = pd.DataFrame({
+        w: lw.reindex(columns=names).mean(axis=1) - lw_out
+        for w, names in WEIGHT_EVENTS.items()
+    })
+    pa = counts.sum(axis=1)
+    h, bb, ibb, hbp = _n(HIT_EVENTS), _n(["walk"]), _n(["intent_walk"]), _n(["hit_by_pitch"])
+    sf = _n(["sac_fly","sac_fly_double_play"])
+    ab = pa - _n(NON_AB_EVENTS)
+    lg_obp = (h + bb + ibb + hbp) / (ab + bb + ibb + hbp + sf)
+    num = sum(raw[w].fillna(0) * _n(names) for w, names in WEIGHT_EVENTS.items())
+    raw_woba = num / (ab + bb + sf + hbp)
+    scale = lg_obp / raw_woba
+
+    out = raw.mul(scale, axis=0)
+    out["scale"] = scale
+    out["lg_woba"] = lg_obp
+    out["lgRPA"] = rv.groupby("season")["runs"].sum() / pa
+    out["n_pa"] = pa
+    return out.round(3).rename_axis("season")
+
+def _season_windows(season: int, through: dt.date) -> list[tuple[str, str]]:
+    # whole-month partitions (the current one too, so its key is stable), so only
+    # the current month is refetched on nightly runs
+    start, stop = dt.date(season, 3, 15), dt.date(season, 11, 15)
+    out = []
+    while start <= min(stop, through):
+        nxt = (start.replace(day=1) + dt.timedelta(days=32)).replace(day=1)
+        out.append((start.isoformat(), min(nxt - dt.timedelta(days=1), stop).isoformat()))
+        start = nxt
+    return out
+
+def _incomplete(start: str, end: str) -> bool:
+    # stored, but written before the month was over: it may be missing games
+    key = _hash_key("league", start, end)
+    return key.exists() and dt.date.fromtimestamp(key.stat().st_mtime) <= dt.date.fromisoformat(end)
+
+def load_league_season(season: int, through: dt.date | None = None) -> pd.DataFrame:
+    through = through or (dt.date.today() - dt.timedelta(days=1))
+    frames = [fetch_league_statcast(a, b, refresh=_incomplete(a, b)) for a, b in _season_windows(season, through)]
+    frames = [f[pd.to_datetime(f["game_date"]).dt.date <= through] if "game_date" in f.columns else f for f in frames]
+    frames = [f for f in frames if not f.empty]
+    if not frames:
+        return pd.DataFrame()
+    df = pd.concat(frames, ignore_index=True)
+    if "game_type" in df.columns:
+        df = df[df["game_type"].astype(str).str.upper().eq("R")]
+    return df
+
+def write_constants(table: pd.DataFrame) -> pd.DataFrame:
+    """Upsert seasons into the versioned constants table (atomic replace)."""
+    ensure_dirs()
+    path = WOBA_CONSTANTS_PATH
+    prev = pd.read_csv(path, index_col="season") if path.exists() else pd.DataFrame()
+    version = int(prev["version"].max()) + 1 if "version" in prev.columns and len(prev) else 1
+    new = table.copy()
+    new["version"] = version
+    new["built_at"] = dt.datetime.now(dt.timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+    merged = pd.concat([prev.drop(index=new.index, errors="ignore"), new]).sort_index()
+    tmp = path.with_suffix(".csv.tmp")
+    merged.to_csv(tmp, index_label="season")
+    os.replace(tmp, path)
+    return merged
+
+def run(seasons: list[int]) -> pd.DataFrame:
+    tables = [derive_constants(load_league_season(int(y))) for y in seasons]
+    tables = [t for t in tables if not t.empty]
+    if not tables:
+        raise SystemExit(f"No league data for seasons {seasons}")
+    return write_constants(pd.concat(tables))
@@ -0,0 +1,239 @@
+"""
+Arrow IPC / Parquet responses for analytical clients.
+
+Routes that return a table negotiate the format from ?format= (wins) or the
+Accept header; JSON stays the default, so browsers and the frontend are unaffected.
+
+    application/vnd.apache.arrow.stream   Arrow IPC stream  (?format=arrow)
+    application/vnd.apache.parquet        Parquet file      (?format=parquet)
+    application/x-ndjson                  one JSON object per line (?format=ndjson, pitch exports)
+
+    pyarrow.ipc.open_stream(resp.content).read_pandas()
+    pd.read_parquet(io.BytesIO(resp.content))
+
+The JSON envelope's scalar fields (bid, season, split, ...) ride along as
+schema metadata under b"biolab". stream_partitions() serves store partitions
+batch by batch: parquet row groups are decoded straight into Arrow record
+batches, filtered with pyarrow.compute and written out, so memory is bounded by
+one batch however many seasons are exported. NDJSON chunks are encoded one
+batch at a time by pandas' C encoder; nothing is built row by row.
+
+The body is a sync generator, which Starlette advances from a worker thread and
+only after the previous chunk was sent: a slow client stalls the reader rather
+than letting chunks pile up in memory.
+"""
+from __future__ import annotations
+import json
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
+
+import pandas as pd
+from fastapi import HTTPException
+from fastapi.responses import Response, StreamingResponse
+
+from backend.api.params import BATCH_ROWS, ExportFormat, Format
+from backend.tracing import stage
+
+ARROW_STREAM = "application/vnd.apache.arrow.stream"
+PARQUET = "application/vnd.apache.parquet"
+NDJSON = "application/x-ndjson"
+MEDIA_TYPES = {"json": "application/json", "arrow": ARROW_STREAM, "parquet": PARQUET, "ndjson": NDJSON}
+_ACCEPT = {
+    "application/json": "json",
+    NDJSON: "ndjson",
+    "application/jsonl": "ndjson",
+    ARROW_STREAM: "arrow",
+    "application/vnd.apache.arrow.file": "arrow",
+    PARQUET: "parquet",
+    "application/x-parquet": "parquet",
+}
+
+def negotiate(accept: Optional[str], fmt: Optional[str] = None, offered: Iterable[str] = ("json", "arrow", "parquet")) -> str:
+    """Pick a format from ?format= or the Accept header; the first offered format is the default."""
+    offered = list(offered)
+    if fmt:
+        if fmt not in offered:
+            raise HTTPException(status_code=406, detail=f"format must be one of {offered}, got {fmt!r}")
+        return fmt
+    ranked = []
+    for i, part in enumerate((accept or "").split(",")):
+        media, *params = [p.strip() for p in part.split(";")]
+        q = 1.0
+        for p in params:
+            if p.startswith("q="):
+                try:
+                    q = float(p[2:])
+                except ValueError:
+                    q = 0.0
+        if q > 0:
+            ranked.append((-q, i, media.lower()))
+    for _, _, media in sorted(ranked):
+        if media in ("*/*", "application/*"):
+            return offered[0]
+        if _ACCEPT.get(media) in offered:
+            return _ACCEPT[media]
+    return offered[0]
+
+def _schema_meta(meta: Optional[Dict[str, Any]]) -> Dict[bytes, bytes]:
+    return {b"biolab": json.dumps(meta, default=str).encode()} if meta else {}
+
+def table_bytes(df: pd.DataFrame, fmt: str, meta: Optional[Dict[str, Any]] = None) -> bytes:
+    import pyarrow as pa
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    table = table.replace_schema_metadata({**(table.schema.metadata or {}), **_schema_meta(meta)})
+    sink = pa.BufferOutputStream()
+    if fmt == "arrow":
+        with pa.ipc.new_stream(sink, table.schema) as w:
+            w.write_table(table, max_chunksize=BATCH_ROWS)
+    elif fmt == "parquet":
+        import pyarrow.parquet as pq
+        pq.write_table(table, sink, row_group_size=BATCH_ROWS)
+    else:
+        raise ValueError(f"not a binary format: {fmt!r}")
+    return sink.getvalue().to_pybytes()
+
+class TableResponse(Response):
+    """A DataFrame sent as an Arrow IPC stream or a Parquet file."""
+
+    def __init__(self, df: pd.DataFrame, fmt: str, meta: Optional[Dict[str, Any]] = None, **kwargs) -> None:
+        self.fmt, self.meta = fmt, meta
+        super().__init__(df, media_type=MEDIA_TYPES[fmt], **kwargs)
+
+    def render(self, content: pd.DataFrame) -> bytes:
+        with stage(f"serialize.{self.fmt}") as sp:
+            body = table_bytes(content, self.fmt, self.meta)
+            sp.rows, sp.bytes = len(content), len(body)
+            return body
+
+def respond(accept: Optional[str], fmt: Optional[str], df: pd.DataFrame, payload: Dict[str, Any]) -> Response:
+    """
+    JSON `payload` (built by the route, frames already wrapped) or `df` as
+    Arrow/Parquet carrying payload's non-frame fields as metadata.
+    """
+    from backend.api.fastjson import Frame, FrameJSONResponse
+    chosen = negotiate(accept, fmt)
+    if chosen == "json":
+        return FrameJSONResponse(payload)
+    meta = {k: v for k, v in payload.items() if k != "data" and not isinstance(v, Frame)}
+    return TableResponse(df, chosen, meta=meta)
+
+# ---------- store partitions ----------
+
+def _conform(batch, schema):
+    """`batch` with `schema`'s columns, order and types (missing columns become nulls)."""
+    import pyarrow as pa
+    cols = []
+    for field in schema:
+        i = batch.schema.get_field_index(field.name)
+        col = batch.column(i) if i >= 0 else pa.nulls(batch.num_rows, field.type)
+        cols.append(col if col.type == field.type else col.cast(field.type))
+    return pa.RecordBatch.from_arrays(cols, schema=schema)
+
+def partition_schema(paths: List[Path], columns: Optional[List[str]] = None):
+    """One schema for every partition: Savant's inferred types drift across seasons (all-null -> null, int -> double)."""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    schemas = [pq.read_schema(p).remove_metadata() for p in paths]
+    schema = pa.unify_schemas(schemas, promote_options="permissive") if schemas else pa.schema([])
+    if columns is not None:
+        schema = pa.schema([schema.field(c) for c in columns if schema.get_field_index(c) >= 0])
+    return schema
+
+def iter_partition_batches(paths: List[Path], schema, batch_rows: int = BATCH_ROWS) -> Iterator:
+    """Record batches of every partition in order, conformed to `schema`."""
+    import pyarrow.parquet as pq
+    names = set(schema.names)
+    for p in paths:
+        pf = pq.ParquetFile(p)
+        cols = [c for c in pf.schema_arrow.names if c in names]
+        for batch in pf.iter_batches(batch_size=batch_rows, columns=cols):
+            yield _conform(batch, schema)
+
+class _Drain:
+    """Write-only file for the IPC/Parquet writers whose bytes are handed off as they arrive."""
+
+    def __init__(self) -> None:
+        self.chunks: List[bytes] = []
+        self.pos = 0
+        self.closed = False
+
+    def write(self, b) -> int:
+        b = bytes(b)
+        self.chunks.append(b)
+        self.pos += len(b)
+        return len(b)
+
+    def tell(self) -> int:
+        return self.pos
+
+    def flush(self) -> None:
+        pass
+
+    def close(self) -> None:
+        self.closed = True
+
+    def take(self) -> bytes:
+        out, self.chunks = b"".join(self.chunks), []
+        return out
+
+def _ndjson(batch) -> bytes:
+    text = batch.to_pandas().to_json(orient="records", lines=True, date_format="iso", default_handler=str)
+    return (text if text.endswith("\n") else text + "\n").encode()
+
+def _encode_batches(batches: Iterator, schema, fmt: str, meta: Optional[Dict[str, Any]]) -> Iterator[bytes]:
+    import pyarrow as pa
+    schema = schema.with_metadata(_schema_meta(meta))
+    rows = nbytes = 0
+    with stage(f"export.{fmt}") as sp:
+        if fmt == "ndjson":
+            for batch in batches:
+                chunk = _ndjson(batch)
+                rows, nbytes = rows + batch.num_rows, nbytes + len(chunk)
+                yield chunk
+            sp.rows, sp.bytes = rows, nbytes
+            return
+        drain = _Drain()
+        if fmt == "arrow":
+            w = pa.ipc.new_stream(drain, schema)
+        else:
+            import pyarrow.parquet as pq
+            w = pq.ParquetWriter(drain, schema)
+        for batch in batches:
+            if fmt == "arrow":
+                w.write_batch(batch)
+            else:
+                w.write_batch(batch, row_group_size=batch.num_rows)
+            rows += batch.num_rows
+            chunk = drain.take()
+            nbytes += len(chunk)
+            if chunk:
+                yield chunk
+        w.close()
+        tail = drain.take()
+        nbytes += len(tail)
+        sp.rows, sp.bytes = rows, nbytes
+        yield tail
+
+def _filtered(batches: Iterator, where: Callable, out_names: List[str]) -> Iterator:
+    for batch in batches:
+        batch = batch.filter(where(batch)).select(out_names)
+        if batch.num_rows:
+            yield batch
+
+def stream_partitions(paths: List[Path], fmt: str, meta: Optional[Dict[str, Any]] = None,
+                      columns: Optional[List[str]] = None, batch_rows: int = BATCH_ROWS,
+                      where: Optional[Callable] = None, needs: Iterable[str] = ()) -> StreamingResponse:
+    """
+    Stream store partitions as one Arrow IPC stream, Parquet file or NDJSON
+    body, a record batch (<= batch_rows rows) at a time. `where(batch)` returns
+    a boolean mask over the columns in `needs`, which are read even when not selected.
+    """
+    full = partition_schema(paths)
+    out = partition_schema(paths, columns) if columns is not None else full
+    if where is None:
+        batches = iter_partition_batches(paths, out, batch_rows)
+    else:
+        read = partition_schema(paths, list(out.names) + [c for c in needs if c not in out.names])
+        batches = _filtered(iter_partition_batches(paths, read, batch_rows), where, out.names)
+    body = _encode_batches(batches, out, fmt, meta)
+    return StreamingResponse(body, media_type=MEDIA_TYPES[fmt])
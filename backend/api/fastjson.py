@@ -0,0 +1,116 @@
+"""
+One-pass JSON for DataFrame-heavy responses.
+
+Frames are written by pandas' C encoder (NaN -> null, numpy scalars native) and
+spliced into the envelope, which is encoded with orjson when installed (json
+otherwise). Nothing walks cells in Python and FastAPI does not re-encode the
+result, because routes return a FrameJSONResponse directly.
+
+    return FrameJSONResponse({"bid": bid, "data": Frame(df, orient)})
+
+orient="records" (default) keeps the [{col: value}, ...] shape; "columns" sends
+{col: [values...]}, which drops the repeated keys for wide or long tables.
+"""
+from __future__ import annotations
+import datetime as dt
+import json
+from typing import Any, List, Tuple
+
+import numpy as np
+import pandas as pd
+from fastapi.responses import Response
+
+from backend.api.params import Orient
+from backend.tracing import stage
+
+try:
+    import orjson
+    _HAS_ORJSON = True
+except Exception:
+    _HAS_ORJSON = False
+
+class Frame:
+    """A DataFrame placed in a response payload, serialized as `orient`."""
+    __slots__ = ("df", "orient")
+
+    def __init__(self, df: pd.DataFrame, orient: Orient = "records") -> None:
+        if orient not in ("records", "columns"):
+            raise ValueError(f"orient must be 'records' or 'columns', got {orient!r}")
+        self.df = df
+        self.orient = orient
+
+    def to_json(self) -> bytes:
+        df = _plain_nullables(self.df)
+        if self.orient == "records":
+            return df.to_json(orient="records", date_format="iso", default_handler=str).encode() if len(df.columns) else b"[]"
+        parts = [
+            json.dumps(str(c)).encode() + b":" + df[c].to_json(orient="values", date_format="iso", default_handler=str).encode()
+            for c in df.columns
+        ]
+        return b"{" + b",".join(parts) + b"}"
+
+def _plain_nullables(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Nullable Int*/UInt*/boolean columns as object with NA -> None. pandas encodes
+    them as ints in records orient but floats as a Series, so both orients get
+    the same JSON types only when the encoder sees plain Python values.
+    """
+    cols = [c for c, t in df.dtypes.items() if pd.api.types.is_extension_array_dtype(t) and t.kind in "iub"]
+    if not cols:
+        return df
+    out = df.copy(deep=False)
+    for c in cols:
+        out[c] = df[c].astype(object).where(df[c].notna(), None)
+    return out
+
+def _default(o: Any) -> Any:
+    if isinstance(o, np.generic):
+        v = o.item()
+        return None if isinstance(v, float) and v != v else v
+    if isinstance(o, np.ndarray):
+        return o.tolist()
+    if isinstance(o, (pd.Timestamp, dt.date, dt.datetime)):
+        return o.isoformat()
+    if o is pd.NA or o is pd.NaT:
+        return None
+    if isinstance(o, pd.DataFrame):
+        return json.loads(Frame(o).to_json())
+    raise TypeError(f"not JSON serializable: {type(o).__name__}")
+
+def _swap_frames(obj: Any, frames: List[Frame]) -> Any:
+    # replace each Frame with a placeholder string the encoder passes through verbatim
+    if isinstance(obj, Frame):
+        frames.append(obj)
+        return f"\x00frame{len(frames) - 1}\x00"
+    if isinstance(obj, dict):
+        return {k: _swap_frames(v, frames) for k, v in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [_swap_frames(v, frames) for v in obj]
+    if isinstance(obj, float) and obj != obj:
+        return None
+    return obj
+
+def _encode(obj: Any) -> bytes:
+    if _HAS_ORJSON:
+        return orjson.dumps(obj, default=_default, option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS)
+    return json.dumps(obj, default=_default, separators=(",", ":")).encode()
+
+def _dumps(content: Any) -> Tuple[bytes, List[Frame]]:
+    frames: List[Frame] = []
+    body = _encode(_swap_frames(content, frames))
+    for i, f in enumerate(frames):
+        body = body.replace(f'"\\u0000frame{i}\\u0000"'.encode(), f.to_json(), 1)
+    return body, frames
+
+def dumps(content: Any) -> bytes:
+    return _dumps(content)[0]
+
+class FrameJSONResponse(Response):
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        with stage("serialize.json") as sp:
+            body, frames = _dumps(content)
+            sp.rows = sum(len(f.df) for f in frames)
+            sp.bytes = len(body)
+            return body
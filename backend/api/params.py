@@ -0,0 +1,13 @@
+"""
+Query-parameter types shared by route signatures.
+
+server.py declares every route with these at import time, so this module imports
+nothing but typing; arrowio, fastjson and the analytics modules that act on the
+values load with the first request that needs them.
+"""
+from typing import Literal
+
+Orient = Literal["records", "columns"]                # fastjson.Frame
+Format = Literal["json", "arrow", "parquet"]          # arrowio.respond
+ExportFormat = Literal["ndjson", "arrow", "parquet"]  # arrowio.stream_partitions
+BATCH_ROWS = 64_000                                   # rows per Arrow record batch / parquet row group
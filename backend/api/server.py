@@ -1,18 +1,28 @@
 
-from fastapi import FastAPI, Query, HTTPException
-import requests
+from fastapi import FastAPI, Query, HTTPException, Header
+import datetime as dt
+import os
+import time
 import re
 from typing import List, Dict, Any
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.encoders import jsonable_encoder
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, PlainTextResponse
 from typing import Optional, Literal, Dict, Any, List
 
 import numpy as np
 import pandas as pd
 
+from backend import tracing
+# route signatures only need the parameter types; the analytics modules, arrowio and
+# fastjson are imported by the routes that use them, so a cold start loads none of them
+from backend.api.params import BATCH_ROWS, ExportFormat, Format, Orient
+from backend.tracing import stage
+
 # Sequence fetcher (your trusted source)
-from backend.sequence_src.scrape_savant import fetch_hitter_statcast, summarize_hitter_seasons
+from backend.sequence_src.scrape_savant import (
+    fetch_hitter_statcast, fetch_pitcher_statcast, lookup_pitcher_id, summarize_hitter_seasons, last_pitch_rows,
+    partition_path, season_window,
+)
 
 app = FastAPI(title="Biolab API", version="1.0.0")
 
@@ -22,39 +32,55 @@ app.add_middleware(
     allow_methods=["*"], allow_headers=["*"],
 )
 
-# ---------- utils ----------
+# Server-Timing on every response when SEQUENCE_SERVER_TIMING=1 (or per request with ?timing=1)
+_SERVER_TIMING = os.getenv("SEQUENCE_SERVER_TIMING", "").lower() in ("1","true","yes")
 
-def _json_records(df: pd.DataFrame) -> List[Dict[str, Any]]:
-    if df.empty:
-        return []
-    # Replace NaN -> None, and let FastAPI encode numpy/pandas dtypes safely
-    df = df.replace({np.nan: None})
-    return jsonable_encoder(df.to_dict(orient="records"))
-
-# Map common Statcast pitch names to families (extend as needed)
-_PITCH_FAMILY_MAP = {
-    "4-Seam Fastball":"fastball", "4-Seam":"fastball", "FF":"fastball", "Fastball":"fastball",
-    "Sinker":"sinker", "SI":"sinker", "Two-Seam Fastball":"sinker", "FT":"sinker",
-    "Cutter":"cutter", "FC":"cutter",
-    "Slider":"slider", "SL":"slider",
-    "Curveball":"curveball", "CU":"curveball", "Knuckle Curve":"curveball", "KC":"curveball",
-    "Sweeper":"slider", "SV":"slider",  # treat sweeper as slider fam for now
-    "Changeup":"changeup", "CH":"changeup",
-    "Splitter":"splitter", "FS":"splitter",
-    "Knuckleball":"knuckleball", "KN":"knuckleball",
-}
+@app.middleware("http")
+async def _trace_request(request, call_next):
+    token = tracing.begin_request()
+    t0 = time.perf_counter()
+    try:
+        response = await call_next(request)
+    finally:
+        spans = tracing.end_request(token)
+    total = time.perf_counter() - t0
+    route = request.scope.get("route")
+    tracing.record(f"route:{getattr(route, 'path', request.url.path)}", total,
+                   nbytes=int(response.headers.get("content-length") or 0))
+    if _SERVER_TIMING or request.query_params.get("timing") == "1":
+        response.headers["Server-Timing"] = tracing.server_timing(spans, total)
+    return response
+
+@app.get("/metrics", include_in_schema=False)
+def metrics():
+    return PlainTextResponse(tracing.render_prometheus(), media_type="text/plain; version=0.0.4")
+
+@app.on_event("startup")
+def _start_prefetch():
+    # Warm the Statcast store for upcoming probables/opposing hitters (opt-in).
+    if os.getenv("SEQUENCE_PREFETCH", "").lower() in ("1","true","yes"):
+        from backend.sequence_src.prefetch import PrefetchScheduler
+        app.state.prefetch = PrefetchScheduler(
+            days_ahead=int(os.getenv("SEQUENCE_PREFETCH_DAYS", "2")),
+        ).start()
+
+@app.on_event("shutdown")
+def _stop_prefetch():
+    sched = getattr(app.state, "prefetch", None)
+    if sched:
+        sched.stop(timeout=5)
+
+# ---------- utils ----------
 
 def _add_pitch_family(df: pd.DataFrame) -> pd.DataFrame:
+    from backend.analytics import features
     if "pitch_name" not in df.columns:
-        df["pitch_name"] = None
-    fam = df["pitch_name"].map(_PITCH_FAMILY_MAP).fillna("unknown")
-    return df.assign(pitch_family=fam)
+        df = df.assign(pitch_name=None)   # never add columns to the caller's (store) frame
+    return df.assign(pitch_family=features.pitch_family(df))
 
 def _last_pitch_per_PA(df: pd.DataFrame) -> pd.DataFrame:
-    if df.empty:
-        return df
-    tmp = df.sort_values(["game_pk","at_bat_number","pitch_number"])
-    return tmp.drop_duplicates(["game_pk","at_bat_number","batter"], keep="last")
+    # store frames are already in PA order; this is a take, not a sort
+    return last_pitch_rows(df)
 
 def _normalize_season_counts(events: pd.Series) -> pd.Series:
     # Count AB as PAs that are official at-bats (exclude BB, HBP, IBB, catcher interference, sacrifices)
@@ -74,18 +100,20 @@ def _season_table(df: pd.DataFrame) -> pd.DataFrame:
     df["season"] = pd.to_datetime(df["game_date"]).dt.year
 
     pa_last = _last_pitch_per_PA(df)
-    g = pa_last.groupby(["batter","player_name","season"], dropna=False)
+    # same AB/H rules as _normalize_season_counts, as flags so one agg does every group
+    ev = pa_last["events"].fillna("")
+    flags = pa_last.assign(
+        _ab=~ev.isin(["walk","intent_walk","hit_by_pitch","catcher_interf","sac_bunt","sac_fly"]),
+        _h=ev.isin(["single","double","triple","home_run"]),
+    )
+    g = flags.groupby(["batter","player_name","season"], dropna=False)
 
     out = g.agg(
         PA=("pitch_number","count"),
-        ABH=("events", _normalize_season_counts)
+        AB=("_ab","sum"),
+        H=("_h","sum"),
     ).reset_index()
 
-    # expand AB/H from the dict column
-    out["AB"] = out["ABH"].apply(lambda d: int(d["AB"]))
-    out["H"]  = out["ABH"].apply(lambda d: int(d["H"]))
-    out = out.drop(columns=["ABH"])
-
     # Simple rate stats
     out["AVG"] = (out["H"] / out["AB"].replace(0, np.nan)).round(3)
     # OBP approx from events (walks/HBP captured in non-AB; recompute directly)
@@ -118,6 +146,35 @@ def _season_table(df: pd.DataFrame) -> pd.DataFrame:
     out[["batter","season","PA","AB","H"]] = out[["batter","season","PA","AB","H"]].astype(int, errors="ignore")
     return out
 
+def _heatmap_grid(
+    df: pd.DataFrame,
+    pitch_family: Optional[str] = None,
+    pitch_type: Optional[str] = None,
+    include_postseason: bool = False,
+) -> List[List[int]]:
+    from backend.analytics import features, pitching
+    df = _add_pitch_family(pitching.game_types(df, include_postseason))
+
+    if pitch_family:
+        want = pitch_family.strip().lower()
+        df = df[df["pitch_family"].str.lower()==want]
+    if pitch_type:
+        # a Statcast code ("SL") or name ("Slider", "slider"); either column may be missing
+        want = pitch_type.strip().lower()
+        hit = pd.Series(False, index=df.index)
+        for col in ("pitch_type", "pitch_name"):
+            if col in df.columns:
+                hit |= df[col].astype("string").str.lower().eq(want).fillna(False)
+        df = df[hit]
+
+    # 9x9 bins on plate_x [-0.85, 0.85], plate_z [1.0, 4.0]
+    if df.empty:
+        return features.location_grid(df).tolist()
+
+    with stage("aggregate.heatmap") as sp:
+        sp.rows = len(df)
+        return features.location_grid(df).tolist()
+
 # ---------- routes ----------
 
 
@@ -150,36 +207,43 @@ def hitter_splits(
     bid: int,
     season: Optional[int] = Query(None),
     split: Literal["pitch_family","pitch_type","stand","count","zone"] = "pitch_family",
-    include_postseason: bool = Query(False)
-) -> Dict[str, Any]:
+    include_postseason: bool = Query(False),
+    orient: Orient = Query("records", description="records | columns (compact {col: [values]})"),
+    format: Optional[Format] = Query(None, description="json | arrow | parquet (default: Accept header, else json)"),
+    accept: Optional[str] = Header(None),
+):
+    from backend.analytics import pitching
+    from backend.api import arrowio
+    from backend.api.fastjson import Frame
     if season:
-        start_dt, end_dt = f"{season}-03-01", f"{season}-10-31"
+        start_dt, end_dt = season_window(season)
     else:
         start_dt, end_dt = None, None
 
     df = fetch_hitter_statcast(bid, start_dt, end_dt)
-    if not include_postseason:
-        df = df[df["game_type"].fillna("") != "P"]
-
-    if split in ("pitch_family","pitch_type"):
-        df = _add_pitch_family(df)
-
-    pa = _last_pitch_per_PA(df)
-    key = {"pitch_family":"pitch_family", "pitch_type":"pitch_name",
-           "stand":"stand", "count":"balls", "zone":"zone"}[split]
-
-    grp = pa.groupby(key, dropna=False)["events"].apply(
-        lambda s: _normalize_season_counts(s)["AB"]
-    ).reset_index(name="AB")
-    # Hits per split
-    hits = pa.groupby(key, dropna=False)["events"].apply(
-        lambda s: _normalize_season_counts(s)["H"]
-    ).reset_index(name="H")
-    out = pd.merge(grp, hits, on=key, how="outer").fillna(0)
-    out["AVG"] = (out["H"] / out["AB"].replace(0, np.nan)).round(3)
-    out = out.sort_values("AB", ascending=False)
-
-    return {"bid": bid, "season": season, "split": split, "data": _json_records(out)}
+    with stage("aggregate.splits") as sp:
+        sp.rows = len(df)
+        df = pitching.game_types(df, include_postseason)
+
+        if split in ("pitch_family","pitch_type"):
+            df = _add_pitch_family(df)
+
+        pa = _last_pitch_per_PA(df)
+        key = {"pitch_family":"pitch_family", "pitch_type":"pitch_name",
+               "stand":"stand", "count":"balls", "zone":"zone"}[split]
+
+        grp = pa.groupby(key, dropna=False)["events"].apply(
+            lambda s: _normalize_season_counts(s)["AB"]
+        ).reset_index(name="AB")
+        # Hits per split
+        hits = pa.groupby(key, dropna=False)["events"].apply(
+            lambda s: _normalize_season_counts(s)["H"]
+        ).reset_index(name="H")
+        out = pd.merge(grp, hits, on=key, how="outer").fillna(0)
+        out["AVG"] = (out["H"] / out["AB"].replace(0, np.nan)).round(3)
+        out = out.sort_values("AB", ascending=False)
+
+    return arrowio.respond(accept, format, out, {"bid": bid, "season": season, "split": split, "data": Frame(out, orient)})
 
 @app.get("/hitters/{bid}/heatmap")
 def hitter_heatmap(
@@ -190,39 +254,67 @@ def hitter_heatmap(
     include_postseason: bool = Query(False)
 ) -> Dict[str, Any]:
     if season:
-        start_dt, end_dt = f"{season}-03-01", f"{season}-10-31"
+        start_dt, end_dt = season_window(season)
     else:
         start_dt, end_dt = None, None
 
     df = fetch_hitter_statcast(bid, start_dt, end_dt)
-    if not include_postseason:
-        df = df[df["game_type"].fillna("") != "P"]
-
-    df = _add_pitch_family(df)
-
-    if pitch_family:
-        want = pitch_family.strip().lower()
-        df = df[df["pitch_family"].str.lower()==want]
-    if pitch_type:
-        # allow friendly like "slider" or Statcast "Slider"
-        want = pitch_type.strip().lower()
-        df = df[df["pitch_name"].str.lower()==want]
-
-    # 9x9 bins on plate_x [-0.85, 0.85], plate_z [1.0, 4.0]
-    if df.empty:
-        grid = [[0]*9 for _ in range(9)]
-        return {"bid": bid, "season": season, "grid": grid}
-
-    xb = pd.cut(df["plate_x"], bins=np.linspace(-0.85, 0.85, 10), labels=False, include_lowest=True)
-    zb = pd.cut(df["plate_z"], bins=np.linspace(1.0, 4.0, 10),  labels=False, include_lowest=True)
-    tmp = df.assign(xb=xb, zb=zb).dropna(subset=["xb","zb"])
-    pivot = tmp.pivot_table(index="zb", columns="xb", values="pitch_number", aggfunc="count", fill_value=0)
-
-    # Ensure 9x9 shape and python ints
-    pivot = pivot.reindex(index=range(0,9), columns=range(0,9), fill_value=0)
-    grid = pivot.astype(int).values.tolist()
+    grid = _heatmap_grid(df, pitch_family, pitch_type, include_postseason)
     return {"bid": bid, "season": season, "grid": grid}
 
+@app.get("/hitters/{bid}/percentiles")
+def hitter_percentiles(
+    bid: int,
+    season: Optional[int] = Query(None, description="default: this year"),
+    orient: Orient = Query("records", description="records | columns (compact {col: [values]})"),
+    format: Optional[Format] = Query(None, description="json | arrow | parquet (default: Accept header, else json)"),
+    accept: Optional[str] = Header(None),
+):
+    """The hitter's regular-season EV, hard-hit%, barrel%, xwOBA, whiff%, O-Swing%, K% and BB%, ranked against the league index (100 = best)."""
+    from backend.analytics import features, percentiles, pitching
+    from backend.api import arrowio
+    from backend.api.fastjson import Frame
+    season = season or dt.date.today().year
+    min_pa = percentiles.qualifier(season)
+    if min_pa is None:
+        raise HTTPException(status_code=404, detail=f"no percentile index for {season} (built: {percentiles.seasons()}); run scripts/build_percentiles.py")
+    try:
+        df = pitching.game_types(fetch_hitter_statcast(bid, *season_window(season)), include_postseason=False)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"on-demand compute failed: {e}")
+    t = features.hitter_rates(features.hitter_totals(df.assign(batter=bid), ["batter"]))
+    profile = t.iloc[0].to_dict() if len(t) else {}
+    out = percentiles.ranks(season, profile)
+    pa = int(profile.get("PA", 0))
+    payload = {"bid": bid, "season": season, "PA": pa, "min_pa": min_pa, "qualified": pa >= min_pa, "data": Frame(out, orient)}
+    return arrowio.respond(accept, format, out, payload)
+
+@app.get("/hitters/{bid}/similar")
+def hitter_similar(
+    bid: int,
+    season: Optional[int] = Query(None, description="the hitter's season to match (default: the latest one profiled)"),
+    k: int = Query(10, ge=1, le=100),
+    same_player: bool = Query(False, description="allow the hitter's own other seasons"),
+    orient: Orient = Query("records", description="records | columns (compact {col: [values]})"),
+    format: Optional[Format] = Query(None, description="json | arrow | parquet (default: Accept header, else json)"),
+    accept: Optional[str] = Header(None),
+):
+    """The k player-seasons (any season) whose standardized rollup + per-pitch-family profile is closest to the hitter's."""
+    from backend.analytics import similar
+    from backend.api import arrowio
+    from backend.api.fastjson import Frame
+    if season is None:
+        have = similar.profile_seasons(bid)
+        if not have:
+            raise HTTPException(status_code=404, detail=f"no similarity profile for {bid} (min {similar.MIN_PA} PA in a built season)")
+        season = have[-1]
+    try:
+        out = similar.neighbours(bid, season, k, same_player)
+    except LookupError as e:
+        detail = str(e) if not isinstance(e, KeyError) else f"no similarity profile for {bid} in {season}"
+        raise HTTPException(status_code=404, detail=detail)
+    return arrowio.respond(accept, format, out, {"bid": bid, "season": season, "k": k, "data": Frame(out, orient)})
+
 
 
 from fastapi import Query
@@ -249,6 +341,7 @@ def _local_player_search(q: str):
         return []
 
 def _mlb_people_search(q: str) -> List[Dict[str, Any]]:
+    import requests
     url = "https://statsapi.mlb.com/api/v1/people/search"
     r = requests.get(url, params={"q": q}, timeout=10)
     r.raise_for_status()
@@ -319,59 +412,35 @@ def pitchers_search(q: str):
 
 
 @app.get("/pitchers/{pid}/season")
-def pitcher_season(pid: int, season: int):
+def pitcher_season(
+    pid: int,
+    season: int,
+    include_postseason: bool = False,
+    format: Optional[Format] = Query(None, description="json | arrow | parquet (default: Accept header, else json)"),
+    accept: Optional[str] = Header(None),
+):
+    from backend.analytics import pitching
+    from backend.api import arrowio
     import pandas as pd
     from fastapi import HTTPException
 
-    start = f"{season}-03-01"
-    end = f"{season}-10-31"
-
-    try:
-        df = fetch_pitcher_statcast(int(pid), start, end)
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"on-demand compute failed: {e}")
+    fmt = arrowio.negotiate(accept, format)
+    df = _pitcher_frame(pid, season, include_postseason)
 
     if df is None or len(df) == 0:
         raise HTTPException(status_code=404, detail="No data for this player/season")
 
-    tmp = df.copy()
-    tmp["season"] = pd.to_datetime(tmp["game_date"]).dt.year
-
-    last = (
-        tmp.sort_values(["game_pk","at_bat_number","pitch_number"])
-           .drop_duplicates(["game_pk","at_bat_number","pitcher"], keep="last")
-    )
-
-    ev = (last["events"].fillna("")).astype(str)
-
-    def ct(name: str):
-        return (ev == name).sum()
-
-    singles = ct("single")
-    doubles = ct("double")
-    triples = ct("triple")
-    homers = ct("home_run")
-    hits = singles + doubles + triples + homers
-
-    walks = ct("walk") + ct("intent_walk")
-    hbp = ct("hit_by_pitch")
-    sf = ct("sac_fly")
-
-    non_ab = set(["walk","intent_walk","hit_by_pitch","sac_fly","sac_bunt","catcher_interference"])
-    ab_mask = ~ev.isin(list(non_ab))
-    AB = int(ab_mask.sum())
-    PA = int(len(last))
-    H = int(hits)
-
+    t = pitching.season_line(df)
+    AB, H, sf = t["AB"], t["H"], t["SF"]
+    walks, hbp = t["BB"], t["HBP"]
     AVG = float(H / AB) if AB > 0 else 0.0
     OBP = float((H + walks + hbp) / (AB + walks + hbp + sf)) if (AB + walks + hbp + sf) > 0 else 0.0
-    TB = int(singles + 2*doubles + 3*triples + 4*homers)
-    SLG = float(TB / AB) if AB > 0 else 0.0
+    SLG = float(t["TB"] / AB) if AB > 0 else 0.0
 
     pname = None
-    if "pitcher_name" in tmp.columns:
+    if "pitcher_name" in df.columns:
         try:
-            pname = str(tmp["pitcher_name"].dropna().unique().tolist()[:1][0])
+            pname = str(df["pitcher_name"].dropna().unique().tolist()[:1][0])
         except Exception:
             pname = None
 
@@ -379,16 +448,18 @@ def pitcher_season(pid: int, season: int):
         "pitcher": int(pid),
         "player_name": pname,
         "season": int(season),
-        "BF": PA,
+        "BF": t["PA"],
         "AB": AB,
         "H": H,
         "AVG_against": round(AVG, 3),
         "OBP_against": round(OBP, 3),
         "SLG_against": round(SLG, 3),
-        "HR": int(homers),
-        "BB": int(walks),
-        "HBP": int(hbp)
+        "HR": t["HR"],
+        "BB": walks,
+        "HBP": hbp
     }
+    if fmt != "json":
+        return arrowio.TableResponse(pd.DataFrame([out]), fmt)
     return {"data": out}
 
 
@@ -425,6 +496,23 @@ def _compute_batter_metrics(g: pd.DataFrame) -> pd.DataFrame:
     g['BB%'] = div(g['BB'], g['PA']).round(3)
     return g
 
+_POSTSEASON_TYPES = {"F","D","L","W","P"}
+_NON_AB_EVENTS = ["walk","intent_walk","hit_by_pitch","sac_fly","sac_fly_double_play","sac_bunt","catcher_interf","catcher_interference"]
+
+def _pa_counts(pas: pd.DataFrame) -> Dict[str, int]:
+    from backend.analytics.features import NON_PA_EVENTS
+    # a PA still in progress has no result yet; caught stealing, pickoffs etc. are not PAs
+    pas = pas[pas["events"].notna() & ~pas["events"].isin(NON_PA_EVENTS)]
+    ev = pas["events"].fillna("")
+    def n(*names):
+        return int(ev.isin(names).sum())
+    return {
+        "PA": len(pas), "AB": len(pas) - n(*_NON_AB_EVENTS),
+        "H": n("single","double","triple","home_run"), "2B": n("double"), "3B": n("triple"), "HR": n("home_run"),
+        "BB": n("walk","intent_walk"), "K": n("strikeout","strikeout_double_play"), "HBP": n("hit_by_pitch"),
+        "SF": n("sac_fly","sac_fly_double_play"),
+    }
+
 @app.get("/hitters/{bid}/season_all")
 def hitters_season_all(
     bid: int,
@@ -436,56 +524,365 @@ def hitters_season_all(
     pitch_type: Optional[str] = None,
     zone: Optional[str] = None,
     group_by: Optional[str] = Query('season', description="season|total"),
+    orient: Orient = Query("records", description="records | columns (compact {col: [values]})"),
+    format: Optional[Format] = Query(None, description="json | arrow | parquet (default: Accept header, else json)"),
+    accept: Optional[str] = Header(None),
 ):
+    from backend.api import arrowio
+    from backend.api.fastjson import Frame
     try:
-        from backend.sequence_src.scrape_savant import fetch_hitter_statcast, summarize_hitter_seasons
         years = [int(x) for x in seasons.split(',')] if seasons else []
         if not years:
             years = [pd.Timestamp.today().year]
         frames = []
         for y in years:
-            # regular season
-            ev = fetch_hitter_statcast(start=f"{y}-03-01", end=f"{y}-12-31", bid=bid, season_type="regular", cache=True)
-            df = _normalize_hitters(ev)
-            if include_postseason:
-                post = fetch_hitter_statcast(start=f"{y}-10-01", end=f"{y}-12-31", bid=bid, season_type="postseason", cache=True)
-                if not post.empty:
-                    df = pd.concat([df, _normalize_hitters(post)], ignore_index=True)
-            if df.empty:
+            ev = fetch_hitter_statcast(bid, *season_window(y))
+            if ev.empty:
                 continue
-            # optional filters
+            gt = ev["game_type"].fillna("R") if "game_type" in ev.columns else pd.Series("R", index=ev.index)
+            ev = ev[gt.eq("R") | (gt.isin(_POSTSEASON_TYPES) & include_postseason)]
+            # filters apply to the pitch that ended the PA
+            df = last_pitch_rows(ev)
             if count:
                 keep = {c.strip() for c in count.split(',') if c.strip()}
-                if 'count' in df.columns and keep:
-                    df = df[df['count'].isin(keep)]
-            if pitch_family and 'pitch_family' in df.columns:
-                df = df[df['pitch_family'] == pitch_family]
+                if keep:
+                    df = df[(df['balls'].astype("Int64").astype(str) + "-" + df['strikes'].astype("Int64").astype(str)).isin(keep)]
+            if pitch_family:
+                df = _add_pitch_family(df)
+                df = df[df['pitch_family'] == pitch_family.strip().lower()]
             if pitch_type and 'pitch_type' in df.columns:
-                df = df[df['pitch_type'] == pitch_type]
+                df = df[(df['pitch_type'] == pitch_type) | (df['pitch_name'].str.lower() == pitch_type.strip().lower())]
             if zone and 'zone' in df.columns:
-                df = df[df['zone'] == zone]
+                df = df[df['zone'] == pd.to_numeric(zone, errors="coerce")]
             if df.empty:
                 continue
             # aggregate to season
-            agg_spec = {c:'sum' for c in ['PA','AB','H','2B','3B','HR','BB','K','HBP','SF']}
-            g = df.agg(agg_spec).to_frame().T
+            g = pd.DataFrame([_pa_counts(df)])
             g['season'] = y
             g['batter'] = bid
             g = _compute_batter_metrics(g)
             if int(g['PA'].iloc[0]) >= int(min_pa):
                 frames.append(g)
         if not frames:
-            return {"data":[]}
+            return arrowio.respond(accept, format, pd.DataFrame(), {"data": []})
         out = pd.concat(frames, ignore_index=True)
         if group_by == 'season':
-            return {"data": out.to_dict(orient='records')}
+            return arrowio.respond(accept, format, out, {"data": Frame(out, orient)})
         # total across seasons
         tot = out.select_dtypes(include='number').sum(numeric_only=True).to_frame().T
         tot['season'] = 'total'
         tot['batter'] = bid
         tot = _compute_batter_metrics(tot)
-        return {"data": tot.to_dict(orient='records')}
+        return arrowio.respond(accept, format, tot, {"data": Frame(tot, orient)})
+    except HTTPException:
+        raise
     except Exception as e:
         from fastapi import HTTPException
         raise HTTPException(status_code=500, detail=str(e))
 
+
+
+@app.get("/export/pitches")
+def export_pitches(
+    player_id: int,
+    kind: Literal["batter","pitcher"] = "batter",
+    seasons: str = Query(..., description="Comma sep years, e.g. 2019,2021,2025"),
+    format: Optional[ExportFormat] = Query(None, description="arrow | parquet | ndjson (default: Accept header, else arrow)"),
+    accept: Optional[str] = Header(None),
+):
+    """Every stored pitch for a player's seasons, streamed from the store one record batch at a time."""
+    from backend.api import arrowio
+    fmt = arrowio.negotiate(accept, format, offered=("arrow", "parquet", "ndjson"))
+    try:
+        years = sorted({int(x) for x in seasons.split(',') if x.strip()})
+    except ValueError:
+        raise HTTPException(status_code=422, detail=f"seasons must be comma sep years, got {seasons!r}")
+    # the season windows the hitter/pitcher routes read, so an export reuses their partitions
+    paths = [partition_path(kind, player_id, *season_window(y)) for y in years]
+    return arrowio.stream_partitions(paths, fmt, meta={"kind": kind, "player_id": player_id, "seasons": years})
+
+
+def _pitch_filter(start: dt.date, end: dt.date, include_postseason: bool, pitch_types: Optional[set]):
+    """Row mask over a store record batch: date window, game types, pitch types."""
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    types = ["R"] + (sorted(_POSTSEASON_TYPES) if include_postseason else [])
+
+    def col(batch, name, typ):
+        i = batch.schema.get_field_index(name)
+        return batch.column(i).cast(typ) if i >= 0 else pa.nulls(batch.num_rows, typ)
+
+    def keep(batch):
+        d = col(batch, "game_date", pa.date32())
+        m = pc.and_(pc.greater_equal(d, pa.scalar(start, pa.date32())), pc.less_equal(d, pa.scalar(end, pa.date32())))
+        m = pc.and_(m, pc.is_in(pc.fill_null(col(batch, "game_type", pa.string()), "R"), pa.array(types)))
+        if pitch_types:
+            m = pc.and_(m, pc.is_in(col(batch, "pitch_type", pa.string()), pa.array(sorted(pitch_types))))
+        return pc.fill_null(m, False)
+    return keep
+
+def _stream_pitches(kind: str, player_id: int, start: Optional[dt.date], end: Optional[dt.date],
+                    columns: Optional[str], pitch_type: Optional[str], include_postseason: bool,
+                    chunk_rows: int, fmt: str):
+    from backend.api import arrowio
+    today = dt.date.today()
+    start = start or dt.date(today.year, 1, 1)
+    end = end or today
+    if end < start:
+        raise HTTPException(status_code=422, detail="end is before start")
+    cols = [c.strip() for c in columns.split(",") if c.strip()] if columns else None
+    # whole-season partitions (season_window); the date range is a row filter
+    try:
+        paths = [partition_path(kind, player_id, *season_window(y)) for y in range(start.year, end.year + 1)]
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"on-demand compute failed: {e}")
+    if cols:
+        unknown = sorted(set(cols) - set(arrowio.partition_schema(paths).names))
+        if unknown:
+            raise HTTPException(status_code=422, detail=f"unknown columns {unknown}")
+    types = {t.strip().upper() for t in pitch_type.split(",") if t.strip()} if pitch_type else None
+    return arrowio.stream_partitions(
+        paths, fmt, columns=cols, batch_rows=chunk_rows,
+        where=_pitch_filter(start, end, include_postseason, types), needs=("game_date", "game_type", "pitch_type"),
+        meta={"kind": kind, "player_id": player_id, "start": start.isoformat(), "end": end.isoformat()},
+    )
+
+_PITCHES_DOC = dict(
+    start=Query(None, description="first game date (default: Jan 1 of this year)"),
+    end=Query(None, description="last game date (default: today)"),
+    columns=Query(None, description="comma sep Statcast columns (default: all)"),
+    pitch_type=Query(None, description="comma sep pitch type codes, e.g. FF,SL"),
+    chunk_rows=Query(5_000, ge=1, le=BATCH_ROWS, description="max rows per streamed chunk"),
+    format=Query(None, description="ndjson | arrow | parquet (default: Accept header, else ndjson)"),
+)
+
+@app.get("/hitters/{bid}/pitches")
+def hitter_pitches(
+    bid: int,
+    start: Optional[dt.date] = _PITCHES_DOC["start"],
+    end: Optional[dt.date] = _PITCHES_DOC["end"],
+    columns: Optional[str] = _PITCHES_DOC["columns"],
+    pitch_type: Optional[str] = _PITCHES_DOC["pitch_type"],
+    include_postseason: bool = False,
+    chunk_rows: int = _PITCHES_DOC["chunk_rows"],
+    format: Optional[ExportFormat] = _PITCHES_DOC["format"],
+    accept: Optional[str] = Header(None),
+):
+    """Pitches seen by a hitter in [start, end], streamed from the store (NDJSON by default)."""
+    from backend.api import arrowio
+    fmt = arrowio.negotiate(accept, format, offered=("ndjson", "arrow", "parquet"))
+    return _stream_pitches("batter", bid, start, end, columns, pitch_type, include_postseason, chunk_rows, fmt)
+
+@app.get("/pitchers/{pid}/pitches")
+def pitcher_pitches(
+    pid: int,
+    start: Optional[dt.date] = _PITCHES_DOC["start"],
+    end: Optional[dt.date] = _PITCHES_DOC["end"],
+    columns: Optional[str] = _PITCHES_DOC["columns"],
+    pitch_type: Optional[str] = _PITCHES_DOC["pitch_type"],
+    include_postseason: bool = False,
+    chunk_rows: int = _PITCHES_DOC["chunk_rows"],
+    format: Optional[ExportFormat] = _PITCHES_DOC["format"],
+    accept: Optional[str] = Header(None),
+):
+    """Pitches thrown by a pitcher in [start, end], streamed from the store (NDJSON by default)."""
+    from backend.api import arrowio
+    fmt = arrowio.negotiate(accept, format, offered=("ndjson", "arrow", "parquet"))
+    return _stream_pitches("pitcher", pid, start, end, columns, pitch_type, include_postseason, chunk_rows, fmt)
+
+
+def _rolling(kind: str, player_id: int, seasons: Optional[str], window: int, unit: str, latest: bool,
+             orient: str, format: Optional[str], accept: Optional[str]):
+    from backend.analytics import rolling
+    from backend.api import arrowio
+    from backend.api.fastjson import Frame
+    try:
+        years = [int(x) for x in seasons.split(',') if x.strip()] if seasons else [dt.date.today().year]
+    except ValueError:
+        raise HTTPException(status_code=422, detail=f"seasons must be comma sep years, got {seasons!r}")
+    try:
+        log = rolling.player_game_log(kind, player_id, years)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"on-demand compute failed: {e}")
+    if latest:
+        out = rolling.window_totals(log, **{f"last_{unit}": window})
+    else:
+        out = rolling.rolling_series(log, window, unit)
+    payload = {kind: player_id, "seasons": years, "window": window, "unit": unit, "data": Frame(out, orient)}
+    return arrowio.respond(accept, format, out, payload)
+
+_ROLLING_DOC = dict(
+    seasons=Query(None, description="Comma sep years (default: this year); windows run across season boundaries"),
+    window=Query(15, ge=1, le=366, description="trailing window size, in `unit`"),
+    latest=Query(False, description="only the window ending at the latest game, instead of one row per game"),
+)
+
+@app.get("/hitters/{bid}/rolling")
+def hitter_rolling(
+    bid: int,
+    seasons: Optional[str] = _ROLLING_DOC["seasons"],
+    window: int = _ROLLING_DOC["window"],
+    unit: Literal["games", "days"] = "games",   # rolling.Unit
+    latest: bool = _ROLLING_DOC["latest"],
+    orient: Orient = Query("columns", description="records | columns (compact {col: [values]})"),
+    format: Optional[Format] = Query(None, description="json | arrow | parquet (default: Accept header, else json)"),
+    accept: Optional[str] = Header(None),
+):
+    """Trailing last-N-games / last-N-days lines as of every game (sparklines), or just the latest window."""
+    return _rolling("batter", bid, seasons, window, unit, latest, orient, format, accept)
+
+@app.get("/pitchers/{pid}/rolling")
+def pitcher_rolling(
+    pid: int,
+    seasons: Optional[str] = _ROLLING_DOC["seasons"],
+    window: int = _ROLLING_DOC["window"],
+    unit: Literal["games", "days"] = "games",   # rolling.Unit
+    latest: bool = _ROLLING_DOC["latest"],
+    orient: Orient = Query("columns", description="records | columns (compact {col: [values]})"),
+    format: Optional[Format] = Query(None, description="json | arrow | parquet (default: Accept header, else json)"),
+    accept: Optional[str] = Header(None),
+):
+    """Same as /hitters/{bid}/rolling, for the batters a pitcher faced (rates are against)."""
+    return _rolling("pitcher", pid, seasons, window, unit, latest, orient, format, accept)
+
+
+@app.get("/pitchers/{pid}/sequences")
+def pitcher_sequences(
+    pid: int,
+    season: int,
+    stand: Optional[Literal["L","R"]] = Query(None, description="batter hand (default: both)"),
+    count: Optional[str] = Query(None, description="comma sep counts the next pitch was thrown in, e.g. 0-2,1-2"),
+    by: Optional[str] = Query(None, description="comma sep conditions kept as columns: stand,count"),
+    shape: Literal["long","matrix"] = Query("long", description="long: one row per transition | matrix: prev x next counts"),
+    orient: Orient = Query("records", description="records | columns (compact {col: [values]})"),
+    format: Optional[Format] = Query(None, description="json | arrow | parquet (default: Accept header, else json)"),
+    accept: Optional[str] = Header(None),
+):
+    """Pitch-type transition counts and P(next | prev) for a pitcher's regular season; prev=START is the first pitch of a PA."""
+    from backend.analytics import sequences
+    from backend.api import arrowio
+    from backend.api.fastjson import Frame
+    keep = tuple(k for k in ("stand", "count") if k in {x.strip() for x in (by or "").split(",")})
+    try:
+        t = sequences.pitcher_transitions(pid, season)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"on-demand compute failed: {e}")
+    counts = count.split(",") if count else None
+    if shape == "matrix":
+        m = sequences.matrix(t, stand, counts)
+        out = pd.DataFrame(m, index=sequences.PITCH_TYPES + [sequences.START], columns=sequences.PITCH_TYPES)
+        out = out.loc[out.sum(axis=1) > 0, out.sum(axis=0) > 0].rename_axis("prev").reset_index()
+    else:
+        out = sequences.probabilities(t, stand, counts, by=keep).drop(columns="pitcher")
+    payload = {"pitcher": pid, "season": season, "stand": stand, "count": counts, "shape": shape, "data": Frame(out, orient)}
+    return arrowio.respond(accept, format, out, payload)
+
+
+_MATCHUP_COLS = ["batter","game_pk","at_bat_number","pitch_number","game_type","p_throws","stand","pitch_name",
+                 "description","type","launch_speed","events","estimated_woba_using_speedangle"]
+
+@app.get("/matchup")
+def matchup_lineup(
+    pitcher: int,
+    batters: str = Query(..., description="Comma sep batter ids, e.g. a lineup"),
+    season: Optional[int] = Query(None, description="default: this year"),
+    orient: Orient = Query("records", description="records | columns (compact {col: [values]})"),
+    format: Optional[Format] = Query(None, description="json | arrow | parquet (default: Accept header, else json)"),
+    accept: Optional[str] = Header(None),
+):
+    """A lineup against one pitcher: his mix by batter hand and each hitter's mix-weighted expected line, in one call."""
+    from backend.analytics import matchup
+    from backend.api import arrowio
+    from backend.api.fastjson import Frame
+    from concurrent.futures import ThreadPoolExecutor
+    try:
+        ids = list(dict.fromkeys(int(x) for x in batters.split(",") if x.strip()))
+    except ValueError:
+        raise HTTPException(status_code=422, detail=f"batters must be comma sep ids, got {batters!r}")
+    if not ids:
+        raise HTTPException(status_code=422, detail="batters is empty")
+    season = season or dt.date.today().year
+    start, end = season_window(season)
+
+    def hitter(bid: int) -> pd.DataFrame:
+        df = fetch_hitter_statcast(bid, start, end)
+        return df[[c for c in _MATCHUP_COLS if c in df.columns]].assign(batter=bid)
+
+    try:
+        pitches = fetch_pitcher_statcast(int(pitcher), start, end)
+        # store hits are cheap; misses still start one per SAVANT_API_RPS slot (fetch.SAVANT_RATE_LIMITER)
+        with ThreadPoolExecutor(max_workers=4, thread_name_prefix="matchup") as pool:
+            frames = list(pool.map(hitter, ids))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"on-demand compute failed: {e}")
+
+    hand = matchup.throws(pitches)
+    mix = matchup.pitch_mix(pitches)
+    counts, stand = matchup.hitter_counts(pd.concat(frames, ignore_index=True), ids, hand)
+    data, by_family = matchup.expected(mix, counts, stand, ids)
+    name = str(pitches["player_name"].dropna().iloc[0]) if "player_name" in pitches.columns and pitches["player_name"].notna().any() else None
+    payload = {
+        "pitcher": int(pitcher), "player_name": name, "throws": hand, "season": season,
+        "mix": Frame(mix, orient), "by_family": Frame(by_family, orient), "data": Frame(data, orient),
+    }
+    return arrowio.respond(accept, format, data, payload)
+
+
+def _pitcher_frame(pid: int, season: int, include_postseason: bool) -> pd.DataFrame:
+    # the season_window partition; every pitcher route shares it
+    from backend.analytics import pitching
+    try:
+        df = fetch_pitcher_statcast(int(pid), *season_window(season))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"on-demand compute failed: {e}")
+    return pitching.game_types(df, include_postseason)
+
+@app.get("/pitchers/{pid}/arsenal")
+def pitcher_arsenal(
+    pid: int,
+    season: int,
+    by_stand: bool = Query(False, description="one row per (batter hand, pitch type)"),
+    include_postseason: bool = False,
+    orient: Orient = Query("records", description="records | columns (compact {col: [values]})"),
+    format: Optional[Format] = Query(None, description="json | arrow | parquet (default: Accept header, else json)"),
+    accept: Optional[str] = Header(None),
+):
+    """Usage, velo, spin, movement and zone/swing/whiff/CSW rates per pitch type."""
+    from backend.analytics import pitching
+    from backend.api import arrowio
+    from backend.api.fastjson import Frame
+    out = pitching.arsenal(_pitcher_frame(pid, season, include_postseason), by_stand=by_stand)
+    return arrowio.respond(accept, format, out, {"pid": pid, "season": season, "data": Frame(out, orient)})
+
+@app.get("/pitchers/{pid}/splits")
+def pitcher_splits(
+    pid: int,
+    season: int,
+    split: Literal["stand", "count", "pitch_family", "pitch_type"] = "stand",   # pitching.Split
+    include_postseason: bool = False,
+    orient: Orient = Query("records", description="records | columns (compact {col: [values]})"),
+    format: Optional[Format] = Query(None, description="json | arrow | parquet (default: Accept header, else json)"),
+    accept: Optional[str] = Header(None),
+):
+    """Line against (AVG/OBP/SLG/K%/BB%/xwOBA) plus pitch count and whiff% per batter hand, count or pitch."""
+    from backend.analytics import pitching
+    from backend.api import arrowio
+    from backend.api.fastjson import Frame
+    out = pitching.splits(_pitcher_frame(pid, season, include_postseason), split)
+    return arrowio.respond(accept, format, out, {"pid": pid, "season": season, "split": split, "data": Frame(out, orient)})
+
+@app.get("/pitchers/{pid}/heatmap")
+def pitcher_heatmap(
+    pid: int,
+    season: int,
+    pitch_family: Optional[str] = Query(None),
+    pitch_type: Optional[str] = Query(None),
+    stand: Optional[Literal["L","R"]] = Query(None, description="batter hand (default: both)"),
+    include_postseason: bool = False,
+) -> Dict[str, Any]:
+    """9x9 location counts, the same grid (and filters) as /hitters/{bid}/heatmap."""
+    df = _pitcher_frame(pid, season, include_postseason)
+    if stand:
+        df = df[df["stand"] == stand] if "stand" in df.columns else df.iloc[:0]
+    grid = _heatmap_grid(df, pitch_family, pitch_type, include_postseason)
+    return {"pid": pid, "season": season, "stand": stand, "grid": grid}
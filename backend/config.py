@@ -12,12 +12,14 @@ CACHE_DIR = Path(os.getenv("SEQUENCE_BIOLAB_CACHE_DIR", DATA_DIR / "cache")).res
 RAW_DIR = CACHE_DIR / "raw"
 META_DIR = DATA_DIR / "_meta"
 PROCESSED_DIR = DATA_DIR / "processed"
+STAGING_DIR = DATA_DIR / "staging"
 REPORTS_DIR = DATA_DIR / "reports"
 def ensure_dirs() -> None:
-    for p in [DATA_DIR, CACHE_DIR, RAW_DIR, META_DIR, PROCESSED_DIR, REPORTS_DIR]:
+    for p in [DATA_DIR, CACHE_DIR, RAW_DIR, META_DIR, PROCESSED_DIR, STAGING_DIR, REPORTS_DIR]:
         Path(p).mkdir(parents=True, exist_ok=True)
 WATERMARKS_PATH = META_DIR / "watermarks.json"
 FRESHNESS_PATH = META_DIR / "data_freshness.json"
+PUBLISH_LOG_PATH = META_DIR / "publish_log.json"
 def read_json(path: Path, default):
     try:
         return json.loads(Path(path).read_text())
@@ -2,8 +2,9 @@ from __future__ import annotations
 import datetime as dt
 import pandas as pd
 from pathlib import Path
-from backend.sequence_src.scrape_savant import fetch_batter_statcast, lookup_batter_id
-from .config import ensure_dirs, PROCESSED_DIR, WATERMARKS_PATH, FRESHNESS_PATH, read_json, write_json
+from backend.sequence_src.scrape_savant import fetch_batter_statcast, lookup_batter_id, last_pitch_rows, season_window
+from .publish import publish
+from .config import ensure_dirs, STAGING_DIR, WATERMARKS_PATH, FRESHNESS_PATH, read_json, write_json
 
 def _today_str(): return dt.date.today().isoformat()
 def _default_since(days=3): return (dt.date.today() - dt.timedelta(days=days)).isoformat()
@@ -18,12 +19,8 @@ def _normalize_hitters(df: pd.DataFrame) -> pd.DataFrame:
     if df.empty:
         return pd.DataFrame(columns=["batter","player_name","season","PA","AB","H","BB","HBP","SF","TB","AVG","OBP","SLG"])
     use_cols = ["batter","player_name","game_date","events","pitch_number","at_bat_number","game_pk"]
-    df = df[use_cols].copy()
-    df["season"] = pd.to_datetime(df["game_date"]).dt.year
-    last = (
-        df.sort_values(["game_pk","at_bat_number","pitch_number"])
-          .drop_duplicates(["game_pk","at_bat_number","batter"], keep="last")
-    )
+    last = last_pitch_rows(df)[use_cols].copy()
+    last["season"] = pd.to_datetime(last["game_date"]).dt.year
     ev = last["events"].astype(str).str.lower()
     tb_map = {"single":1,"double":2,"triple":3,"home_run":4}
     is_bb   = ev.isin({"walk","intent_walk"})
@@ -61,7 +58,7 @@ def run(mode: str="incremental", season: int|None=None) -> Path:
     wm = _load_watermarks()
     if mode=="full":
         if season is None: raise SystemExit("--season required for full")
-        start_dt, end_dt = f"{season}-03-01", f"{season}-10-31"
+        start_dt, end_dt = season_window(season)
     elif mode in ("incremental","auto"):
         start_dt, end_dt = wm.get("statcast_since", _default_since(3)), _today_str()
     else:
@@ -76,9 +73,12 @@ def run(mode: str="incremental", season: int|None=None) -> Path:
     if 'game_type' in df.columns:
         df = df[df['game_type'].astype(str).str.upper().eq('R')].copy()
     hitters = _normalize_hitters(df)
-    out_csv = PROCESSED_DIR / "hitters_season.csv"
+    # staged, then validated and renamed into processed/; a failed validation raises
+    # SystemExit before the watermark moves, so the next run re-fetches this window
+    out_csv = STAGING_DIR / "hitters_season.csv"
     hitters.to_csv(out_csv, index=False)
+    published = publish(out_csv)
     wm["statcast_since"] = end_dt
     _save_watermarks(wm)
     _mark_fresh("hitters_season")
-    return out_csv
+    return published
@@ -0,0 +1,93 @@
+"""
+Validate the hitters table and publish it into processed/.
+
+etl.run() stages hitters_season.csv and calls publish(); scripts/validate_and_publish.py
+is the CLI. Failures raise SystemExit("[FAIL] ...") and leave the published table untouched.
+"""
+from __future__ import annotations
+from pathlib import Path
+from typing import Optional
+import datetime as dt, os, shutil
+import numpy as np, pandas as pd
+from backend.config import PROCESSED_DIR, STAGING_DIR, PUBLISH_LOG_PATH, read_json, write_json
+TABLE = "hitters_season.csv"
+REQUIRED = ["batter","player_name","season","PA","AB","H","AVG","OBP","SLG"]
+INT_COLS = ["batter","season","PA","AB","H"]
+RATE_COLS = ["AVG","OBP"]          # must lie in [0, 1]
+MAX_ERRORS = 20
+def fail(msg: str) -> None:
+    raise SystemExit(f"[FAIL] {msg}")
+def _check_chunk(c: pd.DataFrame, offset: int, errors: list) -> np.ndarray:
+    def bad(mask, what):
+        mask = np.asarray(mask, dtype=bool)
+        if mask.any():
+            rows = (np.flatnonzero(mask)[:3] + offset + 2).tolist()  # 1-based incl. header
+            errors.append(f"{what}: {int(mask.sum())} rows (e.g. lines {rows})")
+    num = {}
+    for col in INT_COLS + ["AVG","OBP","SLG"]:
+        num[col] = pd.to_numeric(c[col], errors="coerce")
+        bad(num[col].isna() & c[col].notna(), f"{col} not numeric")
+    for col in INT_COLS:
+        bad(num[col].isna(), f"{col} missing")
+        bad((num[col] % 1).fillna(0) != 0, f"{col} not integer")
+        bad(num[col] < 0, f"{col} negative")
+    for col in RATE_COLS:
+        bad(~num[col].between(0, 1) & num[col].notna(), f"{col} outside [0,1]")
+    bad(~num["SLG"].between(0, 4) & num["SLG"].notna(), "SLG outside [0,4]")
+    # no AVG <= OBP check: sacrifice flies count against OBP only (1-for-1 with a SF is AVG 1.000, OBP .500)
+    bad(num["H"] > num["AB"], "H > AB")
+    bad(num["AB"] > num["PA"], "AB > PA")
+    bad(c["player_name"].isna(), "player_name missing")
+    keys = num["batter"].fillna(-1).astype("int64").to_numpy() * 10_000 + num["season"].fillna(0).astype("int64").to_numpy()
+    return keys
+def validate(path: Path, chunksize: int = 100_000) -> int:
+    header = pd.read_csv(path, nrows=0).columns
+    missing = sorted(set(REQUIRED) - set(header))
+    if missing:
+        fail(f"Missing required columns: {missing}")
+    errors: list = []
+    keys, rows = [], 0
+    for c in pd.read_csv(path, usecols=REQUIRED, dtype={"player_name": "string"}, chunksize=chunksize):
+        keys.append(_check_chunk(c, rows, errors))
+        rows += len(c)
+        if len(errors) >= MAX_ERRORS:
+            break
+    if rows == 0:
+        fail("No rows in processed table.")
+    k = np.concatenate(keys)
+    uniq, counts = np.unique(k, return_counts=True)
+    if (counts > 1).any():
+        dup = uniq[counts > 1][:3]
+        errors.append(f"duplicate (batter, season): {int((counts > 1).sum())} keys (e.g. {[(int(x // 10_000), int(x % 10_000)) for x in dup]})")
+    if errors:
+        fail("; ".join(errors[:MAX_ERRORS]))
+    return rows
+def publish(path: Optional[Path] = None, chunksize: int = 100_000, max_drop: float = 0.10, dry_run: bool = False) -> Path:
+    """
+    Validate `path` (default: the staged table, else the published one) and publish it.
+    The staged table is moved into processed/; any other input is copied, never moved.
+    """
+    staged, published = STAGING_DIR / TABLE, PROCESSED_DIR / TABLE
+    path = Path(path) if path else (staged if staged.exists() else published)
+    if not path.exists():
+        fail(f"Missing processed file: {path}")
+    rows = validate(path, chunksize)
+    log = read_json(PUBLISH_LOG_PATH, {})
+    prev = log.get(TABLE, {}).get("rows")
+    if prev and rows < prev * (1 - max_drop):
+        fail(f"Row count dropped {prev} -> {rows} (more than {max_drop:.0%}) since last publish.")
+    delta = f" ({rows - prev:+d} vs last publish)" if prev else ""
+    if path.resolve() == published.resolve() or dry_run:
+        print(f"[OK] {rows} rows{delta}; validations passed.")
+        return path
+    published.parent.mkdir(parents=True, exist_ok=True)
+    if path.resolve() == staged.resolve():
+        os.replace(path, published)   # atomic on one filesystem: readers see old or new, never partial
+    else:
+        tmp = published.with_name(f"{TABLE}.{os.getpid()}.tmp")
+        shutil.copy2(path, tmp)
+        os.replace(tmp, published)
+    log[TABLE] = {"rows": rows, "published_at": dt.datetime.utcnow().isoformat()+"Z", "source": str(path)}
+    write_json(PUBLISH_LOG_PATH, log)
+    print(f"[OK] {rows} rows{delta}; validations passed; published {published}")
+    return published
@@ -1,30 +1,39 @@
 from __future__ import annotations
+import hashlib, json, os
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 import pandas as pd
 from fpdf import FPDF
-from .config import PROCESSED_DIR, REPORTS_DIR, ensure_dirs
+from .config import PROCESSED_DIR, REPORTS_DIR, ensure_dirs, read_json, write_json
 
-def generate_hitter_pdf(player_id: int, season: int) -> Path:
-    ensure_dirs()
+# Bump when the PDF layout changes so every cached report is re-rendered.
+REPORT_TEMPLATE_VERSION = 1
+MANIFEST_PATH = REPORTS_DIR / "_manifest.json"
+
+def _load_table() -> pd.DataFrame:
     csv_path = PROCESSED_DIR / "hitters_season.csv"
     if not csv_path.exists():
         raise FileNotFoundError(f"Processed file not found: {csv_path}")
+    return pd.read_csv(csv_path)
 
-    df = pd.read_csv(csv_path)
+def _report_row(df: pd.DataFrame, player_id: int, season: int) -> dict | None:
     row = df[(df["batter"]==player_id) & (df["season"]==season)]
-    pdf_path = REPORTS_DIR / f"hitter_{player_id}_{season}.pdf"
+    return None if row.empty else row.iloc[0].to_dict()
 
+def _pdf_path(player_id: int, season: int) -> Path:
+    return REPORTS_DIR / f"hitter_{player_id}_{season}.pdf"
+
+def _render_pdf(player_id: int, season: int, r: dict | None, pdf_path: Path) -> Path:
     pdf = FPDF()
     pdf.add_page()
     pdf.set_font("Helvetica", size=18)
     pdf.cell(0, 12, f"Hitter Report - {player_id} ({season})".encode('latin-1','replace').decode('latin-1'), ln=1)
     pdf.set_font("Helvetica", size=12)
 
-    if row.empty:
+    if r is None:
         pdf.set_text_color(200,0,0)
         pdf.cell(0, 10, "No data found in hitters_season.csv for this player/season.".encode('latin-1','replace').decode('latin-1'), ln=1)
     else:
-        r = row.iloc[0].to_dict()
         lines = [
             f"Player: {r.get('player_name','N/A')}  (MLBAM: {int(r['batter'])})",
             f"Season: {int(r['season'])}",
@@ -36,3 +45,45 @@ def generate_hitter_pdf(player_id: int, season: int) -> Path:
 
     pdf.output(str(pdf_path))
     return pdf_path
+
+def _input_hash(player_id: int, season: int, r: dict | None) -> str:
+    payload = json.dumps([REPORT_TEMPLATE_VERSION, player_id, season, r], sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+def generate_hitter_pdf(player_id: int, season: int) -> Path:
+    ensure_dirs()
+    r = _report_row(_load_table(), player_id, season)
+    return _render_pdf(player_id, season, r, _pdf_path(player_id, season))
+
+def generate_hitter_pdfs(player_ids: list[int], season: int, workers: int | None = None, force: bool = False) -> dict:
+    """
+    Render a pack of hitter reports. hitters_season.csv is read once, rows are
+    handed to a process pool, and a report whose inputs hash the same as at its
+    last render (tracked in reports/_manifest.json) is skipped unless `force`.
+    Returns {"rendered": [paths], "skipped": [paths]}.
+    """
+    ensure_dirs()
+    df = _load_table()
+    manifest = read_json(MANIFEST_PATH, {})
+    todo, skipped = [], []
+    for pid in dict.fromkeys(int(p) for p in player_ids):
+        r = _report_row(df, pid, season)
+        path = _pdf_path(pid, season)
+        h = _input_hash(pid, season, r)
+        if not force and path.exists() and manifest.get(path.name) == h:
+            skipped.append(path)
+        else:
+            todo.append((pid, r, path, h))
+
+    rendered = []
+    if todo:
+        workers = workers or min(len(todo), os.cpu_count() or 1)
+        try:
+            with ProcessPoolExecutor(max_workers=workers) as ex:
+                futs = [(ex.submit(_render_pdf, pid, season, r, path), path, h) for pid, r, path, h in todo]
+                for fut, path, h in futs:
+                    rendered.append(fut.result())
+                    manifest[path.name] = h
+        finally:
+            write_json(MANIFEST_PATH, manifest)
+    return {"rendered": rendered, "skipped": skipped}
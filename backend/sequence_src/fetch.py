@@ -3,13 +3,19 @@ from __future__ import annotations
 from typing import Optional
 
 import asyncio
+import os
+import threading
 import time
 import random
-from dataclasses import dataclass
+import weakref
+from dataclasses import dataclass, field
 from typing import Any, Dict, Optional, Union
 
 import httpx
 
+from backend.tracing import record, stage
+from .transport import httpx_transport
+
 try:
     # only needed if you call browser_get()
     from playwright.async_api import async_playwright
@@ -28,17 +34,37 @@ DEFAULT_HEADERS = {
 
 @dataclass
 class RateLimiter:
-    """Simple leaky-bucket limiter: ~rps requests/second across awaited tasks."""
+    """
+    Simple leaky-bucket limiter: ~rps requests/second across awaited tasks and
+    threads. Each caller reserves the next free slot under a lock, then sleeps
+    until it, so concurrent waiters never share a slot.
+    """
     rps: float = 3.0
     _t: float = 0.0
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False, compare=False)
 
-    async def wait(self) -> None:
+    def _reserve(self) -> float:
         period = 1.0 / max(self.rps, 0.0001)
-        now = time.time()
-        sleep = max(0.0, self._t + period - now)
+        with self._lock:
+            now = time.time()
+            self._t = max(now, self._t + period)
+            return self._t - now
+
+    async def wait(self) -> None:
+        sleep = self._reserve()
         if sleep:
             await asyncio.sleep(sleep)
-        self._t = time.time()
+
+    def acquire(self) -> None:
+        """Blocking wait(), for sync callers on worker threads."""
+        sleep = self._reserve()
+        if sleep:
+            time.sleep(sleep)
+
+# Savant fetches into the store. On-demand API misses and the background prefetcher
+# draw on separate budgets, so a request never queues behind a prefetch backlog.
+SAVANT_RATE_LIMITER = RateLimiter(rps=float(os.getenv("SAVANT_API_RPS", "10.0")))
+PREFETCH_RATE_LIMITER = RateLimiter(rps=float(os.getenv("SAVANT_RPS", "1.0")))
 
 class FetchError(RuntimeError):
     pass
@@ -60,31 +86,34 @@ async def _request(
     if headers:
         h.update(headers)
 
-    async with httpx.AsyncClient(timeout=timeout, follow_redirects=follow_redirects, headers=h) as s:
-        # manual retry loop with jitter
-        for attempt in range(5):
-            try:
-                resp = await s.request(method.upper(), url, params=params)
-                # retry on server throttling / transient errors
-                if resp.status_code in (429, 500, 502, 503, 504):
-                    # honor Retry-After when present
-                    ra = resp.headers.get("retry-after")
-                    base = float(ra) if ra and ra.isdigit() else (1.0 + attempt * 1.5)
-                    await asyncio.sleep(base + random.random() * 0.4)
-                    continue
-                resp.raise_for_status()
-                return resp
-            except (httpx.TimeoutException, httpx.NetworkError) as e:
-                if attempt == 4:
-                    raise FetchError(f"Network error fetching {url}: {e}") from e
-                await asyncio.sleep(0.6 * (attempt + 1) + random.random() * 0.3)
-            except httpx.HTTPStatusError as e:
-                # non-retryable 4xx
-                if 400 <= e.response.status_code < 500 and e.response.status_code not in (429,):
-                    raise
-                if attempt == 4:
-                    raise
-                await asyncio.sleep(0.8 * (attempt + 1) + random.random() * 0.3)
+    with stage("fetch.request") as sp:
+        async with httpx.AsyncClient(timeout=timeout, follow_redirects=follow_redirects, headers=h,
+                                     transport=httpx_transport()) as s:
+            # manual retry loop with jitter
+            for attempt in range(5):
+                try:
+                    resp = await s.request(method.upper(), url, params=params)
+                    # retry on server throttling / transient errors
+                    if resp.status_code in (429, 500, 502, 503, 504):
+                        # honor Retry-After when present
+                        ra = resp.headers.get("retry-after")
+                        base = float(ra) if ra and ra.isdigit() else (1.0 + attempt * 1.5)
+                        await asyncio.sleep(base + random.random() * 0.4)
+                        continue
+                    resp.raise_for_status()
+                    sp.bytes = len(resp.content)
+                    return resp
+                except (httpx.TimeoutException, httpx.NetworkError) as e:
+                    if attempt == 4:
+                        raise FetchError(f"Network error fetching {url}: {e}") from e
+                    await asyncio.sleep(0.6 * (attempt + 1) + random.random() * 0.3)
+                except httpx.HTTPStatusError as e:
+                    # non-retryable 4xx
+                    if 400 <= e.response.status_code < 500 and e.response.status_code not in (429,):
+                        raise
+                    if attempt == 4:
+                        raise
+                    await asyncio.sleep(0.8 * (attempt + 1) + random.random() * 0.3)
 
 async def get_bytes(
     url: str,
@@ -102,7 +131,9 @@ async def get_bytes(
     if cache:
         cached = cache.get(url, params)
         if cached is not None:
+            record("fetch.cache", 0.0, nbytes=len(cached), cache=True)
             return cached
+        record("fetch.cache", 0.0, cache=False)
 
     resp = await _request("GET", url, params=params, headers=headers, timeout=timeout, rl=rl)
     content = resp.content
@@ -130,6 +161,163 @@ async def get_json(
 
 # ---------- Browser fetch (optional; for JS-rendered pages) ----------
 
+@dataclass
+class _PooledPage:
+    context: Any
+    page: Any
+    last_used: float = 0.0
+
+class BrowserPool:
+    """
+    Warm headless Chromium shared by browser_get() calls on one event loop.
+
+    - at most `size` pages render concurrently (callers queue on a semaphore)
+    - pages (each in its own context) are reused between calls
+    - pages idle for `idle_timeout` are closed, and the browser itself is shut
+      down after `browser_idle_timeout` with nothing in use
+    - a crashed page is discarded and a disconnected browser is relaunched
+      on the next acquire
+    """
+
+    def __init__(self, size: int = 4, idle_timeout: float = 120.0, browser_idle_timeout: float = 600.0) -> None:
+        self.size = max(1, size)
+        self.idle_timeout = idle_timeout
+        self.browser_idle_timeout = browser_idle_timeout
+        self._sem = asyncio.Semaphore(self.size)
+        self._lock = asyncio.Lock()
+        self._idle: list = []
+        self._busy = 0
+        self._pw = None
+        self._browser = None
+        self._last_active = time.time()
+        self._reaper: Optional[asyncio.Task] = None
+        self.launches = 0
+
+    async def _ensure_browser(self) -> Any:
+        async with self._lock:
+            if self._browser is not None and self._browser.is_connected():
+                return self._browser
+            # first use, or Chromium died: drop stale pages and relaunch
+            self._idle.clear()
+            if self._pw is None:
+                self._pw = await async_playwright().start()
+            self._browser = await self._pw.chromium.launch()
+            self.launches += 1
+            if self._reaper is None or self._reaper.done():
+                self._reaper = asyncio.create_task(self._reap())
+            return self._browser
+
+    async def _acquire(self) -> _PooledPage:
+        browser = await self._ensure_browser()
+        while self._idle:
+            item = self._idle.pop()
+            if not item.page.is_closed():
+                return item
+        context = await browser.new_context(user_agent=DEFAULT_HEADERS["user-agent"])
+        page = await context.new_page()
+        return _PooledPage(context, page)
+
+    async def _discard(self, item: _PooledPage) -> None:
+        try:
+            await item.context.close()
+        except Exception:
+            pass
+
+    async def render(self, url: str, *, wait_selector: Optional[str] = None, timeout: float = 30_000) -> str:
+        async with self._sem:
+            self._busy += 1
+            try:
+                for attempt in range(2):
+                    item = await self._acquire()
+                    try:
+                        await item.page.goto(url, wait_until="domcontentloaded", timeout=timeout)
+                        if wait_selector:
+                            try:
+                                await item.page.wait_for_selector(wait_selector, timeout=10_000)
+                            except Exception:
+                                # continue anyway; caller can validate HTML
+                                pass
+                        html = await item.page.content()
+                    except Exception:
+                        # page crash / browser gone: throw this page away, retry once on a fresh one
+                        await self._discard(item)
+                        if attempt == 1:
+                            raise
+                        continue
+                    item.last_used = time.time()
+                    self._idle.append(item)
+                    return html
+            finally:
+                self._busy -= 1
+                self._last_active = time.time()
+
+    async def _reap(self) -> None:
+        try:
+            while self._browser is not None:
+                await asyncio.sleep(min(self.idle_timeout, 30.0))
+                now = time.time()
+                stale = [i for i in self._idle if now - i.last_used > self.idle_timeout]
+                self._idle = [i for i in self._idle if i not in stale]
+                for item in stale:
+                    await self._discard(item)
+                if not self._busy and not self._idle and now - self._last_active > self.browser_idle_timeout:
+                    await self.close()
+        except asyncio.CancelledError:
+            # the loop is shutting down (asyncio.run cancels every task) or close() ran
+            await self._stop_driver()
+            raise
+
+    async def _stop_driver(self) -> None:
+        # Playwright's reader task is cancelled alongside us, so a graceful
+        # browser.close() would never get its reply; stopping the driver is
+        # enough, Chromium exits with it
+        pw, self._pw, self._browser = self._pw, None, None
+        self._idle.clear()
+        loop = asyncio.get_running_loop()
+        if _BROWSER_POOLS.get(loop) is self:
+            del _BROWSER_POOLS[loop]
+        if pw is not None:
+            try:
+                await asyncio.wait_for(pw.stop(), 5.0)
+            except Exception:
+                pass
+
+    async def close(self) -> None:
+        async with self._lock:
+            for item in self._idle:
+                await self._discard(item)
+            self._idle.clear()
+            if self._browser is not None:
+                try:
+                    await self._browser.close()
+                except Exception:
+                    pass
+            if self._pw is not None:
+                await self._pw.stop()
+            self._browser = self._pw = None
+        if self._reaper is not None and self._reaper is not asyncio.current_task():
+            self._reaper.cancel()
+
+# weak keys: a loop that asyncio.run() has closed must not be kept alive by its pool
+_BROWSER_POOLS: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, BrowserPool]" = weakref.WeakKeyDictionary()
+
+def get_browser_pool(**kwargs) -> BrowserPool:
+    """
+    The pool for the running event loop (Playwright objects are loop-bound).
+    It is shut down with its loop; aclose_browser_pool() does it earlier.
+    """
+    loop = asyncio.get_running_loop()
+    pool = _BROWSER_POOLS.get(loop)
+    if pool is None:
+        pool = _BROWSER_POOLS[loop] = BrowserPool(**kwargs)
+    return pool
+
+async def aclose_browser_pool() -> None:
+    """Close and forget the running loop's pool, if it has one."""
+    pool = _BROWSER_POOLS.pop(asyncio.get_running_loop(), None)
+    if pool is not None:
+        await pool.close()
+
 async def browser_get(
     url: str,
     *,
@@ -138,9 +326,11 @@ async def browser_get(
     cache_ttl: Optional[float] = 60 * 60 * 6,
     wait_selector: Optional[str] = None,
     rl: Optional[RateLimiter] = None,
+    pool: Optional[BrowserPool] = None,
 ) -> str:
     """
     Render a page with headless Chromium and return page HTML.
+    Pages come from a warm BrowserPool, so Chromium launches once per process.
     Only import/playwright if you actually use this.
     """
     if not _HAS_PLAYWRIGHT:
@@ -159,18 +349,7 @@ async def browser_get(
     if rl:
         await rl.wait()
 
-    async with async_playwright() as p:
-        browser = await p.chromium.launch()
-        page = await browser.new_page()
-        await page.goto(url, wait_until="domcontentloaded")
-        if wait_selector:
-            try:
-                await page.wait_for_selector(wait_selector, timeout=10_000)
-            except Exception:
-                # continue anyway; caller can validate HTML
-                pass
-        html = await page.content()
-        await browser.close()
+    html = await (pool or get_browser_pool()).render(url, wait_selector=wait_selector)
 
     if cache:
         cache.put(url, None, html.encode("utf-8"), ttl=cache_ttl or 0)
@@ -184,5 +363,17 @@ def get_bytes_sync(*args, **kwargs) -> bytes:
 def get_json_sync(*args, **kwargs) -> Any:
     return asyncio.run(get_json(*args, **kwargs))
 
+_browser_loop: Optional[asyncio.AbstractEventLoop] = None
+_browser_loop_lock = threading.Lock()
+
+def _browser_loop_thread() -> asyncio.AbstractEventLoop:
+    # one long-lived loop so sync callers share the same warm BrowserPool
+    global _browser_loop
+    with _browser_loop_lock:
+        if _browser_loop is None:
+            _browser_loop = asyncio.new_event_loop()
+            threading.Thread(target=_browser_loop.run_forever, name="browser-pool", daemon=True).start()
+    return _browser_loop
+
 def browser_get_sync(*args, **kwargs) -> str:
-    return asyncio.run(browser_get(*args, **kwargs))
+    return asyncio.run_coroutine_threadsafe(browser_get(*args, **kwargs), _browser_loop_thread()).result()
@@ -1,9 +1,17 @@
 # src/next_opponent.py
 from __future__ import annotations
 
+import threading
+import time
 from datetime import datetime, timedelta, timezone
 from typing import Dict, List, Optional, Any
-import statsapi  # pip install MLB-StatsAPI
+
+from backend.config import CACHE_DIR, read_json, write_json
+from .transport import client
+
+TEAM_INDEX_PATH = CACHE_DIR / "mlb_team_index.json"
+TEAM_INDEX_TTL = 7 * 24 * 3600     # seconds; franchises rarely change
+SCHEDULE_TTL = 10 * 60             # seconds; probables/status change during the day
 
 # ---------- Team index helpers ----------
 
@@ -12,7 +20,7 @@ def _build_team_index() -> Dict[str, int]:
     Build a case-insensitive index mapping common keys (fileCode, abbreviation, names) -> teamId.
     """
     idx: Dict[str, int] = {}
-    teams = statsapi.get('teams', {'sportId': 1})['teams']
+    teams = client("statsapi").get('teams', {'sportId': 1})['teams']
     for t in teams:
         tid = t['id']
         keys = set()
@@ -34,13 +42,77 @@ def _build_team_index() -> Dict[str, int]:
             idx[k] = tid
     return idx
 
-_TEAM_INDEX = _build_team_index()
+_TEAM_INDEX: Optional[Dict[str, int]] = None
+
+def _team_index() -> Dict[str, int]:
+    """
+    Lazily load the team index: memory, then the disk cache, then statsapi.
+    A stale disk copy is still used if statsapi is unreachable.
+    """
+    global _TEAM_INDEX
+    if _TEAM_INDEX is not None:
+        return _TEAM_INDEX
+    cached = read_json(TEAM_INDEX_PATH, {})
+    if cached.get("index") and time.time() - cached.get("built_at", 0) < TEAM_INDEX_TTL:
+        _TEAM_INDEX = cached["index"]
+        return _TEAM_INDEX
+    try:
+        idx = _build_team_index()
+        write_json(TEAM_INDEX_PATH, {"built_at": time.time(), "index": idx})
+    except Exception:
+        if not cached.get("index"):
+            raise
+        idx = cached["index"]
+    _TEAM_INDEX = idx
+    return idx
 
 def _resolve_team_id(team_key: str) -> int:
     k = team_key.strip().upper()
-    if k not in _TEAM_INDEX:
+    idx = _team_index()
+    if k not in idx:
         raise ValueError(f"Unrecognized team key: {team_key!r}")
-    return _TEAM_INDEX[k]
+    return idx[k]
+
+def roster_hitters(team_key) -> List[int]:
+    """MLBAM ids of the non-pitchers on a team's active roster (team id or any index key)."""
+    team_id = team_key if isinstance(team_key, int) else _resolve_team_id(str(team_key))
+    roster = client("statsapi").get('team_roster', {'teamId': team_id}).get('roster', [])
+    return [
+        int(p['person']['id']) for p in roster
+        if p.get('person', {}).get('id') and p.get('position', {}).get('type') != 'Pitcher'
+    ]
+
+# ---------- Schedule cache ----------
+
+_SCHEDULES: Dict[tuple, tuple] = {}
+_SCHEDULE_LOCK = threading.Lock()              # guards _SCHEDULES and _SCHEDULE_FETCHES, never held over a fetch
+_SCHEDULE_FETCHES: Dict[tuple, threading.Lock] = {}
+
+def _cached_schedule(key: tuple) -> Optional[List[Dict[str, Any]]]:
+    with _SCHEDULE_LOCK:
+        hit = _SCHEDULES.get(key)
+    return hit[1] if hit and time.time() - hit[0] < SCHEDULE_TTL else None
+
+def _schedule_range(start_date: str, end_date: str) -> List[Dict[str, Any]]:
+    """
+    League-wide schedule for [start_date, end_date] in a single statsapi call,
+    cached for SCHEDULE_TTL and shared by every team's lookup. Concurrent misses
+    on one range wait for a single fetch; other ranges are not blocked by it.
+    """
+    key = (start_date, end_date)
+    games = _cached_schedule(key)
+    if games is not None:
+        return games
+    with _SCHEDULE_LOCK:
+        fetch_lock = _SCHEDULE_FETCHES.setdefault(key, threading.Lock())
+    with fetch_lock:
+        games = _cached_schedule(key)   # filled while we waited
+        if games is not None:
+            return games
+        games = client("statsapi").schedule(start_date=start_date, end_date=end_date) or []
+        with _SCHEDULE_LOCK:
+            _SCHEDULES[key] = (time.time(), games)
+        return games
 
 # ---------- Core logic ----------
 
@@ -86,54 +158,52 @@ def next_games(team_key: str, days_ahead: int = 7, include_started: bool = False
       }
     """
     team_id = _resolve_team_id(team_key)
-    tz = timezone.utc
-    today = datetime.now(tz).date()
+    today = datetime.now(timezone.utc).date()
+    games = _schedule_range(today.isoformat(), (today + timedelta(days=days_ahead)).isoformat())
+    return _team_games(games, team_id, include_started)
 
+def _team_games(games: List[Dict[str, Any]], team_id: int, include_started: bool) -> List[Dict[str, Any]]:
     results: List[Dict[str, Any]] = []
-    for d in range(days_ahead + 1):
-        q_date = today + timedelta(days=d)
-        day_sched = statsapi.schedule(date=q_date.isoformat(), team=team_id)
-        if not day_sched:
+    # For each game in the window (doubleheaders possible)
+    for g in games:
+        home_id, away_id = g['home_id'], g['away_id']
+        if team_id not in (home_id, away_id):
             continue
-
-        # For each game that day (doubleheaders possible)
-        for g in day_sched:
-            status = g.get('status', '')
-            if not include_started and status in ('Final', 'Game Over'):
-                continue  # skip completed
-
-            # Keep games that are Scheduled/Pre-Game/In Progress/etc.
-            home_id, away_id = g['home_id'], g['away_id']
-            is_home = home_id == team_id
-            opponent_id = away_id if is_home else home_id
-            opponent_name = g['away_name'] if is_home else g['home_name']
-
-            game_datetime = None
-            # statsapi sometimes provides 'game_datetime' as ISO string
-            if g.get('game_datetime'):
-                try:
-                    # normalize to UTC Z-notation if possible
-                    dt = datetime.fromisoformat(g['game_datetime'].replace('Z', '+00:00')).astimezone(timezone.utc)
-                    game_datetime = dt.strftime('%Y-%m-%dT%H:%M:%SZ')
-                except Exception:
-                    game_datetime = None
-
-            results.append({
-                "game_date": q_date.isoformat(),
-                "game_datetime": game_datetime,
-                "game_pk": g.get("game_id") or g.get("game_pk"),
-                "home_id": home_id,
-                "home_name": g.get('home_name'),
-                "away_id": away_id,
-                "away_name": g.get('away_name'),
-                "opponent_id": opponent_id,
-                "opponent_name": opponent_name,
-                "is_home": is_home,
-                "venue": g.get('venue_name'),
-                "series_description": g.get('series_description'),
-                "status": status,
-                "probable_pitchers": _probables_from_game(g, team_id),
-            })
+        status = g.get('status', '')
+        if not include_started and status in ('Final', 'Game Over'):
+            continue  # skip completed
+
+        # Keep games that are Scheduled/Pre-Game/In Progress/etc.
+        is_home = home_id == team_id
+        opponent_id = away_id if is_home else home_id
+        opponent_name = g['away_name'] if is_home else g['home_name']
+
+        game_datetime = None
+        # statsapi sometimes provides 'game_datetime' as ISO string
+        if g.get('game_datetime'):
+            try:
+                # normalize to UTC Z-notation if possible
+                dt = datetime.fromisoformat(g['game_datetime'].replace('Z', '+00:00')).astimezone(timezone.utc)
+                game_datetime = dt.strftime('%Y-%m-%dT%H:%M:%SZ')
+            except Exception:
+                game_datetime = None
+
+        results.append({
+            "game_date": g.get('game_date'),
+            "game_datetime": game_datetime,
+            "game_pk": g.get("game_id") or g.get("game_pk"),
+            "home_id": home_id,
+            "home_name": g.get('home_name'),
+            "away_id": away_id,
+            "away_name": g.get('away_name'),
+            "opponent_id": opponent_id,
+            "opponent_name": opponent_name,
+            "is_home": is_home,
+            "venue": g.get('venue_name'),
+            "series_description": g.get('series_description'),
+            "status": status,
+            "probable_pitchers": _probables_from_game(g, team_id),
+        })
 
     # Sort by datetime (or date as fallback), then by game number (if present)
     def _sort_key(item: Dict[str, Any]):
@@ -149,6 +219,16 @@ def next_games(team_key: str, days_ahead: int = 7, include_started: bool = False
     results.sort(key=_sort_key)
     return results
 
+def next_games_all(days_ahead: int = 7, include_started: bool = False) -> Dict[int, List[Dict[str, Any]]]:
+    """
+    Upcoming games for every team, keyed by teamId, from one cached league-wide
+    schedule query. Same per-game dicts as next_games().
+    """
+    today = datetime.now(timezone.utc).date()
+    games = _schedule_range(today.isoformat(), (today + timedelta(days=days_ahead)).isoformat())
+    team_ids = sorted({g[k] for g in games for k in ('home_id', 'away_id')})
+    return {tid: _team_games(games, tid, include_started) for tid in team_ids}
+
 def next_game_info(team_key: str, days_ahead: int = 7) -> Dict[str, Any]:
     """
     Convenience wrapper: return the earliest upcoming game dict within the window.
@@ -0,0 +1,130 @@
+# src/prefetch.py
+from __future__ import annotations
+
+import asyncio
+import heapq
+import threading
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Optional
+
+from .fetch import PREFETCH_RATE_LIMITER
+from .next_opponent import next_games_all, roster_hitters
+from .scrape_savant import _hash_key, fetch_batter_statcast, fetch_pitcher_statcast, season_window
+
+# ---------- Jobs ----------
+
+@dataclass(order=True)
+class PrefetchJob:
+    """One Statcast partition to warm. Ordered by first pitch, pitchers before hitters."""
+    when: str
+    rank: int
+    kind: str = field(compare=False)           # "pitcher" | "batter"
+    player_id: int = field(compare=False)
+    start: str = field(compare=False)
+    end: str = field(compare=False)
+
+    @property
+    def cached(self) -> bool:
+        return _hash_key(self.kind, self.player_id, self.start, self.end).exists()
+
+def plan_jobs(
+    days_ahead: int = 2,
+    teams: Optional[Iterable[int]] = None,
+    season: Optional[int] = None,
+) -> List[PrefetchJob]:
+    """
+    Jobs for every upcoming game in the window: each opponent probable pitcher and
+    each opposing roster hitter, soonest game first, skipping partitions already on disk.
+    """
+    season = season or datetime.now(timezone.utc).year
+    start, end = season_window(season)   # the partition every route reads
+    by_team = next_games_all(days_ahead=days_ahead)
+    wanted = set(teams) if teams else set(by_team)
+
+    jobs: Dict[tuple, PrefetchJob] = {}
+    rosters: Dict[int, List[int]] = {}
+    for team_id in wanted:
+        for g in by_team.get(team_id, []):
+            when = g.get("game_datetime") or g.get("game_date") or ""
+            for p in g["probable_pitchers"]:
+                k = ("pitcher", p["id"])
+                if k not in jobs or when < jobs[k].when:
+                    jobs[k] = PrefetchJob(when, 0, "pitcher", p["id"], start, end)
+            opp = g["opponent_id"]
+            if opp not in rosters:
+                try:
+                    rosters[opp] = roster_hitters(opp)
+                except Exception:
+                    rosters[opp] = []
+            for bid in rosters[opp]:
+                k = ("batter", bid)
+                if k not in jobs or when < jobs[k].when:
+                    jobs[k] = PrefetchJob(when, 1, "batter", bid, start, end)
+    return sorted(j for j in jobs.values() if not j.cached)
+
+# ---------- Scheduler ----------
+
+class PrefetchScheduler:
+    """
+    Background warmer for the Statcast store. Every `interval` seconds it plans
+    jobs from next_games_all() and fetches them in game-time order with at most
+    `workers` in flight. Its store misses wait on fetch.PREFETCH_RATE_LIMITER,
+    a budget separate from the one on-demand API fetches use.
+    """
+
+    def __init__(
+        self,
+        *,
+        days_ahead: int = 2,
+        teams: Optional[Iterable[int]] = None,
+        interval: float = 30 * 60,
+        workers: int = 2,
+    ) -> None:
+        self.days_ahead = days_ahead
+        self.teams = list(teams) if teams else None
+        self.interval = interval
+        self.workers = max(1, workers)
+        self.stats: Dict[str, Any] = {"runs": 0, "fetched": 0, "failed": 0, "last_run": None}
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    async def _worker(self, heap: List[PrefetchJob]) -> None:
+        while heap and not self._stop.is_set():
+            job = heapq.heappop(heap)
+            if job.cached:
+                continue
+            fetch = fetch_pitcher_statcast if job.kind == "pitcher" else fetch_batter_statcast
+            try:
+                await asyncio.to_thread(fetch, job.player_id, job.start, job.end, limiter=PREFETCH_RATE_LIMITER)
+                self.stats["fetched"] += 1
+            except Exception:
+                self.stats["failed"] += 1
+
+    async def run_once(self) -> Dict[str, Any]:
+        heap = plan_jobs(self.days_ahead, self.teams)
+        heapq.heapify(heap)
+        await asyncio.gather(*(self._worker(heap) for _ in range(self.workers)))
+        self.stats["runs"] += 1
+        self.stats["last_run"] = datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
+        return dict(self.stats)
+
+    def _loop(self) -> None:
+        while not self._stop.is_set():
+            try:
+                asyncio.run(self.run_once())
+            except Exception:
+                pass  # schedule/roster outage: try again next interval
+            self._stop.wait(self.interval)
+
+    def start(self) -> "PrefetchScheduler":
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._loop, name="statcast-prefetch", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout)
@@ -1,42 +1,182 @@
 from __future__ import annotations
 from pathlib import Path
 import hashlib
+import os
+import threading
+import weakref
+import numpy as np
 import pandas as pd
-from pybaseball import statcast_pitcher, statcast_batter
-import statsapi
+
+from backend.config import PROCESSED_DIR
+from backend.sequence_src import transport
+from backend.tracing import stage
 
 CACHE_DIR = Path("build/cache/savant")
-CACHE_DIR.mkdir(parents=True, exist_ok=True)
+
+# Store invariant: every partition is written (and returned) ordered by PA_ORDER
+# with a fresh RangeIndex, so plate appearances are contiguous runs of rows.
+PA_ORDER = ["game_pk", "at_bat_number", "pitch_number"]
+# id(df) -> (PA-end positions, game_pk and at_bat_number at them); the keys are a
+# fingerprint, so a frame sorted or edited in place is not served a stale index
+_PA_INDEX: dict[int, tuple[np.ndarray, np.ndarray, np.ndarray]] = {}
+# called as hook(key, df) whenever a partition is (re)written; derived tables
+# (backend.analytics.rolling game logs) are rebuilt here rather than per query
+INGEST_HOOKS: list = []
 
 def _hash_key(*parts) -> Path:
     h = hashlib.sha256("|".join(map(str, parts)).encode()).hexdigest()
     return CACHE_DIR / f"{h}.parquet"
 
-def fetch_pitcher_statcast(pitcher_id: int, start: str, end: str) -> pd.DataFrame:
-    key = _hash_key("pitcher", pitcher_id, start, end)
-    if key.exists():
-        return pd.read_parquet(key)
-    df = statcast_pitcher(start, end, pitcher_id)
-    if df is None:
-        df = pd.DataFrame()
-    df.to_parquet(key, index=False)
+def _in_pa_order(df: pd.DataFrame) -> bool:
+    if len(df) < 2 or not set(PA_ORDER).issubset(df.columns):
+        return True
+    d = np.diff(df[PA_ORDER].to_numpy(dtype="float64"), axis=0)
+    first = np.where(d[:, 0] != 0, d[:, 0], np.where(d[:, 1] != 0, d[:, 1], d[:, 2]))
+    return bool((first >= 0).all())
+
+def _to_pa_order(df: pd.DataFrame) -> pd.DataFrame:
+    if not _in_pa_order(df):
+        df = df.sort_values(PA_ORDER, kind="mergesort")
+    return df.reset_index(drop=True)
+
+def _pa_boundaries(df: pd.DataFrame) -> np.ndarray:
+    # Last row of each run of equal (game_pk, at_bat_number); O(n), no sort.
+    if df.empty:
+        return np.empty(0, dtype=np.intp)
+    g = df["game_pk"].to_numpy()
+    ab = df["at_bat_number"].to_numpy()
+    end = np.empty(len(df), dtype=bool)
+    end[-1] = True
+    np.not_equal(g[1:], g[:-1], out=end[:-1])
+    end[:-1] |= ab[1:] != ab[:-1]
+    return np.flatnonzero(end)
+
+def _pa_keys(df: pd.DataFrame, pos: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    return df["game_pk"].to_numpy()[pos], df["at_bat_number"].to_numpy()[pos]
+
+def _register_pa_index(df: pd.DataFrame) -> pd.DataFrame:
+    pos = _pa_boundaries(df)
+    _PA_INDEX[id(df)] = (pos, *_pa_keys(df, pos)) if len(pos) else (pos, pos, pos)
+    weakref.finalize(df, _PA_INDEX.pop, id(df), None)
     return df
 
+def pa_index(df: pd.DataFrame) -> np.ndarray:
+    """Row positions of the last pitch of every PA in a store-ordered frame."""
+    hit = _PA_INDEX.get(id(df))
+    if hit is not None and len(hit[0]) and hit[0][-1] == len(df) - 1:
+        pos, g, ab = hit
+        kg, kab = _pa_keys(df, pos)
+        if np.array_equal(kg, g) and np.array_equal(kab, ab):
+            return pos
+    return _pa_boundaries(df)
+
+def last_pitch_rows(df: pd.DataFrame) -> pd.DataFrame:
+    """One row per plate appearance (its final pitch), taken via pa_index."""
+    if df.empty:
+        return df
+    return df.take(pa_index(df))
+
+def write_parquet(df: pd.DataFrame, path: Path) -> None:
+    """Write next to `path` and rename over it, so concurrent readers never see a partial file."""
+    tmp = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    try:
+        df.to_parquet(tmp, index=False)
+        os.replace(tmp, path)
+    finally:
+        tmp.unlink(missing_ok=True)
+
+def _ingested(key: Path, df: pd.DataFrame) -> None:
+    for hook in INGEST_HOOKS:
+        try:
+            hook(key, df)
+        except Exception as e:
+            # derived tables rebuild lazily on read; never fail the fetch over them
+            print(f"[STORE] ingest hook {getattr(hook, '__name__', hook)} failed for {key.name}: {e}")
+
+_MISS_LOCKS: dict[Path, threading.Lock] = {}
+_MISS_GUARD = threading.Lock()
+
+def _miss_lock(key: Path) -> threading.Lock:
+    with _MISS_GUARD:
+        return _MISS_LOCKS.setdefault(key, threading.Lock())
+
+def _read_partition(key: Path) -> pd.DataFrame:
+    with stage("store.read") as sp:
+        sp.cache = True
+        sp.bytes = key.stat().st_size
+        df = pd.read_parquet(key)
+        sp.rows = len(df)
+    if not _in_pa_order(df):
+        # partitions written before the ordering invariant: fix once on disk
+        df = _to_pa_order(df)
+        write_parquet(df, key)
+        _ingested(key, df)
+    return _register_pa_index(df)
+
+def _load_partition(key: Path, fetch, limiter=None, refresh: bool = False) -> pd.DataFrame:
+    """
+    The partition at `key`, fetched and written first on a miss (or always, with
+    refresh). Misses on one key are single-flight: later callers wait for the first
+    fetch and read its file. `limiter` defaults to fetch.SAVANT_RATE_LIMITER (the
+    on-demand budget).
+    """
+    if key.exists() and not refresh:
+        return _read_partition(key)
+    with _miss_lock(key):
+        if key.exists() and not refresh:
+            return _read_partition(key)
+        if limiter is None:
+            from backend.sequence_src.fetch import SAVANT_RATE_LIMITER as limiter  # only on a miss; keeps httpx off the read path
+        limiter.acquire()
+        with stage("savant.fetch") as sp:
+            sp.cache = False
+            df = fetch()
+            if df is None:
+                df = pd.DataFrame()
+            sp.rows = len(df)
+        with stage("store.write") as sp:
+            df = _to_pa_order(df)
+            key.parent.mkdir(parents=True, exist_ok=True)
+            write_parquet(df, key)
+            sp.rows, sp.bytes = len(df), key.stat().st_size
+        _ingested(key, df)
+        return _register_pa_index(df)
+
+def fetch_pitcher_statcast(pitcher_id: int, start: str, end: str, *, limiter=None) -> pd.DataFrame:
+    key = _hash_key("pitcher", pitcher_id, start, end)
+    return _load_partition(key, lambda: transport.client("pybaseball").statcast_pitcher(start, end, pitcher_id), limiter)
+
+def fetch_league_statcast(start: str, end: str, *, refresh: bool = False) -> pd.DataFrame:
+    key = _hash_key("league", start, end)
+    return _load_partition(key, lambda: transport.client("pybaseball").statcast(start_dt=start, end_dt=end, verbose=False),
+                           refresh=refresh)
+
 def lookup_batter_id(name: str) -> int:
-    people = statsapi.lookup_player(name)
+    people = transport.client("statsapi").lookup_player(name)
     if not people:
         raise ValueError(f"Could not locate MLBAM id for hitter: {name}")
     return int(people[0]["id"])
 
-def fetch_batter_statcast(batter_id: int, start: str, end: str) -> pd.DataFrame:
+def fetch_batter_statcast(batter_id: int, start: str, end: str, *, limiter=None) -> pd.DataFrame:
     key = _hash_key("batter", batter_id, start, end)
-    if key.exists():
-        return pd.read_parquet(key)
-    df = statcast_batter(start, end, batter_id)
-    if df is None:
-        df = pd.DataFrame()
-    df.to_parquet(key, index=False)
-    return df
+    return _load_partition(key, lambda: transport.client("pybaseball").statcast_batter(start, end, batter_id), limiter)
+
+def season_window(season: int) -> tuple[str, str]:
+    """
+    The one store window for a player-season (03-01..12-31, so postseason rows are
+    in it). Every reader and the prefetcher use it, so a season is fetched and
+    stored once; routes filter game_type themselves.
+    """
+    return f"{season}-03-01", f"{season}-12-31"
+
+_FETCHERS = {"batter": fetch_batter_statcast, "pitcher": fetch_pitcher_statcast}
+
+def partition_path(kind: str, player_id: int, start: str, end: str) -> Path:
+    """Path of a player's store partition, fetched and written first on a miss (readers stream it from disk)."""
+    key = _hash_key(kind, player_id, start, end)
+    if not key.exists():
+        _FETCHERS[kind](player_id, start, end)
+    return key
 
 def lookup_pitcher_id(q: str):
     q = (q or "").strip()
@@ -58,6 +198,29 @@ _WOBA_CONSTS = {
     2024: dict(wBB=0.688, wHBP=0.720, w1B=0.880, w2B=1.247, w3B=1.578, wHR=2.013, scale=1.212, lg_woba=0.318, lgRPA=0.125),
     2025: dict(wBB=0.688, wHBP=0.720, w1B=0.880, w2B=1.247, w3B=1.578, wHR=2.013, scale=1.212, lg_woba=0.318, lgRPA=0.125),
 }
+_WOBA_TABLE = pd.DataFrame.from_dict(_WOBA_CONSTS, orient="index").rename_axis("season")
+
+# Written by backend.analytics.woba (nightly); rows there override _WOBA_CONSTS.
+WOBA_CONSTANTS_PATH = PROCESSED_DIR / "woba_constants.csv"
+_DERIVED_WOBA = {"mtime": None, "table": _WOBA_TABLE}
+
+def _woba_table() -> pd.DataFrame:
+    try:
+        mtime = WOBA_CONSTANTS_PATH.stat().st_mtime
+    except OSError:
+        return _WOBA_TABLE
+    if _DERIVED_WOBA["mtime"] != mtime:
+        derived = pd.read_csv(WOBA_CONSTANTS_PATH, index_col="season")[_WOBA_TABLE.columns]
+        _DERIVED_WOBA.update(mtime=mtime, table=derived.combine_first(_WOBA_TABLE))
+    return _DERIVED_WOBA["table"]
+
+def _season_constants(seasons: pd.Series) -> pd.DataFrame:
+    """League constants aligned row-for-row with `seasons` (unknown seasons use the nearest known year)."""
+    table = _woba_table()
+    keys = pd.to_numeric(seasons, errors="coerce")
+    known = table.reindex(table.index.union(keys.dropna().unique())).sort_index().ffill().bfill()
+    c = known.reindex(keys.to_numpy()).fillna(table.iloc[-1])
+    return c.set_axis(seasons.index)
 
 def _ensure_season_col(df: pd.DataFrame) -> pd.DataFrame:
     if "season" in df.columns:
@@ -69,10 +232,16 @@ def _ensure_season_col(df: pd.DataFrame) -> pd.DataFrame:
     return df
 
 def summarize_hitter_seasons(events: pd.DataFrame) -> pd.DataFrame:
+    """
+    Season lines from pitch-level events. A frame holding many hitters is
+    summarized per (batter, season) in one pass; a single-hitter frame without
+    a batter column is summarized per season.
+    """
     if events is None or len(events) == 0:
         return pd.DataFrame()
     df = _ensure_season_col(events)
     df = df[df["events"].notna()].copy()
+    keys = ["batter","season"] if "batter" in df.columns else ["season"]
 
     df["is_1B"] = (df["events"] == "single").astype(int)
     df["is_2B"] = (df["events"] == "double").astype(int)
@@ -86,7 +255,7 @@ def summarize_hitter_seasons(events: pd.DataFrame) -> pd.DataFrame:
     df["is_SO"] = (df["events"].str.startswith("strikeout")).astype(int)
     df["is_CI"] = (df["events"] == "catcher_interference").astype(int)
 
-    gb = df.groupby("season", dropna=False)
+    gb = df.groupby(keys, dropna=False)
     agg = gb.agg(
         PA=("events","count"),
         _1B=("is_1B","sum"),
@@ -118,29 +287,24 @@ def summarize_hitter_seasons(events: pd.DataFrame) -> pd.DataFrame:
     agg["BB%"] = np.where(agg["PA"]>0, agg["BB"]/agg["PA"], np.nan)
     agg["K%"]  = np.where(agg["PA"]>0, agg["SO"]/agg["PA"], np.nan)
 
-    def _woba_row(r):
-        c = _WOBA_CONSTS.get(int(r["season"]), _WOBA_CONSTS[2023])
-        num = c["wBB"]*max(r["BB"]-r["IBB"],0) + c["wHBP"]*r["HBP"] + c["w1B"]*r["_1B"] + c["w2B"]*r["_2B"] + c["w3B"]*r["_3B"] + c["wHR"]*r["HR"]
-        den = r["AB"] + max(r["BB"]-r["IBB"],0) + r["SF"] + r["HBP"]
-        return num/den if den>0 else np.nan
-    agg["wOBA"] = agg.apply(_woba_row, axis=1)
+    c = _season_constants(agg["season"])
+    ubb = (agg["BB"] - agg["IBB"]).clip(lower=0)
+    num = (c["wBB"]*ubb + c["wHBP"]*agg["HBP"] + c["w1B"]*agg["_1B"] + c["w2B"]*agg["_2B"]
+           + c["w3B"]*agg["_3B"] + c["wHR"]*agg["HR"])
+    den = agg["AB"] + ubb + agg["SF"] + agg["HBP"]
+    agg["wOBA"] = num / den.where(den>0)
+
+    wraa_pa = (agg["wOBA"] - c["lg_woba"]) / c["scale"]
+    agg["wRC+"] = np.where(agg["PA"]>0, (wraa_pa + c["lgRPA"]) / c["lgRPA"] * 100.0, np.nan)
 
     if "estimated_woba_using_speedangle" in df.columns:
-        xw = df.groupby("season")["estimated_woba_using_speedangle"].mean().rename("xwOBA").reset_index()
+        xw = df.groupby(keys, dropna=False)["estimated_woba_using_speedangle"].mean().rename("xwOBA").reset_index()
+        agg = agg.merge(xw, on=keys, how="left")
     else:
-        xw = pd.DataFrame({"season": agg["season"], "xwOBA": np.nan})
-    agg = agg.merge(xw, on="season", how="left")
-
-    def _wrc_plus_row(r):
-        c = _WOBA_CONSTS.get(int(r["season"]), _WOBA_CONSTS[2023])
-        if pd.isna(r["wOBA"]) or r["PA"]<=0:
-            return np.nan
-        wRAA = ((r["wOBA"] - c["lg_woba"]) / c["scale"]) * r["PA"]
-        return ((wRAA / r["PA"] + c["lgRPA"]) / c["lgRPA"]) * 100.0
-    agg["wRC+"] = agg.apply(_wrc_plus_row, axis=1)
-
-    cols = ["season","PA","AB","H","_1B","_2B","_3B","HR","BB","IBB","HBP","SF","SH","SO","AVG","OBP","SLG","OPS","ISO","BABIP","BB%","K%","wOBA","xwOBA","wRC+"]
-    agg = agg[cols].sort_values("season")
+        agg["xwOBA"] = np.nan
+
+    cols = keys + ["PA","AB","H","_1B","_2B","_3B","HR","BB","IBB","HBP","SF","SH","SO","AVG","OBP","SLG","OPS","ISO","BABIP","BB%","K%","wOBA","xwOBA","wRC+"]
+    agg = agg[cols].sort_values(keys)
     agg = agg.rename(columns={"_1B":"1B","_2B":"2B","_3B":"3B"})
     return agg
 
@@ -154,7 +318,8 @@ def _resolve_batter_id_kw(**kwargs):
             return int(kwargs[k])
     raise ValueError("No batter id provided (expected one of batter, bid, player_id, pid, batter_id)")
 
-def fetch_hitter_statcast(*, start:str, end:str, season_type:str="regular", cache:bool=True, **kwargs):
-    batter = _resolve_batter_id_kw(**kwargs)
-    # Delegate to the canonical function (already in this module)
-    return fetch_batter_statcast(start=start, end=end, batter=batter, season_type=season_type, cache=cache)
+def fetch_hitter_statcast(batter_id=None, start:str=None, end:str=None, *, season_type:str="regular", cache:bool=True, **kwargs):
+    batter = int(batter_id) if batter_id is not None else _resolve_batter_id_kw(**kwargs)
+    # Delegate to the canonical function (already in this module); the store always
+    # caches and keeps every game type, so season_type/cache are accepted and ignored
+    return fetch_batter_statcast(batter, start, end)
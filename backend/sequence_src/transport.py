@@ -0,0 +1,246 @@
+# src/transport.py
+"""
+Record/replay for outbound HTTP (Savant, MLB StatsAPI, pybaseball).
+
+Modes (SEQUENCE_HTTP_MODE):
+- live    default; requests go to the network untouched
+- record  requests go to the network and every response is saved to the fixture store
+- replay  responses come from the fixture store only; nothing leaves the machine
+
+Replay can add latency and inject failures so load tests see realistic tails:
+- SEQUENCE_HTTP_LATENCY_MS    "40", "20:250" (uniform range) or "recorded"
+- SEQUENCE_HTTP_ERROR_RATE    fraction of requests that fail, e.g. 0.02
+- SEQUENCE_HTTP_ERROR_STATUS  status for injected failures (default 503; 0 = connection error)
+- SEQUENCE_HTTP_SEED          make latency/failure draws reproducible
+
+httpx callers (fetch._request) pick this up through httpx_transport(); requests
+callers (main_hitter, pybaseball, statsapi) through install(), which wraps
+HTTPAdapter.send for the process.
+"""
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import io
+import json
+import os
+import random
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+import httpx
+
+MODES = ("live", "record", "replay")
+FIXTURE_DIR = Path(os.getenv("SEQUENCE_HTTP_FIXTURES", "build/fixtures/http"))
+# headers that describe the wire encoding, not the (decoded) body we store
+_DROP_HEADERS = {"content-encoding", "content-length", "transfer-encoding", "connection"}
+
+class FixtureMissing(ConnectionError):
+    """Replay mode had no recorded response for a request."""
+
+# ---------- Fixture store ----------
+
+def _canonical_url(url: str) -> str:
+    parts = urlsplit(url)
+    query = urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True)))
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), parts.path, query, ""))
+
+class FixtureStore:
+    """One `<key>.json` (status, headers, timing) + `<key>.body` per recorded request."""
+
+    def __init__(self, root: Path = FIXTURE_DIR) -> None:
+        self.root = Path(root)
+
+    @staticmethod
+    def key(method: str, url: str, body: Optional[bytes] = None) -> str:
+        h = hashlib.sha256(f"{method.upper()} {_canonical_url(url)}".encode())
+        if body:
+            h.update(b"\0" + body)
+        return h.hexdigest()
+
+    def get(self, key: str) -> Optional[Tuple[Dict[str, Any], bytes]]:
+        meta = self.root / f"{key}.json"
+        if not meta.exists():
+            return None
+        return json.loads(meta.read_text()), (self.root / f"{key}.body").read_bytes()
+
+    def put(self, key: str, method: str, url: str, status: int, headers: Dict[str, str], body: bytes, elapsed: float) -> None:
+        self.root.mkdir(parents=True, exist_ok=True)
+        meta = {
+            "method": method.upper(), "url": url, "status": status, "elapsed": round(elapsed, 4),
+            "headers": {k: v for k, v in headers.items() if k.lower() not in _DROP_HEADERS},
+        }
+        # body first, meta last: a fixture is visible only once both are complete
+        for path, data in ((self.root / f"{key}.body", body), (self.root / f"{key}.json", json.dumps(meta, indent=1).encode())):
+            tmp = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+            tmp.write_bytes(data)
+            os.replace(tmp, path)
+
+# ---------- Faults ----------
+
+@dataclass
+class Faults:
+    latency: Optional[Tuple[float, float]] = None   # seconds (lo, hi)
+    recorded_latency: bool = False
+    error_rate: float = 0.0
+    error_status: int = 503
+    seed: Optional[int] = None
+
+    def __post_init__(self) -> None:
+        self._rng = random.Random(self.seed)
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> "Faults":
+        spec = os.getenv("SEQUENCE_HTTP_LATENCY_MS", "").strip().lower()
+        latency = None
+        if spec and spec != "recorded":
+            lo, _, hi = spec.partition(":")
+            latency = (float(lo) / 1000, float(hi or lo) / 1000)
+        seed = os.getenv("SEQUENCE_HTTP_SEED")
+        return cls(
+            latency=latency,
+            recorded_latency=spec == "recorded",
+            error_rate=float(os.getenv("SEQUENCE_HTTP_ERROR_RATE", "0") or 0),
+            error_status=int(os.getenv("SEQUENCE_HTTP_ERROR_STATUS", "503") or 0),
+            seed=int(seed) if seed else None,
+        )
+
+    def draw(self, recorded: float = 0.0) -> Tuple[float, bool]:
+        """(delay seconds, fail?) for one request."""
+        with self._lock:
+            if self.recorded_latency:
+                delay = recorded
+            elif self.latency:
+                delay = self._rng.uniform(*self.latency)
+            else:
+                delay = 0.0
+            return delay, self._rng.random() < self.error_rate
+
+# ---------- Config ----------
+
+_config: Dict[str, Any] = {}
+
+def configure(mode: Optional[str] = None, fixtures: Optional[Path] = None, faults: Optional[Faults] = None) -> None:
+    """Set mode/store/faults for this process (defaults come from the environment)."""
+    mode = (mode or os.getenv("SEQUENCE_HTTP_MODE", "live")).lower()
+    if mode not in MODES:
+        raise ValueError(f"SEQUENCE_HTTP_MODE must be one of {MODES}, got {mode!r}")
+    _config.update(mode=mode, store=FixtureStore(fixtures or FIXTURE_DIR), faults=faults or Faults.from_env())
+
+def _cfg() -> Dict[str, Any]:
+    if not _config:
+        configure()
+    return _config
+
+def mode() -> str:
+    return _cfg()["mode"]
+
+def _replay(method: str, url: str, body: Optional[bytes]) -> Tuple[float, Optional[int], Optional[Tuple[Dict[str, Any], bytes]]]:
+    """(delay, injected status or None, fixture); raises FixtureMissing when nothing was recorded."""
+    cfg = _cfg()
+    hit = cfg["store"].get(FixtureStore.key(method, url, body))
+    if hit is None:
+        raise FixtureMissing(f"no recorded response for {method.upper()} {url}")
+    delay, fail = cfg["faults"].draw(hit[0].get("elapsed", 0.0))
+    if fail and cfg["faults"].error_status == 0:
+        raise ConnectionError(f"injected connection error for {url}")
+    return delay, cfg["faults"].error_status if fail else None, hit
+
+# ---------- httpx ----------
+
+class ReplayTransport(httpx.AsyncBaseTransport):
+    """httpx transport for record/replay; wraps the default transport when recording."""
+
+    def __init__(self, inner: Optional[httpx.AsyncBaseTransport] = None) -> None:
+        self.inner = inner or httpx.AsyncHTTPTransport()
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        url, method = str(request.url), request.method
+        body = await request.aread()
+        if mode() == "replay":
+            try:
+                delay, status, (meta, content) = _replay(method, url, body)
+            except ConnectionError as e:
+                raise httpx.ConnectError(str(e), request=request) from e
+            await asyncio.sleep(delay)
+            if status:
+                return httpx.Response(status, request=request, content=b"")
+            return httpx.Response(meta["status"], headers=meta["headers"], content=content, request=request)
+
+        t0 = time.perf_counter()
+        resp = await self.inner.handle_async_request(request)
+        content = await resp.aread()   # decoded per content-encoding
+        await resp.aclose()
+        _cfg()["store"].put(FixtureStore.key(method, url, body), method, url, resp.status_code,
+                            dict(resp.headers), content, time.perf_counter() - t0)
+        headers = [(k, v) for k, v in resp.headers.items() if k.lower() not in _DROP_HEADERS]
+        return httpx.Response(resp.status_code, headers=headers, content=content, request=request)
+
+    async def aclose(self) -> None:
+        await self.inner.aclose()
+
+def httpx_transport() -> Optional[httpx.AsyncBaseTransport]:
+    """Transport for httpx.AsyncClient, or None in live mode (use httpx's default)."""
+    return None if mode() == "live" else ReplayTransport()
+
+# ---------- requests ----------
+
+_installed = threading.Lock()
+_orig_send = None
+
+def _requests_send(self, request, **kwargs):
+    import requests
+    from urllib3.response import HTTPResponse
+
+    m = mode()
+    if m == "live":
+        return _orig_send(self, request, **kwargs)
+    body = request.body.encode() if isinstance(request.body, str) else request.body
+    if m == "replay":
+        try:
+            delay, status, (meta, content) = _replay(request.method, request.url, body)
+        except ConnectionError as e:
+            raise requests.ConnectionError(str(e), request=request) from e
+        time.sleep(delay)
+        if status:
+            headers, content = {}, b""
+        else:
+            status, headers = meta["status"], meta["headers"]
+        raw = HTTPResponse(body=io.BytesIO(content), headers=headers, status=status, preload_content=False, decode_content=False)
+        return self.build_response(request, raw)
+
+    t0 = time.perf_counter()
+    resp = _orig_send(self, request, **kwargs)
+    content = resp.content   # drains (and decodes) a streamed body
+    _cfg()["store"].put(FixtureStore.key(request.method, request.url, body), request.method, request.url,
+                        resp.status_code, dict(resp.headers), content, time.perf_counter() - t0)
+    # hand stream=True callers a fresh raw body to read
+    resp.raw = HTTPResponse(body=io.BytesIO(content), headers={k: v for k, v in resp.headers.items() if k.lower() not in _DROP_HEADERS},
+                            status=resp.status_code, preload_content=False, decode_content=False)
+    return resp
+
+def install() -> None:
+    """Route every requests.Session in this process through record/replay (no-op in live mode)."""
+    global _orig_send
+    if mode() == "live":
+        return
+    from requests.adapters import HTTPAdapter
+    with _installed:
+        if _orig_send is None:
+            _orig_send = HTTPAdapter.send
+            HTTPAdapter.send = _requests_send
+
+def client(name: str):
+    """
+    Import a requests-based client library (pybaseball, statsapi) on first use,
+    with record/replay installed first. pybaseball alone pulls in matplotlib,
+    which API and worker startup should not pay for.
+    """
+    import importlib
+    install()
+    return importlib.import_module(name)
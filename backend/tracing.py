@@ -0,0 +1,140 @@
+"""Lightweight per-stage timing for the hot path (fetch, parse, aggregate, serialize).
+
+Stages are recorded into process-wide aggregates rendered by `render_prometheus()`
+(served at /metrics) and, inside a request, into a per-request list the API turns
+into a `Server-Timing` header.
+"""
+from __future__ import annotations
+import bisect, contextvars, functools, inspect, threading, time
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Tuple
+
+BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+class _StageStats:
+    __slots__ = ("count", "seconds", "buckets", "rows", "bytes", "hits", "misses")
+    def __init__(self) -> None:
+        self.count = 0
+        self.seconds = 0.0
+        self.buckets = [0] * (len(BUCKETS) + 1)
+        self.rows = 0
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+
+_STATS: Dict[str, _StageStats] = {}
+_LOCK = threading.Lock()
+_REQUEST: contextvars.ContextVar[Optional[List[Tuple[str, float]]]] = contextvars.ContextVar("biolab_trace", default=None)
+
+class Span:
+    """Mutable handle yielded by `stage()`; set rows/bytes/cache before the block exits."""
+    __slots__ = ("name", "rows", "bytes", "cache")
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self.rows: Optional[int] = None
+        self.bytes: Optional[int] = None
+        self.cache: Optional[bool] = None   # True hit, False miss, None n/a
+
+def record(name: str, seconds: float, rows: Optional[int] = None, nbytes: Optional[int] = None, cache: Optional[bool] = None) -> None:
+    with _LOCK:
+        s = _STATS.get(name)
+        if s is None:
+            s = _STATS[name] = _StageStats()
+        s.count += 1
+        s.seconds += seconds
+        s.buckets[bisect.bisect_left(BUCKETS, seconds)] += 1
+        s.rows += rows or 0
+        s.bytes += nbytes or 0
+        if cache is True:
+            s.hits += 1
+        elif cache is False:
+            s.misses += 1
+    spans = _REQUEST.get()
+    if spans is not None:
+        spans.append((name, seconds))
+
+@contextmanager
+def stage(name: str):
+    span = Span(name)
+    t0 = time.perf_counter()
+    try:
+        yield span
+    finally:
+        record(name, time.perf_counter() - t0, span.rows, span.bytes, span.cache)
+
+def _rows_of(obj) -> Optional[int]:
+    try:
+        return len(obj) if hasattr(obj, "columns") else None
+    except Exception:
+        return None
+
+def traced(name: str):
+    """Decorator form of `stage()`; rows = length of the first DataFrame argument."""
+    def deco(fn):
+        if inspect.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def awrapper(*args, **kwargs):
+                with stage(name) as sp:
+                    sp.rows = _rows_of(args[0]) if args else None
+                    return await fn(*args, **kwargs)
+            return awrapper
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with stage(name) as sp:
+                sp.rows = _rows_of(args[0]) if args else None
+                return fn(*args, **kwargs)
+        return wrapper
+    return deco
+
+# ---------- request scope ----------
+
+def begin_request() -> contextvars.Token:
+    return _REQUEST.set([])
+
+def end_request(token: contextvars.Token) -> List[Tuple[str, float]]:
+    spans = _REQUEST.get() or []
+    _REQUEST.reset(token)
+    return spans
+
+def server_timing(spans: List[Tuple[str, float]], total: Optional[float] = None) -> str:
+    merged: Dict[str, float] = {}
+    for name, sec in spans:
+        merged[name] = merged.get(name, 0.0) + sec
+    parts = [f"{n.replace('.', '-')};dur={sec * 1000:.1f}" for n, sec in merged.items()]
+    if total is not None:
+        parts.append(f"total;dur={total * 1000:.1f}")
+    return ", ".join(parts)
+
+# ---------- exposition ----------
+
+def render_prometheus(prefix: str = "biolab") -> str:
+    with _LOCK:
+        snap = {k: (v.count, v.seconds, list(v.buckets), v.rows, v.bytes, v.hits, v.misses) for k, v in _STATS.items()}
+    out = [
+        f"# HELP {prefix}_stage_seconds Time spent per hot-path stage.",
+        f"# TYPE {prefix}_stage_seconds histogram",
+    ]
+    for name, (count, secs, buckets, *_rest) in sorted(snap.items()):
+        cum = 0
+        for le, n in zip(BUCKETS, buckets):
+            cum += n
+            out.append(f'{prefix}_stage_seconds_bucket{{stage="{name}",le="{le}"}} {cum}')
+        out.append(f'{prefix}_stage_seconds_bucket{{stage="{name}",le="+Inf"}} {count}')
+        out.append(f'{prefix}_stage_seconds_sum{{stage="{name}"}} {secs:.6f}')
+        out.append(f'{prefix}_stage_seconds_count{{stage="{name}"}} {count}')
+    for metric, idx, help_ in (("rows", 3, "Rows processed per stage."), ("bytes", 4, "Bytes read or written per stage.")):
+        out.append(f"# HELP {prefix}_stage_{metric}_total {help_}")
+        out.append(f"# TYPE {prefix}_stage_{metric}_total counter")
+        for name, vals in sorted(snap.items()):
+            out.append(f'{prefix}_stage_{metric}_total{{stage="{name}"}} {vals[idx]}')
+    out.append(f"# HELP {prefix}_cache_requests_total Cache lookups per stage by result.")
+    out.append(f"# TYPE {prefix}_cache_requests_total counter")
+    for name, vals in sorted(snap.items()):
+        if vals[5] or vals[6]:
+            out.append(f'{prefix}_cache_requests_total{{stage="{name}",result="hit"}} {vals[5]}')
+            out.append(f'{prefix}_cache_requests_total{{stage="{name}",result="miss"}} {vals[6]}')
+    return "\n".join(out) + "\n"
+
+def reset() -> None:
+    with _LOCK:
+        _STATS.clear()
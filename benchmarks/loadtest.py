@@ -0,0 +1,218 @@
+#!/usr/bin/env python
+"""
+Load test for the Biolab API: per-route latency percentiles, throughput and error rate.
+
+    python -m benchmarks.loadtest --synthetic                 # in-process, offline store
+    python -m benchmarks.loadtest --url http://localhost:8000 --ramp 1,8,32
+    python -m benchmarks.loadtest --synthetic --save_baseline # later runs compare to it
+
+In-process runs drive the ASGI app through httpx, so no socket is opened.
+--synthetic seeds a temporary Statcast store with generated partitions for the
+ids and seasons in the mix, so the routes run their real read/aggregate path
+offline. Against a live server, use SEQUENCE_HTTP_MODE=replay there
+(backend.sequence_src.transport) for reproducible upstream behaviour.
+
+Each ramp stage runs `concurrency` closed-loop clients for --stage_seconds; the
+report covers every stage together and each stage on its own.
+"""
+from __future__ import annotations
+import argparse, asyncio, json, random, tempfile, time
+from collections import defaultdict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+BASELINE_PATH = Path("build/bench/loadtest_baseline.json")
+DEFAULT_HITTERS = [592450, 660271, 605141, 665742, 547180, 608070]
+DEFAULT_PITCHERS = [543037, 669203, 675911, 605483]
+NAMES = ["judge", "ohtani", "betts", "soto", "harper", "ramirez", "freeman", "alvarez"]
+
+@dataclass
+class Route:
+    name: str              # reported as the route template
+    weight: float
+    make: Callable[[random.Random], str]
+
+def _routes(hitters: List[int], pitchers: List[int], seasons: List[int]) -> List[Route]:
+    fam = ["fastball", "slider", "changeup", "curveball"]
+    return [
+        Route("/players/search", 0.20, lambda r: f"/players/search?q={r.choice(NAMES)}"),
+        Route("/hitters/{bid}/splits", 0.25, lambda r: f"/hitters/{r.choice(hitters)}/splits?season={r.choice(seasons)}"
+              f"&split={r.choice(['pitch_family', 'pitch_type', 'stand', 'count', 'zone'])}"),
+        Route("/hitters/{bid}/heatmap", 0.25, lambda r: f"/hitters/{r.choice(hitters)}/heatmap?season={r.choice(seasons)}"
+              + (f"&pitch_family={r.choice(fam)}" if r.random() < 0.5 else "")),
+        Route("/hitters/{bid}/season_all", 0.15, lambda r: f"/hitters/{r.choice(hitters)}/season_all?seasons="
+              + ",".join(map(str, sorted(r.sample(seasons, k=r.randint(1, len(seasons))))))),
+        Route("/pitchers/{pid}/season", 0.15, lambda r: f"/pitchers/{r.choice(pitchers)}/season?season={r.choice(seasons)}"),
+    ]
+
+# ---------- offline store ----------
+
+def seed_synthetic_store(hitters: List[int], pitchers: List[int], seasons: List[int], root: Path) -> None:
+    """Point the Statcast store at `root` and fill every partition the route mix reads."""
+    from backend.sequence_src import scrape_savant
+    from benchmarks.synthetic import synthetic_statcast
+    scrape_savant.CACHE_DIR = root
+    for y in seasons:
+        for bid in hitters:
+            df = synthetic_statcast(2_600, n_batters=1, seasons=(y,), seed=bid + y).assign(batter=bid)
+            # every route reads the one season_window partition
+            df.to_parquet(scrape_savant._hash_key("batter", bid, *scrape_savant.season_window(y)), index=False)
+        for pid in pitchers:
+            df = synthetic_statcast(2_900, n_batters=400, seasons=(y,), seed=pid + y).assign(pitcher=pid)
+            df.to_parquet(scrape_savant._hash_key("pitcher", pid, *scrape_savant.season_window(y)), index=False)
+
+# ---------- driver ----------
+
+class Samples:
+    def __init__(self) -> None:
+        self.lat: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Dict[str, Dict[str, int]] = defaultdict(lambda: defaultdict(int))
+
+    def add(self, route: str, seconds: float, status: Optional[int], exc: Optional[str] = None) -> None:
+        self.lat[route].append(seconds)
+        if exc or status is None or status >= 500:
+            self.errors[route][exc or str(status)] += 1
+
+def _pick(routes: List[Route], rng: random.Random) -> Route:
+    return rng.choices(routes, weights=[r.weight for r in routes])[0]
+
+async def _client(http, routes: List[Route], rng: random.Random, stop_at: float, out: Samples, timeout: float) -> None:
+    while time.perf_counter() < stop_at:
+        route = _pick(routes, rng)
+        path = route.make(rng)
+        t0 = time.perf_counter()
+        try:
+            resp = await http.get(path, timeout=timeout)
+            await resp.aread()
+            out.add(route.name, time.perf_counter() - t0, resp.status_code)
+        except Exception as e:
+            out.add(route.name, time.perf_counter() - t0, None, type(e).__name__)
+
+async def run_stage(http, routes: List[Route], concurrency: int, seconds: float, seed: int, timeout: float) -> Tuple[Samples, float]:
+    out = Samples()
+    t0 = time.perf_counter()
+    stop_at = t0 + seconds
+    await asyncio.gather(*(
+        _client(http, routes, random.Random(seed * 1000 + i), stop_at, out, timeout) for i in range(concurrency)
+    ))
+    return out, time.perf_counter() - t0
+
+def summarize(samples: Samples, wall: float) -> Dict[str, Dict[str, float]]:
+    rows = {}
+    for route, lat in sorted(samples.lat.items()):
+        a = np.asarray(lat) * 1000
+        errs = sum(samples.errors[route].values())
+        rows[route] = {
+            "n": int(a.size),
+            "p50_ms": float(np.percentile(a, 50)),
+            "p95_ms": float(np.percentile(a, 95)),
+            "p99_ms": float(np.percentile(a, 99)),
+            "mean_ms": float(a.mean()),
+            "rps": a.size / wall if wall else 0.0,
+            "error_rate": errs / a.size,
+            "errors": dict(samples.errors[route]),
+        }
+    return rows
+
+def _merge(stages: List[Tuple[Samples, float]]) -> Tuple[Samples, float]:
+    m = Samples()
+    for s, _ in stages:
+        for k, v in s.lat.items():
+            m.lat[k].extend(v)
+        for k, d in s.errors.items():
+            for e, n in d.items():
+                m.errors[k][e] += n
+    return m, sum(w for _, w in stages)
+
+def _print(title: str, rows: Dict[str, Dict[str, float]], base: Optional[Dict[str, Dict[str, float]]] = None) -> None:
+    print(f"\n== {title}")
+    print(f"{'route':<28}{'n':>7}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'req/s':>9}{'err%':>7}{'p95 vs base':>13}{'rps vs base':>13}")
+    for route, r in rows.items():
+        b = (base or {}).get(route)
+        dp95 = f"{(r['p95_ms'] / b['p95_ms'] - 1) * 100:+.1f}%" if b and b["p95_ms"] else "-"
+        drps = f"{(r['rps'] / b['rps'] - 1) * 100:+.1f}%" if b and b["rps"] else "-"
+        print(f"{route:<28}{r['n']:>7}{r['p50_ms']:>10.1f}{r['p95_ms']:>10.1f}{r['p99_ms']:>10.1f}{r['rps']:>9.1f}"
+              f"{r['error_rate'] * 100:>7.1f}{dp95:>13}{drps:>13}")
+        if r["errors"]:
+            print(f"{'':<28}errors: {r['errors']}")
+
+def parse_args():
+    p = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    p.add_argument("--url", help="base URL of a running server; default drives the app in-process")
+    p.add_argument("--synthetic", action="store_true", help="in-process only: serve a generated Statcast store")
+    p.add_argument("--ramp", default="1,4,16", help="comma sep concurrency per stage")
+    p.add_argument("--stage_seconds", type=float, default=15.0)
+    p.add_argument("--warmup", type=int, default=1, help="requests per route template before timing")
+    p.add_argument("--hitters", help="comma sep MLBAM ids")
+    p.add_argument("--pitchers", help="comma sep MLBAM ids")
+    p.add_argument("--seasons", default="2024,2025")
+    p.add_argument("--timeout", type=float, default=60.0)
+    p.add_argument("--seed", type=int, default=0)
+    p.add_argument("--baseline", type=Path, default=BASELINE_PATH)
+    p.add_argument("--save_baseline", action="store_true")
+    p.add_argument("--json", type=Path, help="also write the full report here")
+    return p.parse_args()
+
+async def amain(args) -> Dict:
+    import httpx
+    hitters = [int(x) for x in args.hitters.split(",")] if args.hitters else DEFAULT_HITTERS
+    pitchers = [int(x) for x in args.pitchers.split(",")] if args.pitchers else DEFAULT_PITCHERS
+    seasons = [int(x) for x in args.seasons.split(",")]
+    routes = _routes(hitters, pitchers, seasons)
+
+    if args.url:
+        if args.synthetic:
+            raise SystemExit("--synthetic seeds this process's store; run the server with SEQUENCE_HTTP_MODE=replay instead")
+        http = httpx.AsyncClient(base_url=args.url.rstrip("/"))
+    else:
+        if args.synthetic:
+            from benchmarks.run import _block_network
+            _block_network()   # a partition missing from the seeded store must fail, not fetch
+            tmp = Path(tempfile.mkdtemp(prefix="biolab-loadtest-"))
+            t0 = time.perf_counter()
+            seed_synthetic_store(hitters, pitchers, seasons, tmp)
+            print(f"# synthetic store: {tmp} ({time.perf_counter() - t0:.1f}s)")
+        from backend.api.server import app
+        http = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://loadtest")
+
+    async with http:
+        rng = random.Random(args.seed)
+        for route in routes:
+            for _ in range(args.warmup):
+                try:
+                    await http.get(route.make(rng), timeout=args.timeout)
+                except Exception:
+                    pass
+        stages = []
+        for i, c in enumerate(int(x) for x in args.ramp.split(",")):
+            s, wall = await run_stage(http, routes, c, args.stage_seconds, args.seed + i, args.timeout)
+            stages.append((s, wall))
+            _print(f"stage {i + 1}: concurrency {c}, {wall:.1f}s", summarize(s, wall))
+
+    total = summarize(*_merge(stages))
+    base = json.loads(args.baseline.read_text())["routes"] if args.baseline.exists() else None
+    _print("all stages" + (f" (baseline {args.baseline})" if base else ""), total, base)
+    return {
+        "at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "target": args.url or ("in-process/synthetic" if args.synthetic else "in-process"),
+        "ramp": args.ramp, "stage_seconds": args.stage_seconds, "seed": args.seed,
+        "routes": total,
+        "stages": [summarize(s, w) for s, w in stages],
+    }
+
+def main():
+    args = parse_args()
+    report = asyncio.run(amain(args))
+    if args.json:
+        args.json.parent.mkdir(parents=True, exist_ok=True)
+        args.json.write_text(json.dumps(report, indent=1))
+    if args.save_baseline:
+        args.baseline.parent.mkdir(parents=True, exist_ok=True)
+        args.baseline.write_text(json.dumps(report, indent=1))
+        print(f"[LOAD] baseline saved: {args.baseline}")
+
+if __name__ == "__main__":
+    main()
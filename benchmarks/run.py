@@ -0,0 +1,152 @@
+#!/usr/bin/env python
+"""
+Offline benchmarks for the Statcast hot path.
+
+    python -m benchmarks.run                      # 1k, 100k, 1M pitches, every case
+    python -m benchmarks.run --sizes 100000 --cases season_rollup,bin25
+
+Each size gets one synthetic frame (benchmarks.synthetic) registered like a
+store partition; every case times one function over it. Results are appended
+to build/bench/history.jsonl and compared with the latest recorded run of the same case and size. Sockets are
+disabled for the whole process, so nothing reaches pybaseball's sources.
+"""
+from __future__ import annotations
+import argparse, datetime as dt, gc, json, platform, socket, statistics, subprocess, sys, time
+from pathlib import Path
+from typing import Callable, Dict, List
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.synthetic import synthetic_statcast
+
+HISTORY_PATH = Path("build/bench/history.jsonl")
+DEFAULT_SIZES = [1_000, 100_000, 1_000_000]
+
+def _cases() -> Dict[str, Callable[[pd.DataFrame], object]]:
+    # imported late so --help and the network guard come first
+    from backend.analytics import metrics, percentiles, pitching, rolling, sequences, similar
+    from backend.api import server
+    from backend import etl
+    from backend.sequence_src.scrape_savant import summarize_hitter_seasons
+    return {
+        "_season_table": server._season_table,
+        "season_rollup": metrics.season_rollup,
+        "split_by": lambda df: metrics.split_by(df, ["pitch_type"]),
+        "bin25": metrics.bin25,
+        "_normalize_hitters": etl._normalize_hitters,
+        "summarize_hitter_seasons": summarize_hitter_seasons,
+        "heatmap": server._heatmap_grid,
+        "game_log": rolling.game_log,
+        "rolling_series": lambda df: rolling.rolling_series(rolling.game_log(df), 15),
+        "transitions": sequences.transitions,
+        "arsenal": pitching.arsenal,
+        "pitcher_splits": lambda df: pitching.splits(df, "count"),
+        "percentile_build": lambda df: percentiles.build(df, 2024, min_pa=1),
+        "similar_profiles": lambda df: similar.profiles(df, 2024, min_pa=1),
+    }
+
+def _block_network() -> None:
+    def _refuse(self, *a, **k):
+        raise RuntimeError("benchmarks run offline; a case tried to open a network connection")
+    socket.socket.connect = _refuse
+    socket.socket.connect_ex = _refuse
+
+def _frame(size: int, seed: int) -> pd.DataFrame:
+    from backend.sequence_src.scrape_savant import _register_pa_index
+    # ~5k pitches per hitter: a 1k frame is one hitter, 1M is a couple hundred
+    df = synthetic_statcast(size, n_batters=max(1, size // 5_000), seasons=(2023, 2024), seed=seed)
+    return _register_pa_index(df)
+
+def _time(fn: Callable, df: pd.DataFrame, repeat: int, budget: float) -> List[float]:
+    runs: List[float] = []
+    while len(runs) < repeat:
+        gc.collect()
+        t0 = time.perf_counter()
+        fn(df)
+        runs.append(time.perf_counter() - t0)
+        if sum(runs) > budget:
+            break   # slow case at this size: keep what we have rather than stall the suite
+    return runs
+
+def _git_rev() -> str | None:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, timeout=5).stdout.strip() or None
+    except Exception:
+        return None
+
+def previous_results(path: Path) -> Dict[tuple, float]:
+    if not path.exists():
+        return {}
+    # latest median per (case, size), so a partial run doesn't hide older baselines
+    out: Dict[tuple, float] = {}
+    for line in path.read_text().splitlines():
+        if line.strip():
+            out.update({(r["case"], r["size"]): r["median"] for r in json.loads(line).get("results", [])})
+    return out
+
+def append_history(path: Path, results: List[dict], **extra) -> None:
+    """One JSON line per run: environment, git revision and every (case, size) result."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    record = {
+        "at": dt.datetime.utcnow().isoformat() + "Z",
+        "git_rev": _git_rev(),
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "numpy": np.__version__,
+        "machine": platform.machine(),
+        **extra,
+        "results": results,
+    }
+    with path.open("a") as f:
+        f.write(json.dumps(record) + "\n")
+    print(f"[BENCH] appended to {path}")
+
+def parse_args():
+    p = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    p.add_argument("--sizes", default=",".join(map(str, DEFAULT_SIZES)), help="comma sep pitch counts")
+    p.add_argument("--cases", help="comma sep subset of case names")
+    p.add_argument("--repeat", type=int, default=5)
+    p.add_argument("--budget", type=float, default=30.0, help="max seconds per case per size before repeats stop")
+    p.add_argument("--seed", type=int, default=0)
+    p.add_argument("--history", type=Path, default=HISTORY_PATH)
+    p.add_argument("--no_save", action="store_true", help="compare only; don't append to history")
+    p.add_argument("--list", action="store_true", help="list case names and exit")
+    return p.parse_args()
+
+def main():
+    args = parse_args()
+    _block_network()
+    cases = _cases()
+    if args.list:
+        print("\n".join(cases))
+        return
+    wanted = [c.strip() for c in (args.cases or "").split(",") if c.strip()] or list(cases)
+    unknown = sorted(set(wanted) - set(cases))
+    if unknown:
+        raise SystemExit(f"unknown cases {unknown}; have {list(cases)}")
+    sizes = [int(s) for s in args.sizes.split(",") if s.strip()]
+    prev = previous_results(args.history)
+
+    results = []
+    print(f"{'case':<26}{'size':>10}{'rows':>10}{'n':>4}{'min ms':>12}{'median ms':>12}{'vs last':>10}")
+    for size in sizes:
+        t0 = time.perf_counter()
+        df = _frame(size, args.seed)
+        print(f"# {len(df):,} pitches generated in {time.perf_counter() - t0:.2f}s")
+        for name in wanted:
+            runs = _time(cases[name], df, args.repeat, args.budget)
+            med = statistics.median(runs)
+            res = {"case": name, "size": size, "rows": len(df), "repeats": len(runs),
+                   "min": min(runs), "median": med, "mean": statistics.fmean(runs)}
+            results.append(res)
+            before = prev.get((name, size))
+            delta = f"{(med / before - 1) * 100:+.1f}%" if before else "-"
+            print(f"{name:<26}{size:>10}{len(df):>10}{len(runs):>4}{min(runs) * 1e3:>12.1f}{med * 1e3:>12.1f}{delta:>10}")
+        del df
+
+    if not args.no_save:
+        append_history(args.history, results, seed=args.seed)
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,139 @@
+#!/usr/bin/env python
+"""
+Cold-start benchmark: fresh interpreters importing the API/ETL modules, and a
+fresh uvicorn process until its first /players/search response.
+
+    python -m benchmarks.startup
+    python -m benchmarks.startup --repeat 10 --importtime   # also list the slowest imports
+    python -m benchmarks.startup --check                    # exit 1 on a startup regression
+
+Results go to the same history as benchmarks.run (size 0) and are compared
+with the latest recorded run. --check fails if importing the server loads any
+DEFERRED module, or a case's median is more than --max_regress slower than last
+time (or over --budget_ms).
+"""
+from __future__ import annotations
+import argparse, os, socket, statistics, subprocess, sys, time, urllib.request
+from pathlib import Path
+from typing import List
+
+from benchmarks.run import HISTORY_PATH, append_history, previous_results
+
+ROOT = Path(__file__).resolve().parents[1]
+IMPORT_CASES = ["backend.api.server", "backend.etl", "backend.sequence_src.scrape_savant"]
+# loaded on first use, never by `import backend.api.server`
+DEFERRED = ["backend.analytics", "backend.api.arrowio", "backend.api.fastjson",
+            "scipy", "matplotlib", "pybaseball", "statsapi", "requests", "fpdf"]
+
+def _env() -> dict:
+    env = dict(os.environ, PYTHONPATH=str(ROOT))
+    env.pop("SEQUENCE_PREFETCH", None)   # startup hooks that fetch are not what we measure
+    return env
+
+def time_import(module: str) -> float:
+    code = f"import time; t = time.perf_counter(); import {module}; print(time.perf_counter() - t)"
+    out = subprocess.run([sys.executable, "-c", code], cwd=ROOT, env=_env(), capture_output=True, text=True, check=True)
+    return float(out.stdout.strip().splitlines()[-1])
+
+def deferred_loaded(module: str = "backend.api.server") -> List[str]:
+    """DEFERRED modules (or their submodules) present after a fresh `import module`."""
+    code = (f"import sys, {module}; pre = {DEFERRED!r}; "
+            "print('\\n'.join(m for m in sys.modules if any(m == p or m.startswith(p + '.') for p in pre)))")
+    out = subprocess.run([sys.executable, "-c", code], cwd=ROOT, env=_env(), capture_output=True, text=True, check=True)
+    return out.stdout.split()
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+def time_first_response(path: str = "/players/search?q=judge", timeout: float = 60.0) -> float:
+    """Spawn-to-first-200 for a fresh uvicorn worker."""
+    port = _free_port()
+    url = f"http://127.0.0.1:{port}{path}"
+    t0 = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "backend.api.server:app", "--port", str(port), "--log-level", "warning"],
+        cwd=ROOT, env=_env(), stdout=subprocess.DEVNULL, stderr=subprocess.PIPE,
+    )
+    try:
+        while time.perf_counter() - t0 < timeout:
+            if proc.poll() is not None:
+                raise RuntimeError(f"uvicorn exited: {proc.stderr.read().decode()[-500:]}")
+            try:
+                with urllib.request.urlopen(url, timeout=5) as r:
+                    if r.status == 200:
+                        return time.perf_counter() - t0
+            except OSError:
+                time.sleep(0.005)
+        raise TimeoutError(f"no 200 from {url} within {timeout}s")
+    finally:
+        proc.terminate()
+        proc.wait(10)
+
+def slowest_imports(module: str, n: int = 12) -> List[tuple]:
+    """(cumulative seconds, module) for the top-level imports under `module`."""
+    out = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                         cwd=ROOT, env=_env(), capture_output=True, text=True, check=True)
+    rows = []
+    for line in out.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cum, name = line[len("import time:"):].split("|")
+        depth = (len(name) - len(name.lstrip())) // 2
+        if depth <= 1:
+            rows.append((int(cum) / 1e6, name.strip()))
+    return sorted(rows, reverse=True)[:n]
+
+def parse_args():
+    p = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    p.add_argument("--repeat", type=int, default=5)
+    p.add_argument("--no_server", action="store_true", help="skip the uvicorn first-response case")
+    p.add_argument("--importtime", action="store_true", help="print the slowest imports under backend.api.server")
+    p.add_argument("--history", type=Path, default=HISTORY_PATH)
+    p.add_argument("--no_save", action="store_true")
+    p.add_argument("--check", action="store_true", help="exit 1 on a deferred import or a slowdown past the thresholds")
+    p.add_argument("--max_regress", type=float, default=0.20, help="allowed median slowdown vs the last run (--check)")
+    p.add_argument("--budget_ms", type=float, default=None, help="absolute cap on every case's median (--check)")
+    return p.parse_args()
+
+def main():
+    args = parse_args()
+    cases = [(f"import:{m}", lambda m=m: time_import(m)) for m in IMPORT_CASES]
+    if not args.no_server:
+        cases.append(("first_response:/players/search", time_first_response))
+    prev = previous_results(args.history)
+
+    results, failures = [], []
+    print(f"{'case':<48}{'n':>4}{'min ms':>10}{'median ms':>12}{'vs last':>10}")
+    for name, fn in cases:
+        runs = [fn() for _ in range(args.repeat)]
+        med = statistics.median(runs)
+        results.append({"case": name, "size": 0, "repeats": len(runs), "min": min(runs), "median": med,
+                        "mean": statistics.fmean(runs)})
+        before = prev.get((name, 0))
+        delta = f"{(med / before - 1) * 100:+.1f}%" if before else "-"
+        print(f"{name:<48}{len(runs):>4}{min(runs) * 1e3:>10.1f}{med * 1e3:>12.1f}{delta:>10}")
+        if before and med > before * (1 + args.max_regress):
+            failures.append(f"{name}: median {med * 1e3:.1f} ms is more than {args.max_regress:.0%} over {before * 1e3:.1f} ms")
+        if args.budget_ms is not None and med * 1e3 > args.budget_ms:
+            failures.append(f"{name}: median {med * 1e3:.1f} ms is over the {args.budget_ms:.0f} ms budget")
+
+    if args.importtime:
+        print("\nslowest imports under backend.api.server (cumulative):")
+        for secs, mod in slowest_imports("backend.api.server"):
+            print(f"  {secs * 1e3:8.1f} ms  {mod}")
+    if not args.no_save:
+        append_history(args.history, results, kind="startup")
+    if args.check:
+        eager = deferred_loaded()
+        if eager:
+            failures.append(f"import backend.api.server loaded deferred modules: {', '.join(sorted(eager))}")
+        for f in failures:
+            print(f"[FAIL] {f}")
+        if failures:
+            sys.exit(1)
+        print("[OK] startup within thresholds")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,197 @@
+"""Synthetic pitch-level Statcast frames for offline benchmarks.
+
+Frames carry the columns the API, ETL and metrics code read, with roughly
+league-like distributions (pitches per PA, PA outcomes, pitch mix, locations,
+batted-ball quality), and come back in store order (game_pk, at_bat_number,
+pitch_number) with a RangeIndex, like a partition read from the Statcast store.
+Everything is vectorized, so 1M+ pitches build in a few seconds.
+"""
+from __future__ import annotations
+import numpy as np
+import pandas as pd
+
+PITCHES_PER_PA = {1: .12, 2: .13, 3: .16, 4: .17, 5: .16, 6: .13, 7: .07, 8: .03, 9: .02, 10: .01}
+
+PA_EVENTS = {
+    "field_out": .320, "strikeout": .225, "single": .140, "walk": .083, "double": .045,
+    "home_run": .030, "force_out": .020, "grounded_into_double_play": .020, "hit_by_pitch": .011,
+    "field_error": .008, "sac_fly": .007, "triple": .004, "intent_walk": .003, "sac_bunt": .003,
+    "fielders_choice": .003, "double_play": .002, "strikeout_double_play": .001, "catcher_interf": .001,
+}
+WALK_EVENTS = {"walk", "intent_walk"}
+STRIKEOUT_EVENTS = {"strikeout", "strikeout_double_play"}
+
+# (description, type, ball increment, strike increment) for pitches before the last
+TAKE_DESCRIPTIONS = [
+    ("ball", "B", 1, 0, .40), ("called_strike", "S", 0, 1, .19), ("foul", "S", 0, 1, .23),
+    ("swinging_strike", "S", 0, 1, .11), ("blocked_ball", "B", 1, 0, .03),
+    ("foul_tip", "S", 0, 1, .02), ("swinging_strike_blocked", "S", 0, 1, .02),
+]
+
+# pitch_type: (pitch_name, share, velo mean, spin mean)
+PITCH_MIX = {
+    "FF": ("4-Seam Fastball", .33, 94.2, 2300), "SI": ("Sinker", .15, 93.4, 2150),
+    "SL": ("Slider", .16, 85.6, 2450), "CH": ("Changeup", .11, 85.8, 1750),
+    "CU": ("Curveball", .07, 79.5, 2550), "FC": ("Cutter", .08, 89.3, 2400),
+    "ST": ("Sweeper", .05, 82.0, 2600), "FS": ("Split-Finger", .03, 86.0, 1350),
+    "KC": ("Knuckle Curve", .02, 81.5, 2500),
+}
+
+def _choice(rng: np.random.Generator, table: dict, n: int) -> np.ndarray:
+    keys = np.array(list(table), dtype=object)
+    p = np.array([v if np.isscalar(v) else v[1] for v in table.values()], dtype="float64")
+    return keys[rng.choice(len(keys), size=n, p=p / p.sum())]
+
+def _zone(px: np.ndarray, pz: np.ndarray, top: np.ndarray, bot: np.ndarray) -> np.ndarray:
+    # Gameday zones: 1-9 inside the box (row-major from top-left), 11-14 outside quadrants
+    col = np.clip(((px + 0.83) / (0.83 * 2 / 3)).astype(int), 0, 2)
+    row = np.clip(((top - pz) / ((top - bot) / 3)).astype(int), 0, 2)
+    inside = (np.abs(px) <= 0.83) & (pz >= bot) & (pz <= top)
+    outside = np.where(pz >= (top + bot) / 2, np.where(px < 0, 11, 12), np.where(px < 0, 13, 14))
+    return np.where(inside, row * 3 + col + 1, outside)
+
+def _expected(rng: np.random.Generator, ev: np.ndarray, la: np.ndarray):
+    # smooth stand-ins for the speed/angle models: best around 100+ mph at 10-30 degrees
+    sweet = np.exp(-((la - 20) / 16) ** 2)
+    xba = np.clip(0.1 + 0.75 * sweet / (1 + np.exp(-(ev - 95) / 5)) + rng.normal(0, .04, len(ev)), 0, 1)
+    xslg = np.clip(xba * (1 + 2.8 * np.exp(-((la - 28) / 9) ** 2) / (1 + np.exp(-(ev - 100) / 3))), 0, 4)
+    xwoba = np.clip(0.9 * xba + 0.45 * (xslg - xba), 0, 2)
+    return xba.round(3), xwoba.round(3), xslg.round(3)
+
+def synthetic_statcast(
+    n_pitches: int,
+    n_batters: int = 1,
+    seasons: tuple = (2024,),
+    n_pitchers: int | None = None,
+    seed: int = 0,
+) -> pd.DataFrame:
+    """
+    About `n_pitches` pitches (trimmed to whole PAs) for `n_batters` hitters over
+    `seasons`. One hitter gives a player-shaped frame (~4 PA per game), more give
+    a league-shaped one (~76 PA per game spread across the pool).
+    """
+    rng = np.random.default_rng(seed)
+    lengths = _choice(rng, PITCHES_PER_PA, int(n_pitches / 3.5) + 16).astype(np.int64)
+    lengths = lengths[: max(1, int(np.searchsorted(np.cumsum(lengths), n_pitches, side="right")))]
+    n_pa, n = len(lengths), int(lengths.sum())
+
+    # ---- PA level ----
+    pa_per_game = 4 if n_batters == 1 else 76
+    pa_id = np.arange(n_pa)
+    game_idx = pa_id // pa_per_game
+    at_bat_number = pa_id % pa_per_game + 1
+    n_games = int(game_idx[-1]) + 1
+    season_of_game = np.asarray(seasons)[np.minimum(np.arange(n_games) * len(seasons) // n_games, len(seasons) - 1)]
+    # spread each season's games from late March through October; the tail is postseason
+    per_season = pd.Series(season_of_game).groupby(season_of_game).cumcount().to_numpy()
+    season_size = pd.Series(season_of_game).map(pd.Series(season_of_game).value_counts()).to_numpy()
+    frac = per_season / np.maximum(season_size, 1)
+    game_date = pd.DatetimeIndex(pd.to_datetime([f"{y}-03-28" for y in season_of_game])
+                                 + pd.to_timedelta((frac * 216).astype(int), unit="D"))
+    game_type = np.where(frac >= 0.98, "P", "R")
+
+    half = (at_bat_number - 1) * 18 // pa_per_game
+    inning = half // 2 + 1
+    topbot = np.where(half % 2 == 0, "Top", "Bot")
+
+    batter_ids = 600000 + np.arange(max(1, n_batters)) * 7
+    b = rng.integers(0, len(batter_ids), n_pa)
+    stand_of = np.where(rng.random(len(batter_ids)) < 0.4, "L", "R")
+    n_pitchers = n_pitchers or max(50, n_batters // 2)
+    pitcher_ids = 500000 + np.arange(n_pitchers) * 11
+    p = rng.integers(0, n_pitchers, n_pa)
+    throws_of = np.where(rng.random(n_pitchers) < 0.28, "L", "R")
+
+    events = _choice(rng, PA_EVENTS, n_pa)
+    runs = np.where(events == "home_run", 1 + rng.binomial(3, .2, n_pa), 0)
+    runs = np.where(np.isin(events, ["single", "double", "triple", "sac_fly"]), rng.binomial(1, .3, n_pa), runs)
+    half_key = game_idx * 2 + (half % 2)
+    post_score = pd.Series(runs).groupby(half_key).cumsum().to_numpy()
+    outs = rng.integers(0, 3, n_pa)
+    runner = lambda q: np.where(rng.random(n_pa) < q, rng.choice(batter_ids, n_pa), np.nan)
+    on_1b, on_2b, on_3b = runner(.30), runner(.18), runner(.10)
+
+    # ---- pitch level ----
+    starts = np.cumsum(lengths) - lengths
+    rep = np.repeat(pa_id, lengths)
+    pitch_number = np.arange(n) - starts[rep] + 1
+    last = pitch_number == lengths[rep]
+
+    take = np.array([t[:4] for t in TAKE_DESCRIPTIONS], dtype=object)
+    pick = rng.choice(len(take), size=n, p=np.array([t[4] for t in TAKE_DESCRIPTIONS]))
+    desc, typ = take[pick, 0].astype(object), take[pick, 1].astype(object)
+    b_inc, s_inc = take[pick, 2].astype(np.int64), take[pick, 3].astype(np.int64)
+
+    ev_rep = events[rep]
+    end_desc = np.select(
+        [np.isin(ev_rep, list(WALK_EVENTS)), np.isin(ev_rep, list(STRIKEOUT_EVENTS)), ev_rep == "hit_by_pitch", ev_rep == "catcher_interf"],
+        [np.full(n, "ball", dtype=object), np.where(rng.random(n) < .7, "swinging_strike", "called_strike").astype(object),
+         np.full(n, "hit_by_pitch", dtype=object), np.full(n, "foul", dtype=object)],
+        default="hit_into_play",
+    )
+    end_type = np.select([end_desc == "hit_into_play", np.isin(end_desc, ["ball", "hit_by_pitch"])], ["X", "B"], default="S")
+    desc = np.where(last, end_desc, desc)
+    typ = np.where(last, end_type, typ)
+
+    # count before each pitch: prior balls/strikes in the PA, capped at 3-2 (fouls with two strikes keep it)
+    cb, cs = np.cumsum(b_inc) - b_inc, np.cumsum(s_inc) - s_inc
+    balls = np.minimum(cb - cb[starts][rep], 3)
+    strikes = np.minimum(cs - cs[starts][rep], 2)
+
+    pitch_type = _choice(rng, PITCH_MIX, n)
+    mix = pd.DataFrame.from_dict(PITCH_MIX, orient="index", columns=["name", "share", "velo", "spin"])
+    meta = mix.reindex(pitch_type)
+    sz_top = rng.normal(3.38, 0.12, n).round(2)
+    sz_bot = rng.normal(1.60, 0.08, n).round(2)
+    plate_x = rng.normal(0.0, 0.85, n).round(2)
+    plate_z = rng.normal(2.35, 0.95, n).round(2)
+
+    bip = typ == "X"
+    ls = np.where(bip, np.clip(rng.normal(89, 14, n), 25, 120), np.nan).round(1)
+    la = np.where(bip, np.clip(rng.normal(12, 26, n), -85, 88), np.nan).round(0)
+    xba, xwoba, xslg = _expected(rng, np.nan_to_num(ls), np.nan_to_num(la))
+    bb_type = np.where(la < 10, "ground_ball", np.where(la < 25, "line_drive", np.where(la < 50, "fly_ball", "popup")))
+
+    out = pd.DataFrame({
+        "pitch_type": pitch_type,
+        "game_date": game_date[game_idx][rep].strftime("%Y-%m-%d"),
+        "release_speed": (meta["velo"].to_numpy() + rng.normal(0, 1.6, n)).round(1),
+        "player_name": pd.Series(batter_ids).astype(str).radd("Batter ").add(", Test").to_numpy()[b][rep],
+        "batter": batter_ids[b][rep],
+        "pitcher": pitcher_ids[p][rep],
+        "events": np.where(last, ev_rep, None),
+        "description": desc,
+        "zone": _zone(plate_x, plate_z, sz_top, sz_bot),
+        "game_type": game_type[game_idx][rep],
+        "stand": stand_of[b][rep],
+        "p_throws": throws_of[p][rep],
+        "type": typ,
+        "bb_type": np.where(bip, bb_type, None),
+        "balls": balls,
+        "strikes": strikes,
+        "game_year": season_of_game[game_idx][rep],
+        "plate_x": plate_x,
+        "plate_z": plate_z,
+        "on_3b": on_3b[rep],
+        "on_2b": on_2b[rep],
+        "on_1b": on_1b[rep],
+        "outs_when_up": outs[rep],
+        "inning": inning[rep],
+        "inning_topbot": topbot[rep],
+        "sz_top": sz_top,
+        "sz_bot": sz_bot,
+        "launch_speed": ls,
+        "launch_angle": la,
+        "release_spin_rate": (meta["spin"].to_numpy() + rng.normal(0, 120, n)).round(0),
+        "game_pk": 700000 + game_idx[rep],
+        "estimated_ba_using_speedangle": np.where(bip, xba, np.nan),
+        "estimated_woba_using_speedangle": np.where(bip, xwoba, np.nan),
+        "woba_value": np.where(last, pd.Series(ev_rep).map({"walk": .69, "hit_by_pitch": .72, "single": .88, "double": 1.25, "triple": 1.58, "home_run": 2.01}).fillna(0).to_numpy(), np.nan),
+        "at_bat_number": at_bat_number[rep],
+        "pitch_number": pitch_number,
+        "pitch_name": meta["name"].to_numpy(),
+        "bat_score": (post_score - runs)[rep],
+        "post_bat_score": post_score[rep],
+        "estimated_slg_using_speedangle": np.where(bip, xslg, np.nan),
+    })
+    return out
@@ -1,15 +1,38 @@
-import sys, time, calendar, math
-from io import StringIO
-from typing import List, Dict
+import sys, time, calendar, math, os
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+from typing import List, Dict, Tuple
+import numpy as np
 import pandas as pd
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
+from backend.sequence_src import transport
 
 BASE = "https://baseballsavant.mlb.com/statcast_search/csv"
 MLB = "https://statsapi.mlb.com/api/v1/people/"
 UA = {"User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/17 Safari/605.1.15"}
 
+# Savant silently caps statcast_search/csv results; a chunk at the cap is split and refetched.
+SAVANT_ROW_CAP = int(os.getenv("SAVANT_ROW_CAP", "25000"))
+FETCH_WORKERS = int(os.getenv("SAVANT_FETCH_WORKERS", "6"))
+
+def _make_session() -> requests.Session:
+    s = requests.Session()
+    retry = Retry(total=4, backoff_factor=1.0, status_forcelist=(429, 500, 502, 503, 504),
+                  allowed_methods=frozenset(["GET"]), respect_retry_after_header=True)
+    adapter = HTTPAdapter(pool_connections=2, pool_maxsize=FETCH_WORKERS, max_retries=retry)
+    s.mount("https://", adapter)
+    s.mount("http://", adapter)
+    s.headers.update(UA)
+    return s
+
+transport.install()   # SEQUENCE_HTTP_MODE=record|replay for offline load tests
+_session = _make_session()
+_pool = ThreadPoolExecutor(max_workers=FETCH_WORKERS, thread_name_prefix="savant")
+
 app = FastAPI()
 app.add_middleware(
     CORSMiddleware,
@@ -28,15 +51,47 @@ def _params(player: str, start: str, end: str) -> Dict[str, str]:
         "game_date_lt": end,
     }
 
-def _fetch_csv(player_token: str, start: str, end: str) -> pd.DataFrame:
-    for _ in range(3):
+def _month_windows(start: str, end: str) -> List[Tuple[date, date]]:
+    lo, hi = date.fromisoformat(start), date.fromisoformat(end)
+    out = []
+    while lo <= hi:
+        nxt = (lo.replace(day=1) + timedelta(days=32)).replace(day=1)
+        out.append((lo, min(nxt - timedelta(days=1), hi)))
+        lo = nxt
+    return out
+
+def _fetch_chunk(player_token: str, lo: date, hi: date) -> pd.DataFrame:
+    with _session.get(BASE, params=_params(player_token, lo.isoformat(), hi.isoformat()), timeout=(10, 120), stream=True) as r:
+        r.raise_for_status()
+        r.raw.decode_content = True
         try:
-            r = requests.get(BASE, params=_params(player_token, start, end), headers=UA, timeout=60)
-            if r.ok and r.text.strip():
-                return pd.read_csv(StringIO(r.text))
-        except Exception:
-            time.sleep(2)
-    return pd.DataFrame()
+            df = pd.read_csv(r.raw, low_memory=False)
+        except pd.errors.EmptyDataError:
+            return pd.DataFrame()
+    if len(df) < SAVANT_ROW_CAP:
+        return df
+    if lo >= hi:
+        raise RuntimeError(f"Savant returned {len(df)} rows (cap) for a single day {lo} / {player_token}")
+    mid = lo + (hi - lo) // 2
+    return pd.concat([_fetch_chunk(player_token, lo, mid), _fetch_chunk(player_token, mid + timedelta(days=1), hi)], ignore_index=True)
+
+def _fetch_ranges(player_token: str, ranges: List[Tuple[str, str]]) -> List[pd.DataFrame]:
+    """Fetch several date ranges at once; every range is split into month chunks on the shared pool."""
+    jobs = [[_pool.submit(_fetch_chunk, player_token, lo, hi) for lo, hi in _month_windows(a, b)] for a, b in ranges]
+    out = []
+    for futs in jobs:
+        try:
+            parts = [f.result() for f in futs]
+        except requests.RequestException:
+            # still failing after the adapter's retries: the range counts as missing (as the
+            # per-request fetch always did), so get_batter_seasons falls back to the name lookup
+            parts = []
+        parts = [p for p in parts if not p.empty]
+        out.append(pd.concat(parts, ignore_index=True) if parts else pd.DataFrame())
+    return out
+
+def _fetch_csv(player_token: str, start: str, end: str) -> pd.DataFrame:
+    return _fetch_ranges(player_token, [(start, end)])[0]
 
 def _name_for_id(pid: int) -> str:
     r = requests.get(f"{MLB}{pid}", headers=UA, timeout=20)
@@ -44,85 +99,139 @@ def _name_for_id(pid: int) -> str:
     d = r.json()
     return d["people"][0]["fullName"]
 
-def _col(df: pd.DataFrame, key: str) -> pd.Series:
-    for c in df.columns:
-        if key.lower() in c.lower():
-            return df[c]
-    return pd.Series([], dtype="float64")
-
-def _barrel(row) -> bool:
-    ev = row.get("launch_speed")
-    la = row.get("launch_angle")
-    if pd.isna(ev) or pd.isna(la):
-        return False
-    if ev >= 98 and 26 <= la <= 30:
-        return True
-    if ev >= 99 and 25 <= la <= 31:
-        return True
-    if ev >= 100 and 24 <= la <= 33:
-        return True
-    return False
-
-def _season_row(df: pd.DataFrame, season: int) -> Dict[str, float]:
+# canonical name -> Savant column key (exact match wins, else first column containing the key)
+COLUMN_KEYS = {
+    "launch_speed": "launch_speed", "launch_angle": "launch_angle",
+    "est_woba": "estimated_woba", "est_ba": "estimated_ba", "est_slg": "estimated_slg",
+    "bb_type": "bb_type", "description": "description", "zone": "zone",
+    "pitch_number": "pitch_number", "game_year": "game_year", "game_date": "game_date",
+}
+SWING_DESC = {"swinging_strike", "swinging_strike_blocked", "foul", "foul_tip", "foul_bunt", "bunt_foul_tip",
+              "missed_bunt", "hit_into_play", "hit_into_play_no_out", "hit_into_play_score"}
+WHIFF_DESC = {"swinging_strike", "swinging_strike_blocked", "foul_tip", "missed_bunt", "bunt_foul_tip"}
+STRIKE_DESC = SWING_DESC | {"called_strike"}
+ROW_KEYS = ["season", "bbe", "ev", "evMax", "la", "hard", "sweet", "barrel", "xwOBA", "xBA", "xSLG",
+            "swing", "whiff", "chase", "zone", "fps", "gb", "ld", "fb"]
+
+def _resolve_columns(df: pd.DataFrame) -> Dict[str, str]:
+    lower = {c.lower(): c for c in df.columns}
+    out = {}
+    for name, key in COLUMN_KEYS.items():
+        if key in lower:
+            out[name] = lower[key]
+            continue
+        hit = next((c for c in df.columns if key in c.lower()), None)
+        if hit is not None:
+            out[name] = hit
+    return out
+
+def _barrel(ev: pd.Series, la: pd.Series) -> pd.Series:
+    return (((ev >= 98) & la.between(26, 30))
+            | ((ev >= 99) & la.between(25, 31))
+            | ((ev >= 100) & la.between(24, 33)))
+
+def _pct(num: pd.Series, den: pd.Series) -> pd.Series:
+    return (num / den.where(den > 0) * 100).round(1).fillna(0.0)
+
+def _season_rows(df: pd.DataFrame, seasons: List[int]) -> List[Dict[str, float]]:
+    """One vectorized pass over pitch rows of any number of seasons; seasons without data get zero rows."""
+    empty = pd.DataFrame(0, index=pd.Index(seasons, name="season"), columns=ROW_KEYS[1:])
     if df.empty:
-        return {
-            "season": season, "bbe": 0, "ev": 0, "evMax": 0, "la": 0,
-            "hard": 0, "sweet": 0, "barrel": 0,
-            "xwOBA": 0, "xBA": 0, "xSLG": 0,
-            "swing": 0, "whiff": 0, "chase": 0, "zone": 0, "fps": 0,
-            "gb": 0, "ld": 0, "fb": 0
-        }
-
-    ls = _col(df, "launch_speed")
-    la = _col(df, "launch_angle")
-    est_woba = _col(df, "estimated_woba")
-    est_ba = _col(df, "estimated_ba")
-    est_slg = _col(df, "estimated_slg")
-    bb_type = _col(df, "bb_type")
-
-    m = pd.DataFrame({"launch_speed": ls, "launch_angle": la})
-    m = m.dropna(subset=["launch_speed", "launch_angle"])
-    bbe = int(len(m))
-
-    if bbe == 0:
-        return _season_row(pd.DataFrame(), season)
-
-    ev_avg = float(round(m["launch_speed"].mean(), 1))
-    ev_max = float(round(m["launch_speed"].max(), 1))
-    la_avg = float(round(m["launch_angle"].mean(), 1))
-    hard = float(round((m["launch_speed"] >= 95).mean() * 100, 1))
-    sweet = float(round(((m["launch_angle"] >= 8) & (m["launch_angle"] <= 32)).mean() * 100, 1))
-    barrel = float(round(m.apply(_barrel, axis=1).mean() * 100, 1))
-
-    xwoba = float(round(est_woba.mean(), 3)) if len(est_woba) else 0.0
-    xba = float(round(est_ba.mean(), 3)) if len(est_ba) else 0.0
-    xslg = float(round(est_slg.mean(), 3)) if len(est_slg) else 0.0
-
-    gb = float(round((bb_type.str.contains("ground", case=False, na=False)).mean() * 100, 1)) if len(bb_type) else 0.0
-    ld = float(round((bb_type.str.contains("line", case=False, na=False)).mean() * 100, 1)) if len(bb_type) else 0.0
-    fb = float(round((bb_type.str.contains("fly", case=False, na=False)).mean() * 100, 1)) if len(bb_type) else 0.0
+        return _rows(empty)
+    cols = _resolve_columns(df)
+    def num(k):
+        return pd.to_numeric(df[cols[k]], errors="coerce") if k in cols else pd.Series(np.nan, index=df.index)
+    def txt(k):
+        return df[cols[k]].astype("string").str.lower() if k in cols else pd.Series(pd.NA, index=df.index, dtype="string")
+
+    if "season" in df.columns:
+        season = df["season"]
+    elif "game_year" in cols:
+        season = num("game_year")
+    else:
+        season = pd.to_datetime(df[cols["game_date"]]).dt.year
+    ls, la = num("launch_speed"), num("launch_angle")
+    bbe = ls.notna() & la.notna()
+    desc, bb_type, zone = txt("description"), txt("bb_type"), num("zone")
+    swing = desc.isin(SWING_DESC).fillna(False)
+    in_zone, out_zone = zone.between(1, 9), zone >= 11
+    first = num("pitch_number").eq(1)
+    bip = bb_type.notna()
+
+    f = pd.DataFrame({
+        "season": season.astype("int64"),
+        "pitches": 1,
+        "bbe": bbe,
+        "ev": ls.where(bbe), "evMax": ls.where(bbe), "la": la.where(bbe),
+        "hard": bbe & (ls >= 95),
+        "sweet": bbe & la.between(8, 32),
+        "barrel": bbe & _barrel(ls, la),
+        "xwOBA": num("est_woba"), "xBA": num("est_ba"), "xSLG": num("est_slg"),
+        "swings": swing,
+        "whiffs": desc.isin(WHIFF_DESC).fillna(False),
+        "in_zone": in_zone, "zone_known": in_zone | out_zone,
+        "out_zone": out_zone, "chases": swing & out_zone,
+        "first": first, "fps": first & desc.isin(STRIKE_DESC).fillna(False),
+        "bip": bip,
+        "gb": bb_type.str.contains("ground", na=False),
+        "ld": bb_type.str.contains("line", na=False),
+        "fb": bb_type.str.contains("fly", na=False),
+    })
+    g = f.groupby("season").agg(
+        pitches=("pitches", "sum"), bbe=("bbe", "sum"),
+        ev=("ev", "mean"), evMax=("evMax", "max"), la=("la", "mean"),
+        hard=("hard", "sum"), sweet=("sweet", "sum"), barrel=("barrel", "sum"),
+        xwOBA=("xwOBA", "mean"), xBA=("xBA", "mean"), xSLG=("xSLG", "mean"),
+        swings=("swings", "sum"), whiffs=("whiffs", "sum"), in_zone=("in_zone", "sum"),
+        zone_known=("zone_known", "sum"), out_zone=("out_zone", "sum"), chases=("chases", "sum"),
+        first=("first", "sum"), fps=("fps", "sum"),
+        bip=("bip", "sum"), gb=("gb", "sum"), ld=("ld", "sum"), fb=("fb", "sum"),
+    )
+    out = pd.DataFrame(index=g.index)
+    out["bbe"] = g["bbe"]
+    for k in ("ev", "evMax", "la"):
+        out[k] = g[k].round(1)
+    for k in ("hard", "sweet", "barrel"):
+        out[k] = _pct(g[k], g["bbe"])
+    for k in ("xwOBA", "xBA", "xSLG"):
+        out[k] = g[k].round(3)
+    out["swing"] = _pct(g["swings"], g["pitches"])
+    out["whiff"] = _pct(g["whiffs"], g["swings"])
+    out["chase"] = _pct(g["chases"], g["out_zone"])
+    out["zone"] = _pct(g["in_zone"], g["zone_known"])
+    out["fps"] = _pct(g["fps"], g["first"])
+    for k in ("gb", "ld", "fb"):
+        out[k] = _pct(g[k], g["bip"])
+    no_bbe = out["bbe"] == 0
+    out.loc[no_bbe, ["ev", "evMax", "la", "hard", "sweet", "barrel", "xwOBA", "xBA", "xSLG"]] = 0.0
+    return _rows(out.fillna(0.0).reindex(empty.index, fill_value=0))
+
+def _rows(t: pd.DataFrame) -> List[Dict[str, float]]:
+    t = t.astype(float)
+    t["bbe"] = t["bbe"].astype(int)
+    return [{"season": int(y), **r} for y, r in zip(t.index, t[ROW_KEYS[1:]].to_dict(orient="records"))]
 
-    return {
-        "season": season, "bbe": bbe, "ev": ev_avg, "evMax": ev_max, "la": la_avg,
-        "hard": hard, "sweet": sweet, "barrel": barrel,
-        "xwOBA": xwoba, "xBA": xba, "xSLG": xslg,
-        "swing": 0.0, "whiff": 0.0, "chase": 0.0, "zone": 0.0, "fps": 0.0,
-        "gb": gb, "ld": ld, "fb": fb
-    }
+def _season_row(df: pd.DataFrame, season: int) -> Dict[str, float]:
+    return _season_rows(df.assign(season=season) if not df.empty else df, [season])[0]
 
-def get_batter_season(pid: int, season: int) -> Dict[str, float]:
-    start = f"{season}-03-01"
-    end = f"{season}-11-30"
+def _season_range(season: int) -> Tuple[str, str]:
+    return f"{season}-03-01", f"{season}-11-30"
 
-    df = _fetch_csv(str(pid), start, end)
-    if df.empty:
+def get_batter_seasons(pid: int, seasons: List[int]) -> List[Dict[str, float]]:
+    frames = dict(zip(seasons, _fetch_ranges(str(pid), [_season_range(y) for y in seasons])))
+    missing = [y for y, df in frames.items() if df.empty]
+    if missing:
         try:
             name = _name_for_id(pid)
-            df = _fetch_csv(name, start, end)
+            frames.update(zip(missing, _fetch_ranges(name, [_season_range(y) for y in missing])))
         except Exception:
-            df = pd.DataFrame()
+            pass
+    frames = [df.assign(season=y) for y, df in frames.items() if not df.empty]
+    pitches = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+    return _season_rows(pitches, seasons)
 
-    return _season_row(df, season)
+def get_batter_season(pid: int, season: int) -> Dict[str, float]:
+    return get_batter_seasons(pid, [season])[0]
 
 @app.get("/healthz")
 def healthz(): return {"ok": True}
@@ -130,8 +239,8 @@ def healthz(): return {"ok": True}
 @app.get("/statcast/summary")
 def summary(player_id: int, seasons: str):
     try:
-        ys = [int(x) for x in seasons.split(",") if x.strip()]
-        rows = [get_batter_season(player_id, y) for y in ys]
+        ys = sorted({int(x) for x in seasons.split(",") if x.strip()})
+        rows = get_batter_seasons(player_id, ys)
         rows.sort(key=lambda r: r["season"])
         return {"rows": rows}
     except Exception as e:
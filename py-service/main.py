@@ -1,6 +1,8 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from pybaseball import statcast_batter_exitvelo_barrels as evb, statcast_batter_expected_stats as xstats, cache
+from pathlib import Path
+import os, threading, time
 import pandas as pd, numpy as np
 
 cache.enable()
@@ -8,56 +10,119 @@ cache.enable()
 app = FastAPI()
 app.add_middleware(CORSMiddleware, allow_origins=["*"], allow_methods=["*"], allow_headers=["*"])
 
-def fnum(v, d=0.0):
+# League leaderboards are downloaded once per season, normalized into a table indexed
+# by MLBAM id, kept in memory for BOARD_TTL seconds and persisted under BOARD_DIR.
+# A season whose download failed (or came back empty) is retried after BOARD_RETRY.
+BOARD_TTL = float(os.getenv("LEADERBOARD_TTL_SECONDS", 6 * 3600))
+BOARD_RETRY = float(os.getenv("LEADERBOARD_RETRY_SECONDS", 120))
+BOARD_DIR = Path(os.getenv("LEADERBOARD_CACHE_DIR", "cache/leaderboards"))
+ID_COLS = ["player_id","playerid","batter","id","mlbam_id","key_mlbam"]
+SUMMARY_COLS = ["bbe","ev","evMax","la","hard","sweet","barrel","xwOBA","xBA","xSLG"]
+PCT_COLS = ["hard","sweet","barrel"]
+EVB_FIELDS = {
+    "ev":     ["avg_hit_speed","avg_exitspeed","avg_ev"],
+    "evMax":  ["max_hit_speed","max_exitspeed","max_ev"],
+    "la":     ["avg_launch_angle","avg_la","la_avg"],
+    "hard":   ["hard_hit_percent","hardhit_percent","hardhit_pct"],
+    "sweet":  ["sweet_spot_percent","sweetspot_percent","sweetspot_pct"],
+    "barrel": ["brl_percent","barrel_percent","brl_pct"],
+    "bbe":    ["batted_balls","events","bip"],
+}
+XSTATS_FIELDS = {
+    "xwOBA": ["xwoba","xwOBA"],
+    "xBA":   ["xba","xBA"],
+    "xSLG":  ["xslg","xSLG"],
+}
+_tables = {}   # season -> (expires_at, table)
+_locks = {}    # season -> lock, so one slow season never blocks another
+_lock = threading.Lock()
+
+def _normalize(df: pd.DataFrame, fields) -> pd.DataFrame:
+    if df is None or df.empty:
+        return pd.DataFrame(columns=list(fields))
+    id_col = next((k for k in ID_COLS if k in df.columns), None)
+    if id_col is None:
+        return pd.DataFrame(columns=list(fields))
+    ids = pd.to_numeric(df[id_col], errors="coerce")
+    out = pd.DataFrame(index=ids.rename("player_id"))
+    for name, candidates in fields.items():
+        src = next((c for c in candidates if c in df.columns), None)
+        out[name] = pd.to_numeric(df[src], errors="coerce").to_numpy() if src else np.nan
+    out = out[out.index.notna()]
+    out.index = out.index.astype("int64")
+    return out[~out.index.duplicated()]
+
+def _season_lock(season: int) -> threading.Lock:
+    with _lock:
+        return _locks.setdefault(season, threading.Lock())
+
+def _download(season: int):
+    """(table, complete); complete is False if either leaderboard failed to download."""
+    parts, complete = [], True
+    try:
+        parts.append(_normalize(evb(season), EVB_FIELDS))
+    except Exception:
+        parts.append(pd.DataFrame(columns=list(EVB_FIELDS)))
+        complete = False
     try:
-        if v is None: return d
-        if isinstance(v, (float, int)): return float(v) if np.isfinite(v) else d
-        s = str(v).strip().lower()
-        if s in ("", "nan", "inf", "-inf"): return d
-        return float(s)
-    except: return d
+        parts.append(_normalize(xstats(season, min_pa=0), XSTATS_FIELDS))
+    except Exception:
+        parts.append(pd.DataFrame(columns=list(XSTATS_FIELDS)))
+        complete = False
+    t = parts[0].join(parts[1], how="outer").reindex(columns=SUMMARY_COLS).astype(float)
+    t = t.replace([np.inf, -np.inf], np.nan).fillna(0.0)
+    t[PCT_COLS] = t[PCT_COLS].where(t[PCT_COLS] <= 1, t[PCT_COLS] / 100.0)
+    t["bbe"] = t["bbe"].astype(int)
+    return t, complete
 
-def pick_row(df: pd.DataFrame, pid: int):
-    for k in ["player_id","playerid","batter","id","mlbam_id","key_mlbam"]:
-        if k in df.columns:
-            sub = df[df[k].astype(str) == str(pid)]
-            if len(sub): return sub.iloc[0].to_dict()
-    return {}
+def season_table(season: int) -> pd.DataFrame:
+    hit = _tables.get(season)
+    if hit and time.time() < hit[0]:
+        return hit[1]
+    with _season_lock(season):
+        now = time.time()
+        hit = _tables.get(season)
+        if hit and now < hit[0]:
+            return hit[1]
+        path = BOARD_DIR / f"batter_summary_{season}.parquet"
+        if path.exists() and now - path.stat().st_mtime < BOARD_TTL:
+            t, ttl = pd.read_parquet(path), BOARD_TTL
+        else:
+            t, complete = _download(season)
+            if complete and not t.empty:
+                BOARD_DIR.mkdir(parents=True, exist_ok=True)
+                tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+                t.to_parquet(tmp)
+                os.replace(tmp, path)
+                ttl = BOARD_TTL
+            else:
+                # partial or empty: never persisted; serve the last good copy if any and retry soon
+                if path.exists():
+                    t = pd.read_parquet(path)
+                ttl = BOARD_RETRY
+        _tables[season] = (now + ttl, t)
+        return t
+
+def summary_rows(player_ids, seasons):
+    """{player_id: [row per season]} with one indexed take per season table."""
+    out = {int(p): [] for p in player_ids}
+    for y in sorted(set(seasons)):
+        rows = season_table(y).reindex(list(out)).fillna(0)
+        rows["bbe"] = rows["bbe"].astype(int)
+        for pid, r in zip(rows.index, rows.to_dict(orient="records")):
+            out[int(pid)].append({"season": y, **r})
+    return out
 
 @app.get("/statcast/summary")
 def statcast_summary(player_id: int, seasons: str):
     years = [int(y) for y in seasons.split(",") if y.strip().isdigit()]
-    out = []
-    for y in years:
-        row = {"season": y, "bbe": 0, "ev": 0, "evMax": 0, "la": 0, "hard": 0, "sweet": 0, "barrel": 0, "xwOBA": 0, "xBA": 0, "xSLG": 0}
-        try:
-            de = evb(y)
-            r = pick_row(de, player_id)
-            if r:
-                row["ev"]    = fnum(r.get("avg_hit_speed", r.get("avg_exitspeed", r.get("avg_ev"))))
-                row["evMax"] = fnum(r.get("max_hit_speed", r.get("max_exitspeed", r.get("max_ev"))))
-                row["la"]    = fnum(r.get("avg_launch_angle", r.get("avg_la", r.get("la_avg", 0))))
-                row["hard"]  = fnum(r.get("hard_hit_percent", r.get("hardhit_percent", r.get("hardhit_pct", 0))))
-                row["hard"]  = row["hard"]/100.0 if row["hard"]>1 else row["hard"]
-                row["sweet"] = fnum(r.get("sweet_spot_percent", r.get("sweetspot_percent", r.get("sweetspot_pct", 0))))
-                row["sweet"] = row["sweet"]/100.0 if row["sweet"]>1 else row["sweet"]
-                row["barrel"]= fnum(r.get("brl_percent", r.get("barrel_percent", r.get("brl_pct", 0))))
-                row["barrel"]= row["barrel"]/100.0 if row["barrel"]>1 else row["barrel"]
-                row["bbe"]   = int(fnum(r.get("batted_balls", r.get("events", r.get("bip", 0))), 0))
-        except Exception:
-            pass
-        try:
-            dx = xstats(y, min_pa=0)
-            r2 = pick_row(dx, player_id)
-            if r2:
-                row["xwOBA"] = fnum(r2.get("xwoba", r2.get("xwOBA")))
-                row["xBA"]   = fnum(r2.get("xba", r2.get("xBA")))
-                row["xSLG"]  = fnum(r2.get("xslg", r2.get("xSLG")))
-        except Exception:
-            pass
-        out.append(row)
-    out.sort(key=lambda r: r["season"])
-    return {"rows": out}
+    return {"rows": summary_rows([player_id], years)[player_id]}
+
+@app.get("/statcast/summary/bulk")
+def statcast_summary_bulk(player_ids: str, seasons: str):
+    ids = [int(p) for p in player_ids.split(",") if p.strip().isdigit()]
+    years = [int(y) for y in seasons.split(",") if y.strip().isdigit()]
+    return {"players": {str(k): v for k, v in summary_rows(ids, years).items()}}
 
 @app.get("/healthz")
 def healthz():
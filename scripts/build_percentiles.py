@@ -0,0 +1,17 @@
+#!/usr/bin/env python
+from __future__ import annotations
+import argparse, datetime as dt
+from backend.analytics import percentiles
+def parse_args():
+    p = argparse.ArgumentParser()
+    p.add_argument("--season", type=int, action="append", help="repeatable; defaults to the current season")
+    p.add_argument("--points", type=int, default=None, help="keep an N-point quantile sketch per metric instead of every value")
+    return p.parse_args()
+def main():
+    args = parse_args()
+    seasons = args.season or [dt.date.today().year]
+    table = percentiles.run(seasons, points=args.points)
+    print(f"[PCTL] wrote: {percentiles.PERCENTILES_PATH}")
+    print(table[table["season"].isin(seasons)].groupby(["season", "metric"]).agg(n=("n", "first"), min_pa=("min_pa", "first"), stored=("value", "size")).to_string())
+if __name__ == "__main__":
+    main()
@@ -1,14 +1,15 @@
-import sys, json
-import pandas as pd
-from backend.api.server import _ensure_events
-from backend.sequence_src.scrape_savant import lookup_batter_id
+import sys
+# only the store: importing the API here would load FastAPI for a batch job
+from backend.sequence_src.scrape_savant import fetch_batter_statcast, lookup_batter_id, season_window
 season = int(sys.argv[1]) if len(sys.argv)>1 else 2025
 names = sys.argv[2:] if len(sys.argv)>2 else []
 if not names:
     names = ["Pete Alonso","Shohei Ohtani","Mookie Betts","Juan Soto"]
 for n in names:
-    pid = lookup_batter_id(n)
-    if pd.isna(pid):
+    try:
+        pid = lookup_batter_id(n)
+    except ValueError:
         continue
-    _ensure_events(int(pid), season, "regular")
+    # same window the hitter routes read, so the warmed partition is the one they hit
+    fetch_batter_statcast(int(pid), *season_window(season))
 print("ok")
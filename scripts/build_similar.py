@@ -0,0 +1,17 @@
+#!/usr/bin/env python
+from __future__ import annotations
+import argparse, datetime as dt
+from backend.analytics import similar
+def parse_args():
+    p = argparse.ArgumentParser()
+    p.add_argument("--season", type=int, action="append", help="repeatable; defaults to the current season")
+    p.add_argument("--min-pa", type=int, default=similar.MIN_PA)
+    return p.parse_args()
+def main():
+    args = parse_args()
+    seasons = args.season or [dt.date.today().year]
+    table = similar.run(seasons, min_pa=args.min_pa)
+    print(f"[SIMILAR] wrote: {similar.PROFILES_PATH}")
+    print(table.groupby("season").size().rename("profiles").to_string())
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,16 @@
+#!/usr/bin/env python
+from __future__ import annotations
+import argparse, datetime as dt
+from backend.analytics import woba
+def parse_args():
+    p = argparse.ArgumentParser()
+    p.add_argument("--season", type=int, action="append", help="repeatable; defaults to the current season")
+    return p.parse_args()
+def main():
+    args = parse_args()
+    seasons = args.season or [dt.date.today().year]
+    table = woba.run(seasons)
+    print(f"[WOBA] wrote: {woba.WOBA_CONSTANTS_PATH}")
+    print(table.loc[table.index.isin(seasons)].to_string())
+if __name__ == "__main__":
+    main()
@@ -1,21 +1,41 @@
 #!/usr/bin/env python
 from __future__ import annotations
 import argparse
-from backend import etl
-from backend.report_generator import generate_hitter_pdf
 def parse_args():
     p = argparse.ArgumentParser()
     p.add_argument("--mode", default=None, choices=["incremental","full","auto"])
     p.add_argument("--season", type=int)
     p.add_argument("--report_player_id", type=int)
+    p.add_argument("--report_player_ids", help="comma sep MLBAM ids for a batch report pack")
+    p.add_argument("--report_team", help="team id or key (e.g. NYM); reports every roster hitter")
     p.add_argument("--report_season", type=int)
+    p.add_argument("--report_workers", type=int)
+    p.add_argument("--report_force", action="store_true", help="re-render even if inputs are unchanged")
     return p.parse_args()
 def main():
     args = parse_args()
-    out = etl.run(mode=args.mode, season=args.season) if args.mode else None
-    print(f"[ETL] wrote: {out}")
+    # etl pulls in pandas and the Statcast store, reports pull in fpdf: import only what this run needs
+    out = None
+    if args.mode:
+        from backend import etl
+        out = etl.run(mode=args.mode, season=args.season)
+        print(f"[ETL] wrote: {out}")
+    ids = [int(x) for x in (args.report_player_ids or "").split(",") if x.strip()]
+    if args.report_season and (args.report_player_id or ids or args.report_team) and out is None:
+        # reports read processed/: publish a staged table first, or fail clearly if there is none
+        from backend.publish import publish
+        publish()
     if args.report_player_id and args.report_season:
+        from backend.report_generator import generate_hitter_pdf
         pdf = generate_hitter_pdf(args.report_player_id, args.report_season)
         print(f"[REPORT] wrote: {pdf}")
+    if args.report_team:
+        from backend.sequence_src.next_opponent import roster_hitters
+        team = int(args.report_team) if args.report_team.isdigit() else args.report_team
+        ids += roster_hitters(team)
+    if ids and args.report_season:
+        from backend.report_generator import generate_hitter_pdfs
+        res = generate_hitter_pdfs(ids, args.report_season, workers=args.report_workers, force=args.report_force)
+        print(f"[REPORT] rendered {len(res['rendered'])}, unchanged {len(res['skipped'])}")
 if __name__ == "__main__":
     main()
@@ -1,21 +1,17 @@
 #!/usr/bin/env python
 from __future__ import annotations
 from pathlib import Path
-import sys, pandas as pd
-from backend.config import PROCESSED_DIR
-def fail(msg: str) -> None:
-    print(f"[FAIL] {msg}")
-    sys.exit(1)
+import argparse
+from backend.publish import publish
+def parse_args():
+    p = argparse.ArgumentParser()
+    p.add_argument("--input", type=Path, help="defaults to the staged table, else the published one; copied, never moved")
+    p.add_argument("--chunksize", type=int, default=100_000)
+    p.add_argument("--max_drop", type=float, default=0.10, help="max fractional row-count drop vs last publish")
+    p.add_argument("--no_publish", action="store_true")
+    return p.parse_args()
 def main():
-    path = PROCESSED_DIR / "hitters_season.csv"
-    if not path.exists():
-        fail(f"Missing processed file: {path}")
-    df = pd.read_csv(path)
-    required = {"batter","player_name","season","PA","AB","H","AVG","OBP","SLG"}
-    if not required.issubset(df.columns):
-        fail(f"Missing required columns: {sorted(required - set(df.columns))}")
-    if len(df) == 0:
-        fail("No rows in processed table.")
-    print(f"[OK] {len(df)} rows; validations passed.")
+    args = parse_args()
+    publish(args.input, chunksize=args.chunksize, max_drop=args.max_drop, dry_run=args.no_publish)
 if __name__ == "__main__":
     main()
@@ -0,0 +1,54 @@
+"""BrowserPool lifecycle against a local static page (needs Playwright + Chromium)."""
+import asyncio
+import functools
+import gc
+import threading
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+pytest.importorskip("playwright.async_api")
+
+from backend.sequence_src import fetch
+
+
+class _QuietHandler(SimpleHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def page_url(tmp_path):
+    (tmp_path / "index.html").write_text("<html><body><p id='ok'>pooled</p></body></html>")
+    server = ThreadingHTTPServer(("127.0.0.1", 0), functools.partial(_QuietHandler, directory=str(tmp_path)))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_address[1]}/index.html"
+    server.shutdown()
+    server.server_close()
+
+
+def test_pool_is_reused_on_a_loop_and_closed_with_it(page_url):
+    async def main():
+        first = await fetch.browser_get(page_url, wait_selector="#ok")
+        second = await fetch.browser_get(page_url)
+        return fetch.get_browser_pool(), first, second
+
+    pool, first, second = asyncio.run(main())
+    assert "pooled" in first and "pooled" in second
+    assert pool.launches == 1
+    assert pool._browser is None and pool._pw is None
+    del pool
+    gc.collect()
+    assert len(fetch._BROWSER_POOLS) == 0
+
+
+def test_aclose_browser_pool(page_url):
+    async def main():
+        await fetch.browser_get(page_url)
+        pool = fetch.get_browser_pool()
+        await fetch.aclose_browser_pool()
+        return pool
+
+    pool = asyncio.run(main())
+    assert pool._browser is None
+    assert len(fetch._BROWSER_POOLS) == 0